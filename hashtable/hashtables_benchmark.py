@@ -0,0 +1,315 @@
+"""Benchmarks for the hashtable implementations.
+Run with an optional list of table sizes, e.g.
+    python hashtables_benchmark.py 1000 10000 100000 1000000
+The stress benchmark fills each open addressing table up to its resize
+threshold with keys that all hash to the same slot.
+Author: Ben Paulson
+"""
+
+import gc
+import sys
+import math
+import time
+import itertools
+import tracemalloc
+from linked_list import OrderedList
+from hashtables import (HashTableSepchain, HashTableLinear,
+                        HashTableQuadratic, HashTableCompact,
+                        HashTableRobinHood, HashTableCuckoo, ArrayBucket,
+                        builtin_hash, fnv_hash)
+
+
+def make_keys(num_keys, prefix="key"):
+    """Build a list of distinct string keys
+    Arguments:
+        num_keys (int): The number of keys to build
+        prefix (str): Prefix shared by every key
+    Returns:
+        list: The keys
+    """
+    return [f"{prefix}{i}" for i in range(num_keys)]
+
+
+def colliding_keys(num_keys):
+    """Build keys that all hash to the same value. "Aa" and "BB" have the
+    same polynomial hash, so any string made of those blocks collides with
+    every other string of the same length made of them.
+    Arguments:
+        num_keys (int): The number of keys to build
+    Returns:
+        list: The keys
+    """
+    blocks = max(1, math.ceil(math.log2(num_keys)))
+    keys = itertools.product(["Aa", "BB"], repeat=blocks)
+    return ["".join(key) for key in itertools.islice(keys, num_keys)]
+
+
+def time_per_op(func, keys):
+    """Time func over every key
+    Arguments:
+        func (function): Called once with each key
+        keys (list): The keys to pass to func
+    Returns:
+        float: The average time per call in microseconds
+    """
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def bench_lookups(table_class, sizes):
+    """Print per-operation put/get/contains/remove latency for tables holding
+    each of the given number of keys. Latency should stay flat as size grows.
+    Arguments:
+        table_class (class): The HashTable class to benchmark
+        sizes (list): The numbers of keys to benchmark with
+    """
+    print(f"{table_class.__name__}: microseconds per operation")
+    print(f"{'keys':>10} {'put':>8} {'get':>8} {'hit':>8} {'miss':>8}"
+          f" {'remove':>8}")
+    for size in sizes:
+        keys = make_keys(size)
+        missing = make_keys(min(size, 10000), prefix="missing")
+        table = table_class()
+        put = time_per_op(lambda key: table.put(key, key), keys)
+        sample = keys[::max(1, size // 10000)]
+        get = time_per_op(table.get, sample)
+        hit = time_per_op(table.contains, sample)
+        miss = time_per_op(table.contains, missing)
+        remove = time_per_op(table.remove, sample)
+        print(f"{size:>10} {put:>8.2f} {get:>8.2f} {hit:>8.2f} {miss:>8.2f}"
+              f" {remove:>8.2f}")
+
+
+def bench_stress(table_class, sizes):
+    """Fill tables to just below their resize threshold with colliding keys
+    and print the time taken and the average number of collisions per put
+    Arguments:
+        table_class (class): The open addressing HashTable class to benchmark
+        sizes (list): The table sizes to fill
+    """
+    print(f"{table_class.__name__}: filling with colliding keys")
+    print(f"{'slots':>10} {'keys':>8} {'seconds':>8} {'probes':>8}")
+    for size in sizes:
+        table = table_class(size)
+        keys = colliding_keys(table.max_items - 1)
+        start = time.perf_counter()
+        for key in keys:
+            table.put(key, key)
+        elapsed = time.perf_counter() - start
+        probes = table.collisions() / len(keys)
+        print(f"{table.table_size:>10} {len(keys):>8} {elapsed:>8.3f}"
+              f" {probes:>8.1f}")
+
+
+def bench_hashers(lengths):
+    """Print the time taken to hash keys of each length with the original
+    hash_string and with each built in hasher
+    Arguments:
+        lengths (list): The key lengths to benchmark
+    """
+    hashers = [("hash_string", HashTableLinear().hash_string),
+               ("builtin_hash", builtin_hash),
+               ("fnv_hash", fnv_hash)]
+    print("microseconds per hash")
+    print(f"{'length':>10}" + "".join(f" {name:>12}" for name, _ in hashers))
+    for length in lengths:
+        keys = [f"{i:0{length}d}" for i in range(2000)]
+        times = [time_per_op(hasher, keys) for _, hasher in hashers]
+        print(f"{length:>10}" + "".join(f" {t:>12.2f}" for t in times))
+
+
+def bench_resize(sizes):
+    """Print the total time and the slowest single put when filling
+    separate chaining tables, with and without incremental resizing. The
+    garbage collector is paused while timing, as timeit does, so its own
+    pauses over millions of nodes do not hide the resize pauses
+    Arguments:
+        sizes (list): The numbers of keys to insert
+    """
+    print("HashTableSepchain: filling with resizes")
+    print(f"{'keys':>10} {'mode':>12} {'seconds':>8} {'worst ms':>9}")
+    for size in sizes:
+        keys = make_keys(size)
+        for incremental in (False, True):
+            table = HashTableSepchain(incremental=incremental)
+            worst = 0
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for key in keys:
+                before = time.perf_counter()
+                table.put(key, key)
+                worst = max(worst, time.perf_counter() - before)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            mode = "incremental" if incremental else "bulk"
+            print(f"{size:>10} {mode:>12} {elapsed:>8.3f}"
+                  f" {worst * 1000:>9.2f}")
+
+
+def bench_memory(size):
+    """Print the memory used by each table to hold size term keys, not
+    counting the keys and values themselves, and the time to list its keys
+    Arguments:
+        size (int): The number of keys to insert
+    """
+    keys = make_keys(size, prefix="term")
+    print(f"{size} keys: table memory and keys() time")
+    print(f"{'table':>18} {'MB':>8} {'bytes/key':>10} {'keys() ms':>10}")
+    tables = [("HashTableLinear", HashTableLinear),
+              ("HashTableSepchain", HashTableSepchain),
+              ("ArrayBucket chains",
+               lambda hasher: HashTableSepchain(hasher=hasher,
+                                                bucket_class=ArrayBucket)),
+              ("HashTableCompact", HashTableCompact)]
+    for name, make_table in tables:
+        table = make_table(hasher=builtin_hash)
+        tracemalloc.start()
+        for key in keys:
+            table.put(key, key)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        table.keys()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>18} {used / 2 ** 20:>8.1f}"
+              f" {used / size:>10.1f} {elapsed * 1000:>10.1f}")
+
+
+def bench_buckets(sizes):
+    """Print put, replace, get and keys() throughput for separate chaining
+    with linked list chains and with array buckets
+    Arguments:
+        sizes (list): The numbers of keys to benchmark with
+    """
+    print("HashTableSepchain buckets: thousands of operations per second")
+    print(f"{'keys':>10} {'bucket':>12} {'put':>8} {'replace':>8}"
+          f" {'get':>8} {'keys()':>8}")
+    for size in sizes:
+        keys = make_keys(size)
+        for bucket_class in (OrderedList, ArrayBucket):
+            table = HashTableSepchain(hasher=builtin_hash,
+                                      bucket_class=bucket_class)
+            put = time_per_op(lambda key: table.put(key, key), keys)
+            replace = time_per_op(lambda key: table.put(key, 0), keys)
+            get = time_per_op(table.get, keys)
+            start = time.perf_counter()
+            table.keys()
+            iterate = (time.perf_counter() - start) / size * 1e6
+            rates = [1000 / t for t in (put, replace, get, iterate)]
+            print(f"{size:>10} {bucket_class.__name__:>12}"
+                  + "".join(f" {rate:>8.0f}" for rate in rates))
+
+
+def bench_probe_lengths(size):
+    """Print probe length statistics from each table's probe_histogram,
+    using the original string hash on similar keys so that the keys
+    cluster, plus the time per get
+    Arguments:
+        size (int): The number of keys to insert
+    """
+    keys = make_keys(size, prefix="term")
+    print(f"{size} clustered keys: probes past the home slot")
+    print(f"{'table':>20} {'mean':>8} {'p99':>6} {'max':>6} {'get us':>8}")
+    for table_class in (HashTableLinear, HashTableQuadratic,
+                        HashTableRobinHood, HashTableCuckoo,
+                        HashTableSepchain):
+        table = table_class()
+        for key in keys:
+            table.put(key, key)
+        counts = table.probe_histogram()
+        mean = sum(i * n for i, n in enumerate(counts)) / size
+        seen = 0
+        for p99, count in enumerate(counts):
+            seen += count
+            if seen >= 0.99 * size:
+                break
+        get = time_per_op(table.get, keys[::max(1, size // 10000)])
+        print(f"{table_class.__name__:>20} {mean:>8.2f} {p99:>6}"
+              f" {len(counts) - 1:>6} {get:>8.2f}")
+
+
+def bench_stats_overhead(size):
+    """Print the time per put and get with stats disabled, enabled, and
+    disabled again, to show that disabled stats cost nothing
+    Arguments:
+        size (int): The number of keys to insert
+    """
+    keys = make_keys(size)
+    print(f"{size} keys: stats overhead, microseconds per operation")
+    print(f"{'table':>20} {'stats':>9} {'put':>8} {'get':>8}")
+    for table_class in (HashTableLinear, HashTableSepchain):
+        for mode in ("off", "on", "disabled"):
+            table = table_class(hasher=builtin_hash)
+            if mode != "off":
+                table.enable_stats()
+            if mode == "disabled":
+                table.disable_stats()
+            put = time_per_op(lambda key: table.put(key, key), keys)
+            get = time_per_op(table.get, keys)
+            print(f"{table_class.__name__:>20} {mode:>9} {put:>8.2f}"
+                  f" {get:>8.2f}")
+
+
+def bench_bulk(sizes):
+    """Print the time to fill each table one put at a time from its default
+    size, and with put_many, plus the time to get every key back one at a
+    time and with get_many. The garbage collector is paused while timing
+    Arguments:
+        sizes (list): The numbers of keys to insert
+    """
+    print("bulk loading: milliseconds")
+    print(f"{'keys':>10} {'table':>20} {'put':>8} {'put_many':>9}"
+          f" {'get':>8} {'get_many':>9}")
+    for size in sizes:
+        keys = make_keys(size, prefix="term")
+        pairs = [(key, key) for key in keys]
+        for table_class in (HashTableLinear, HashTableSepchain,
+                            HashTableCompact, HashTableRobinHood):
+            table = table_class(hasher=builtin_hash)
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for key, val in pairs:
+                table.put(key, val)
+            put = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in keys:
+                table.get(key)
+            get = time.perf_counter() - start
+            start = time.perf_counter()
+            table = table_class.from_iterable(pairs, hasher=builtin_hash)
+            put_many = time.perf_counter() - start
+            start = time.perf_counter()
+            table.get_many(keys)
+            get_many = time.perf_counter() - start
+            gc.enable()
+            times = [t * 1000 for t in (put, put_many, get, get_many)]
+            print(f"{size:>10} {table_class.__name__:>20} {times[0]:>8.1f}"
+                  f" {times[1]:>9.1f} {times[2]:>8.1f} {times[3]:>9.1f}")
+
+
+def main():
+    """Run the benchmarks with sizes from the command line
+    """
+    sizes = [int(float(arg)) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [1000, 10000, 100000]
+    for table_class in (HashTableSepchain, HashTableLinear,
+                        HashTableQuadratic, HashTableCompact):
+        bench_lookups(table_class, sizes)
+    for table_class in (HashTableLinear, HashTableQuadratic):
+        bench_stress(table_class, [256, 1024, 4096])
+    bench_hashers([8, 64, 1024])
+    bench_resize(sizes)
+    bench_memory(max(sizes))
+    bench_buckets(sizes)
+    bench_probe_lengths(max(sizes))
+    bench_stats_overhead(max(sizes))
+    bench_bulk(sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ Author: Ben Paulson
 
 import unittest
 import random
+import itertools
 from hashtables import *
 from linked_list import *
 
@@ -112,10 +113,11 @@ class HashTableTests(unittest.TestCase):
         self.assertEqual(self.sepchain.get("hello"), "hello")
         lin_cols = self.linear.collisions()
         self.assertEqual(self.linear.remove("hello").key, "hello")
-        self.assertEqual(self.linear.table[lin_sep_hash].key, "fklsljflseare")
+        self.assertIs(self.linear.table[lin_sep_hash], TOMBSTONE)
+        self.assertEqual(self.linear["fklsljflseare"], "fklsljflseare")
         self.assertEqual(self.linear.remove("fklsljflseare").key,
                          "fklsljflseare")
-        self.assertEqual(self.linear.table[lin_sep_hash], None)
+        self.assertIs(self.linear.table[lin_sep_hash + 2], TOMBSTONE)
         self.assertRaises(KeyError, self.linear.remove, "fklsljflseare")
         self.assertEqual(self.linear.table[lin_sep_hash + 1].key, "hi")
         self.assertEqual(self.linear.remove("hi").key, "hi")
@@ -135,6 +137,364 @@ class HashTableTests(unittest.TestCase):
         self.assertEqual(self.sepchain.collisions(), sep_cols)
 
 
+    def test_probe_sequence_lookup(self):
+        quad_hash = self.quad.hash_string("hello")
+        self.quad.put("hello", 1)
+        self.quad.put("fklsljflseare", 2)
+        self.quad.put("slkff", 3)
+        self.assertEqual(self.quad.table[quad_hash + 4].key, "slkff")
+        self.assertEqual(self.quad["slkff"], 3)
+        self.assertEqual(self.quad["fklsljflseare"], 2)
+        self.assertEqual(self.quad.remove("fklsljflseare").val, 2)
+        self.assertIs(self.quad.table[quad_hash + 1], TOMBSTONE)
+        self.assertEqual(self.quad["slkff"], 3)
+        self.assertFalse("fklsljflseare" in self.quad)
+        # A re-inserted key reuses the first tombstone on its probe sequence
+        self.quad.put("slkff", 4)
+        self.assertEqual(self.quad.table[quad_hash + 4].val, 4)
+        self.quad.put("fklsljflseare", 5)
+        self.assertEqual(self.quad.table[quad_hash + 1].val, 5)
+        self.assertEqual(self.quad.num_deleted, 0)
+        self.assertEqual(self.quad.size(), 3)
+
+
+    def test_tombstone_compaction(self):
+        for table in (self.linear, self.quad):
+            model = {}
+            for i in range(300):
+                key = f"key{i % 40}"
+                if key in model and i % 3 == 0:
+                    self.assertEqual(table.remove(key).val, model.pop(key))
+                else:
+                    table.put(key, i)
+                    model[key] = i
+                self.assertLess(table.num_deleted,
+                                table.tombstone_threshold * table.table_size)
+            self.assertEqual(table.size(), len(model))
+            for key in model:
+                self.assertEqual(table[key], model[key])
+            for i in range(40):
+                self.assertEqual(f"key{i}" in table, f"key{i}" in model)
+            for key in list(model):
+                table.remove(key)
+            self.assertEqual(table.size(), 0)
+            self.assertEqual(table.table.count(None), table.table_size)
+
+
+    def test_long_probe_sequences(self):
+        # "Aa" and "BB" hash the same, so every key built from them collides
+        keys = ["".join(pair) for pair in
+                itertools.product(["Aa", "BB"], repeat=11)][:1500]
+        for table in (self.linear, self.quad):
+            for key in keys:
+                table.put(key, key.lower())
+            self.assertEqual(table.size(), 1500)
+            self.assertLess(table.load_factor(), table.resize_threshold)
+            for key in keys[::50]:
+                self.assertEqual(table[key], key.lower())
+        self.assertGreater(self.linear.collisions(), 1000 * 1000 // 2)
+
+
+    def test_hashers(self):
+        self.assertEqual(fnv_hash("hash table"), fnv_hash("hash table"))
+        self.assertEqual(fnv_hash(b"hash table"), fnv_hash("hash table"))
+        self.assertNotEqual(fnv_hash("key123"), fnv_hash("key124"))
+        self.assertNotEqual(fnv_hash("a"), fnv_hash("a\0"))
+        self.assertEqual(builtin_hash(42), hash(42))
+        buckets = [fnv_hash(f"word{i}") % 16 for i in range(1600)]
+        for bucket in range(16):
+            self.assertGreater(buckets.count(bucket), 50)
+        for hasher in (builtin_hash, fnv_hash):
+            for table in (HashTableLinear(hasher=hasher),
+                          HashTableQuadratic(hasher=hasher),
+                          HashTableSepchain(hasher=hasher)):
+                for i in range(100):
+                    table[i] = i * 2
+                self.assertEqual(table.size(), 100)
+                self.assertEqual(table[37], 74)
+                self.assertFalse(100 in table)
+                self.assertEqual(table.hash_string(5),
+                                 hasher(5) % table.table_size)
+
+
+    def test_cache_hashes(self):
+        self.assertRaises(ValueError, HashTableLinear, cache_hashes=True)
+        calls = []
+        def counting_hasher(key):
+            calls.append(key)
+            return fnv_hash(key)
+        for table_class in (HashTableLinear, HashTableQuadratic,
+                            HashTableSepchain):
+            calls.clear()
+            table = table_class(hasher=counting_hasher, cache_hashes=True)
+            for i in range(200):
+                table.put(f"word{i}", i)
+            self.assertGreater(table.table_size, 100)
+            # Resizes reuse the cached hashes instead of hashing keys again
+            self.assertEqual(len(calls), 200)
+            self.assertEqual(table["word150"], 150)
+            for key in ("word0", "word7", "word199"):
+                table.remove(key)
+            self.assertFalse("word7" in table)
+            self.assertEqual(table.size(), 197)
+        self.linear = HashTableLinear(hasher=fnv_hash, cache_hashes=True)
+        self.linear.put("hi", "hi")
+        node = self.linear.table[fnv_hash("hi") % 11]
+        self.assertEqual(node.hash_value, fnv_hash("hi"))
+
+
+    def test_rehash_table(self):
+        for table in (self.linear, self.quad, self.sepchain,
+                      HashTableLinear(hasher=fnv_hash, cache_hashes=True)):
+            for i in range(8):
+                table.put(f"word{i}", i)
+            collisions = table.collisions()
+            size = table.table_size
+            table.resize()
+            self.assertGreater(table.table_size, size)
+            self.assertEqual(table.collisions(), collisions)
+            self.assertEqual(table.size(), 8)
+            for i in range(8):
+                self.assertEqual(table[f"word{i}"], i)
+
+
+    def test_incremental_resize(self):
+        table = HashTableSepchain(incremental=True)
+        model = {}
+        migrating = 0
+        for i in range(2000):
+            table.put(f"word{i}", i)
+            model[f"word{i}"] = i
+            if table.old_table is not None:
+                migrating += 1
+                self.assertEqual(table[f"word{i // 2}"], i // 2)
+            if i % 7 == 0:
+                key = f"word{i // 3}"
+                if key in model:
+                    self.assertEqual(table.remove(key).val, model.pop(key))
+                    self.assertFalse(key in table)
+            if i % 11 == 0:
+                table.put(f"word{i // 5}", -i)
+                model[f"word{i // 5}"] = -i
+        self.assertGreater(migrating, 0)
+        self.assertEqual(table.size(), len(model))
+        self.assertEqual(sorted(table.keys()), sorted(model))
+        for key, val in model.items():
+            self.assertEqual(table[key], val)
+        table.finish_resize()
+        self.assertIsNone(table.old_table)
+        self.assertEqual(sorted(table.keys()), sorted(model))
+
+
+    def test_compact_table(self):
+        compact = HashTableCompact()
+        self.assertEqual(repr(compact), "HashTableCompact({})")
+        self.assertEqual(compact.table.typecode, "b")
+        self.assertRaises(KeyError, compact.get, "hi")
+        compact["hi"] = 1
+        compact["hello"] = 2
+        compact["hi"] = 3
+        self.assertEqual(repr(compact), "HashTableCompact({hi: 3, hello: 2})")
+        self.assertEqual(compact.size(), 2)
+        self.assertEqual(compact.remove("hi").val, 3)
+        self.assertFalse("hi" in compact)
+        self.assertRaises(KeyError, compact.remove, "hi")
+        words = [f"word{i}" for i in range(1000)]
+        for i, word in enumerate(words):
+            compact.put(word, i)
+        self.assertEqual(compact.keys(), ["hello"] + words)
+        self.assertEqual(compact.table.typecode, "h")
+        self.assertLess(compact.load_factor(), compact.resize_threshold)
+        for word in words[::3]:
+            compact.remove(word)
+        self.assertLess(compact.num_deleted,
+                        compact.tombstone_threshold * compact.table_size)
+        for i, word in enumerate(words):
+            self.assertEqual(word in compact, i % 3 != 0)
+            if i % 3:
+                self.assertEqual(compact[word], i)
+        self.assertEqual(compact.keys(),
+                         ["hello"] + [w for i, w in enumerate(words) if i % 3])
+        compact.resize()
+        self.assertEqual(len(compact.entry_keys), compact.size())
+        self.assertEqual(compact["word998"], 998)
+        self.assertEqual(HashTableCompact(), HashTableCompact())
+        fnv = HashTableCompact(hasher=fnv_hash)
+        for i, word in enumerate(words):
+            fnv[word] = i
+        self.assertEqual(fnv["word500"], 500)
+        stopwords = import_stopwords("stop_words.txt", HashTableCompact())
+        self.assertEqual(stopwords.size(), 305)
+        self.assertTrue("hereby" in stopwords)
+
+
+    def test_robin_hood_cuckoo(self):
+        for table_class in (HashTableRobinHood, HashTableCuckoo):
+            for hasher in (None, fnv_hash):
+                table = table_class(hasher=hasher)
+                model = {}
+                for i in range(600):
+                    key = f"key{(i * 7) % 150}"
+                    if key in model and i % 4 == 0:
+                        self.assertEqual(table.remove(key).val, model.pop(key))
+                        self.assertRaises(KeyError, table.remove, key)
+                    else:
+                        table[key] = i
+                        model[key] = i
+                self.assertEqual(table.size(), len(model))
+                self.assertLess(table.load_factor(), table.resize_threshold)
+                for i in range(150):
+                    key = f"key{i}"
+                    self.assertEqual(key in table, key in model)
+                    if key in model:
+                        self.assertEqual(table[key], model[key])
+                self.assertEqual(sorted(table.keys()), sorted(model))
+                self.assertEqual(sum(table.probe_histogram()), len(model))
+            stopwords = import_stopwords("stop_words.txt", table_class())
+            self.assertEqual(stopwords.size(), 305)
+            self.assertEqual(type(stopwords), table_class)
+        cuckoo = import_stopwords("stop_words.txt", HashTableCuckoo())
+        self.assertLessEqual(len(cuckoo.probe_histogram()), 2)
+        # Robin Hood keeps the same total probe length as plain linear
+        # probing but with a shorter longest probe
+        keys = [f"term{i}" for i in range(2000)]
+        linear = HashTableLinear(hasher=fnv_hash)
+        robin = HashTableRobinHood(hasher=fnv_hash)
+        for key in keys:
+            linear[key] = key
+            robin[key] = key
+        self.assertEqual(linear.table_size, robin.table_size)
+        lin_hist = linear.probe_histogram()
+        robin_hist = robin.probe_histogram()
+        self.assertEqual(sum(i * n for i, n in enumerate(lin_hist)),
+                         sum(i * n for i, n in enumerate(robin_hist)))
+        self.assertLess(len(robin_hist), len(lin_hist))
+
+
+    def test_probe_histogram(self):
+        self.assertEqual(self.linear.probe_histogram(), [])
+        self.linear.put("hello", 1)
+        self.linear.put("fklsljflseare", 2)
+        self.assertEqual(self.linear.probe_histogram(), [1, 1])
+        self.assertEqual(self.linear.probe_length("fklsljflseare"), 1)
+        self.assertRaises(KeyError, self.linear.probe_length, "hi")
+        self.sepchain.put("hello", 1)
+        self.sepchain.put("fklsljflseare", 2)
+        self.assertEqual(self.sepchain.probe_length("hello"), 1)
+        self.assertEqual(self.sepchain.probe_histogram(), [1, 1])
+        compact = HashTableCompact()
+        for i in range(5):
+            compact[i] = i
+        self.assertEqual(compact.probe_histogram(), [5])
+
+
+    def test_stats(self):
+        for table in (HashTableLinear(), HashTableQuadratic(),
+                      HashTableSepchain(), HashTableCompact(),
+                      HashTableRobinHood(), HashTableCuckoo()):
+            self.assertNotIn("ops", table.stats_report())
+            table.enable_stats()
+            for i in range(40):
+                table.put(str(i), i)
+            self.assertEqual(table.get("3"), 3)
+            self.assertFalse(table.contains("missing"))
+            with self.assertRaises(KeyError):
+                table.get("missing")
+            table.remove("4")
+            report = table.stats_report()
+            self.assertEqual(report["ops"],
+                             {"put": 40, "get": 2, "contains": 1, "remove": 1})
+            self.assertEqual(report["misses"], 2)
+            self.assertGreater(report["resizes"], 0)
+            self.assertGreaterEqual(report["resize_seconds"], 0)
+            self.assertEqual(report["size"], 39)
+            self.assertEqual(sum(report["probe_histogram"]), 39)
+            self.assertEqual(report["max_probe"],
+                             len(report["probe_histogram"]) - 1)
+            table.disable_stats()
+            self.assertIsNone(table.stats)
+            self.assertNotIn("put", vars(table))
+            self.assertNotIn("ops", table.stats_report())
+        table = HashTableLinear(hasher=fnv_hash, cache_hashes=True)
+        table.enable_stats()
+        table.put("b", 2, hash_value=fnv_hash("b"))
+        self.assertEqual(table.get("b"), 2)
+        self.assertEqual(table.stats_report()["ops"]["put"], 1)
+        sepchain = HashTableSepchain(hasher=lambda key: 0)
+        for i in range(5):
+            sepchain.put(str(i), i)
+        counts = sepchain.chain_histogram()
+        self.assertEqual(counts[5], 1)
+        self.assertEqual(counts[0], sepchain.table_size - 1)
+        self.assertEqual(sepchain.stats_report()["chain_histogram"], counts)
+
+
+    def test_bulk(self):
+        pairs = [(str(i), i) for i in range(500)] + [("7", "seven")]
+        makers = [HashTableLinear, HashTableQuadratic, HashTableSepchain,
+                  HashTableCompact, HashTableRobinHood, HashTableCuckoo,
+                  lambda: HashTableLinear(hasher=fnv_hash, cache_hashes=True),
+                  lambda: HashTableSepchain(hasher=fnv_hash,
+                                            cache_hashes=True,
+                                            bucket_class=ArrayBucket)]
+        for make_table in makers:
+            table = make_table()
+            table.put_many(pairs)
+            self.assertEqual(table.size(), 500)
+            self.assertLess(table.load_factor(), table.resize_threshold)
+            self.assertEqual(table.get_many(["0", "7", "499"]),
+                             [0, "seven", 499])
+            self.assertEqual(sorted(table.keys()), sorted(dict(pairs)))
+            with self.assertRaises(KeyError):
+                table.get_many(["0", "missing"])
+            self.assertEqual(table.get_many(["missing", "1"], default=-1),
+                             [-1, 1])
+            size = table.table_size
+            table.put_many({"1": "one", "new": "new"})
+            self.assertEqual(table.table_size, size)
+            self.assertEqual(table.get_many(["1", "new"]), ["one", "new"])
+            self.assertEqual(table.size(), 501)
+        for make_table in makers:
+            table = make_table()
+            table.enable_stats()
+            table.put_many(pairs)
+            table.put_many([(str(i), i) for i in range(500, 1500)])
+            report = table.stats_report()
+            self.assertEqual(report["ops"]["put"], 1501)
+            self.assertGreaterEqual(report["resizes"], 2)
+            self.assertGreater(report["resize_seconds"], 0)
+            self.assertEqual(table.get_many(["3", "1499"]), [3, 1499])
+            self.assertEqual(table.stats_report()["ops"]["get"], 2)
+            table.get_many(["3", "missing"], default=None)
+            self.assertEqual(table.stats_report()["misses"], 1)
+        # get_many probes past tombstones and through unfinished resizes
+        makers += [HashTableCuckoo, lambda: HashTableCuckoo(hasher=fnv_hash)]
+        for make_table in makers:
+            table = make_table()
+            for i in range(300):
+                table.put(str(i), i)
+            for i in range(0, 300, 3):
+                table.remove(str(i))
+            keys = [str(i) for i in range(320)]
+            self.assertEqual(table.get_many(keys, default=None),
+                             [None if i % 3 == 0 or i >= 300 else i
+                              for i in range(320)])
+        table = HashTableSepchain(incremental=True)
+        table.put_many((str(i), i) for i in range(300))
+        table.resize()
+        self.assertIsNotNone(table.old_table)
+        self.assertEqual(table.get_many(["0", "299", "x"], default=None),
+                         [0, 299, None])
+        table = HashTableSepchain.from_iterable(pairs, hasher=builtin_hash,
+                                                incremental=True)
+        self.assertEqual(table.size(), 500)
+        self.assertEqual(table["7"], "seven")
+        self.assertEqual(HashTableLinear.from_iterable([]).size(), 0)
+        stopwords = import_stopwords("stop_words.txt", HashTableLinear())
+        self.assertIn("the", stopwords)
+        self.assertLess(stopwords.load_factor(), 0.75)
+
+
     def test_resize(self):
         self.assertEqual(self.linear.load_factor(), 0)
         self.assertEqual(self.quad.load_factor(), 0)
@@ -186,6 +546,54 @@ class HashTableTests(unittest.TestCase):
         self.assertEqual(sepchain.size(), 305)
 
 
+    def test_sepchain_lookup(self):
+        words = [f"word{i}" for i in range(200)]
+        for sepchain in (self.sepchain,
+                         HashTableSepchain(bucket_class=ArrayBucket)):
+            for i, word in enumerate(words):
+                sepchain.put(word, i)
+            collisions = sepchain.collisions()
+            for i, word in enumerate(words):
+                self.assertTrue(word in sepchain)
+                self.assertEqual(sepchain[word], i)
+                sepchain[word] = -i
+            self.assertEqual(sepchain.size(), 200)
+            self.assertEqual(sepchain.collisions(), collisions)
+            self.assertEqual(sepchain["word7"], -7)
+            self.assertFalse("word200" in sepchain)
+            self.assertRaises(KeyError, sepchain.get, "word200")
+            for word in words[::2]:
+                self.assertEqual(sepchain.remove(word).key, word)
+            self.assertEqual(sepchain.size(), 100)
+            self.assertFalse("word0" in sepchain)
+            self.assertEqual(sepchain["word1"], -1)
+            self.assertEqual(sorted(sepchain.keys()), sorted(words[1::2]))
+
+
+    def test_array_bucket(self):
+        bucket = ArrayBucket()
+        self.assertEqual(bucket.size(), 0)
+        self.assertIsNone(bucket.get("hi"))
+        self.assertTrue(bucket.put("hi", 1))
+        self.assertTrue(bucket.put("hello", 2, 99))
+        self.assertFalse(bucket.put("hi", 3))
+        self.assertEqual(bucket.get("hi"), 3)
+        self.assertEqual(repr(bucket), "ArrayBucket([('hi', 3), ('hello', 2)])")
+        self.assertEqual(list(bucket.pairs()),
+                         [("hi", 3, None), ("hello", 2, 99)])
+        self.assertEqual(bucket.delete("hello"), Node("hello", 2))
+        self.assertIsNone(bucket.delete("hello"))
+        self.assertEqual(bucket.size(), 1)
+        table = HashTableSepchain(bucket_class=ArrayBucket, incremental=True,
+                                  hasher=fnv_hash, cache_hashes=True)
+        for i in range(500):
+            table[f"word{i}"] = i
+        self.assertEqual(table.size(), 500)
+        self.assertEqual(table["word321"], 321)
+        self.assertIsInstance(table.table[table.hash_string("word321")],
+                              ArrayBucket)
+
+
     def test_node_eq(self):
         self.assertEqual(self.common_node, self.common_node)
         self.assertEqual(self.node2, self.node1)
@@ -283,6 +691,41 @@ class HashTableTests(unittest.TestCase):
         self.assertFalse(self.empty_list.search_backward(10))
 
 
+    def test_ordered_list_find(self):
+        self.assertIsNone(self.empty_list.find(3))
+        for i in range(0, 10, 2):
+            self.empty_list.add(i, i * 10)
+        self.assertEqual(self.empty_list.find(4).val, 40)
+        self.assertEqual(self.empty_list.find(0).val, 0)
+        self.assertEqual(self.empty_list.find(8).val, 80)
+        self.assertIsNone(self.empty_list.find(5))
+        self.assertIsNone(self.empty_list.find(10))
+
+
+    def test_ordered_list_bucket(self):
+        # Longer than the recursion limit, so each step has to be iterative
+        items = list(range(3000))
+        random.Random(0).shuffle(items)
+        for item in items:
+            self.empty_list.add_pair(item, -item, hash_value=item)
+        self.assertEqual(self.empty_list.size(), 3000)
+        self.assertEqual([pair[0] for pair in self.empty_list.pairs()],
+                         list(range(3000)))
+        self.assertEqual(self.empty_list.find(2999).hash_value, 2999)
+        self.assertEqual(self.empty_list.tail.prev.key, 2998)
+        self.assertEqual(self.empty_list.delete(0), Node(0, 0))
+        self.assertEqual(self.empty_list.delete(2999).val, -2999)
+        self.assertEqual(self.empty_list.delete(1500).val, -1500)
+        self.assertIsNone(self.empty_list.delete(1500))
+        self.assertEqual((self.empty_list.head.key, self.empty_list.tail.key),
+                         (1, 2998))
+        self.assertEqual(self.empty_list.find(1501).prev.key, 1499)
+        for item in items:
+            self.empty_list.delete(item)
+        self.assertTrue(self.empty_list.is_empty())
+        self.assertEqual(self.empty_list.size(), 0)
+
+
     def test_ordered_list_size(self):
         self.assertEqual(self.empty_list.size(), 0)
         self.empty_list.add(0, 0)
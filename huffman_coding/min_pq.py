@@ -81,6 +81,25 @@ class MinPQ:
         return val
 
 
+    def replace_min(self, item):
+        """Deletes the minimum item and inserts a new item in one step,
+        with a single shift down instead of a shift down and a shift up.
+        Keeps a queue of the k largest items seen at size k.
+        Args:
+            item (any): An item to be inserted to the queue.
+        Returns:
+            any: it returns the minimum item, which has just been deleted.
+        Raises:
+            IndexError: Raises IndexError when the queue is empty.
+        """
+        if self.is_empty():
+            raise IndexError("Cannot remove item from empty queue")
+        val = self.arr[0]
+        self.arr[0] = item
+        self.shift_down(0)
+        return val
+
+
     def min(self):
         """Returns the minimum item in the queue without deleting the item.
         Returns:
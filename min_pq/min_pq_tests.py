@@ -56,6 +56,16 @@ class MinPQTests(unittest.TestCase):
         self.assertEqual(self.pq1.arr, [1, 6, 5, None])
 
 
+    def test_replace_min(self):
+        self.assertRaises(IndexError, self.pq1.replace_min, 1)
+        for item in (5, 1, 8, 3):
+            self.pq1.insert(item)
+        self.assertEqual(self.pq1.replace_min(4), 1)
+        self.assertEqual(self.pq1.size(), 4)
+        self.assertEqual(self.pq1.replace_min(9), 3)
+        self.assertEqual([self.pq1.del_min() for _ in range(4)], [4, 5, 8, 9])
+
+
     def test_1(self):
         pq = MinPQ()
         pq.insert(5)
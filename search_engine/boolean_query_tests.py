@@ -0,0 +1,87 @@
+"""Tests for Boolean queries
+Author: Ben Paulson
+"""
+
+import unittest
+from inverted_index import InvertedIndex
+from boolean_query import (QueryFormatException, tokenize, to_postfix, parse,
+                           positive_terms, evaluate, difference, union,
+                           live_docs)
+
+
+class BooleanQueryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add_document("a", ["hash", "table", "hash"])
+        self.index.add_document("b", ["table", "list"])
+        self.index.add_document("c", ["hash"])
+        self.index.add_document("d", ["tree", "list", "hash"])
+
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hash table"), ["hash", "AND", "table"])
+        self.assertEqual(tokenize("hash OR (Table)NOT list"),
+                         ["hash", "OR", "(", "table", ")", "AND", "NOT",
+                          "list"])
+        self.assertEqual(tokenize(""), [])
+
+
+    def test_to_postfix(self):
+        self.assertEqual(to_postfix(tokenize("hash table OR list NOT tree")),
+                         ["hash", "table", "AND", "list", "tree", "NOT",
+                          "AND", "OR"])
+        self.assertEqual(to_postfix(tokenize("NOT NOT hash")),
+                         ["hash", "NOT", "NOT"])
+        with self.assertRaises(QueryFormatException):
+            to_postfix(tokenize("(hash OR table"))
+        with self.assertRaises(QueryFormatException):
+            to_postfix(tokenize("hash) OR table"))
+
+
+    def test_parse(self):
+        self.assertEqual(parse("hash AND table AND (list AND tree)"),
+                         ("and", [("term", "hash"), ("term", "table"),
+                                  ("term", "list"), ("term", "tree")]))
+        self.assertEqual(parse("hash OR NOT table"),
+                         ("or", [("term", "hash"), ("not", ("term", "table"))]))
+        self.assertIsNone(parse(""))
+        with self.assertRaises(QueryFormatException):
+            parse("hash OR")
+        with self.assertRaises(QueryFormatException):
+            parse("NOT")
+        self.assertEqual(positive_terms(parse("hash NOT (table OR NOT list) "
+                                              "hash")), ["hash", "list"])
+
+
+    def test_evaluate(self):
+        def search(query):
+            return list(evaluate(parse(query), self.index))
+        self.assertEqual(search("hash"), [0, 2, 3])
+        self.assertEqual(search("hash table"), [0])
+        self.assertEqual(search("hash OR list"), [0, 1, 2, 3])
+        self.assertEqual(search("hash NOT table"), [2, 3])
+        self.assertEqual(search("NOT hash"), [1])
+        self.assertEqual(search("list AND (table OR tree) NOT hash"), [1])
+        self.assertEqual(search("hash unix"), [])
+        self.assertEqual(search("unix OR tree"), [3])
+        self.assertEqual(search(""), [])
+        self.index.remove_document("b")
+        self.assertEqual(search("NOT hash"), [])
+        self.assertEqual(list(difference([1, 2, 5, 9], [0, 2, 9, 10])), [1, 5])
+        self.assertEqual(list(union([[1, 4, 9], [], [0, 4, 5], [9, 12]])),
+                         [0, 1, 4, 5, 9, 12])
+        self.assertEqual(list(union([])), [])
+
+
+    def test_live_docs(self):
+        self.assertEqual(list(live_docs(self.index)), [0, 1, 2, 3])
+        self.assertIs(live_docs(self.index), live_docs(self.index))
+        self.index.remove_document("c")
+        self.assertEqual(list(live_docs(self.index)), [0, 1, 3])
+        self.index.add_document("e", ["tree"])
+        self.assertEqual(list(live_docs(self.index)), [0, 1, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,20 +1,278 @@
 """Hashtable implementation using 3 collision resolution techniques:
 Separate chaining, Linear probing, and Quadratic probing.
+Also includes a compact, insertion ordered linear probing table.
 Author: Ben Paulson
 """
 
+import math
+import itertools
+import struct
+import time
+from array import array
 from linked_list import OrderedList, Node
 
 
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = 0xffffffffffffffff
+EMPTY_SLOT = -1
+DELETED_SLOT = -2
+
+
+class Tombstone:
+    """Marker left in an open addressing slot when its pair is removed, so
+    that probe sequences passing through the slot are not cut short
+    """
+    def __repr__(self):
+        return "Tombstone"
+
+
+TOMBSTONE = Tombstone()
+MISSING = object()
+
+
+class ArrayBucket:
+    """Separate chaining bucket that keeps its pairs in parallel lists
+    instead of linked Nodes. Pairs are unordered, searching is a single
+    list scan done in C, and a value is replaced in place.
+    Provides the bucket methods HashTableSepchain uses: get, put, add_pair,
+    delete, pairs and size.
+    Attributes:
+        keys (list): The keys in the bucket
+        vals (list): The value of each key
+        hashes (list): The cached hash of each key. None until a hash is
+                       given, so tables that do not cache hashes skip it
+    """
+    __slots__ = ("keys", "vals", "hashes")
+
+    def __init__(self):
+        self.keys = []
+        self.vals = []
+        self.hashes = None
+
+
+    def __eq__(self, other):
+        return isinstance(other, ArrayBucket) and self.keys == other.keys
+
+
+    def __repr__(self):
+        return f"ArrayBucket({list(zip(self.keys, self.vals))})"
+
+
+    def get(self, key, default=None):
+        """Get the value stored with key
+        Arguments:
+            key (str): The key to search for
+            default (any): Returned if key is not in the bucket
+        Returns:
+            any: The value associated with key, or default
+        """
+        keys = self.keys
+        if key in keys:
+            return self.vals[keys.index(key)]
+        return default
+
+
+    def put(self, key, val, hash_value=None):
+        """Store val with key, replacing the value in place if key is
+        already in the bucket
+        Arguments:
+            key (str): The key to store
+            val (any): The value associated with key
+            hash_value (int): The hash of key to keep with a new pair
+        Returns:
+            bool: True if key was added, False if its value was replaced
+        """
+        keys = self.keys
+        if key in keys:
+            self.vals[keys.index(key)] = val
+            return False
+        self.add_pair(key, val, hash_value)
+        return True
+
+
+    def add_pair(self, key, val, hash_value=None):
+        """Add a key known not to be in the bucket
+        Arguments:
+            key (str): The key to add
+            val (any): The value associated with key
+            hash_value (int): The hash of key to keep with the pair
+        """
+        if self.hashes is None and hash_value is not None:
+            self.hashes = [None] * len(self.keys)
+        self.keys.append(key)
+        self.vals.append(val)
+        if self.hashes is not None:
+            self.hashes.append(hash_value)
+
+
+    def delete(self, key):
+        """Remove key from the bucket
+        Arguments:
+            key (str): The key to remove
+        Returns:
+            Node: The removed pair, or None if key is not in the bucket
+        """
+        if key not in self.keys:
+            return None
+        idx = self.keys.index(key)
+        node = Node(key, self.vals.pop(idx))
+        del self.keys[idx]
+        if self.hashes is not None:
+            node.hash_value = self.hashes.pop(idx)
+        return node
+
+
+    def pairs(self):
+        """Iterate over the pairs in the bucket
+        Returns:
+            iterator: (key, val, hash_value) for each pair
+        """
+        if self.hashes is None:
+            return zip(self.keys, self.vals, [None] * len(self.keys))
+        return zip(self.keys, self.vals, self.hashes)
+
+
+    def size(self):
+        """The number of pairs in the bucket
+        Returns:
+            int: The number of pairs
+        """
+        return len(self.keys)
+
+
+class HashTableStats:
+    """Operation counters and resize timings for a HashTable, kept while
+    its stats are enabled. Counting is done by wrapping the table's methods,
+    so a table with stats disabled pays nothing for them.
+    Attributes:
+        ops (dict): The number of calls to put, get, contains and remove
+        misses (int): Calls to get, contains or remove that did not find
+                      their key
+        resizes (int): The number of times the table grew
+        compactions (int): The number of times tombstones were cleared out
+        resize_seconds (float): Time spent in resizes and compactions
+    """
+    COUNTED = ("put", "get", "contains", "remove")
+    TIMED = ("resize", "compact")
+
+    def __init__(self):
+        self.ops = {name: 0 for name in self.COUNTED}
+        self.misses = 0
+        self.resizes = 0
+        self.compactions = 0
+        self.resize_seconds = 0.0
+
+
+    def wrap(self, name, method):
+        """Wrap a table method so that calls to it are counted or timed
+        Arguments:
+            name (str): The method name, from COUNTED or TIMED
+            method (function): The bound method to wrap
+        Returns:
+            function: The wrapper
+        """
+        if name in self.TIMED:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.resize_seconds += time.perf_counter() - start
+                    if name == "resize":
+                        self.resizes += 1
+                    else:
+                        self.compactions += 1
+            return timed
+        def counted(*args, **kwargs):
+            self.ops[name] += 1
+            try:
+                result = method(*args, **kwargs)
+            except KeyError:
+                self.misses += 1
+                raise
+            if result is False:
+                self.misses += 1
+            return result
+        return counted
+
+
+def builtin_hash(key):
+    """Hasher backed by Python's built in hash(). Works for any hashable
+    key, but str hashes change between runs unless PYTHONHASHSEED is set
+    Arguments:
+        key (any): The key to hash
+    Returns:
+        int: The hash of key
+    """
+    return hash(key)
+
+
+def fnv_hash(key):
+    """64 bit FNV-1a style hasher that consumes the key's bytes a word at a
+    time instead of one character at a time, followed by a final mix so the
+    low bits used by small tables depend on every byte. Stable across runs
+    Arguments:
+        key (str, bytes): The key to hash. Other types are hashed by str(key)
+    Returns:
+        int: The hash of key
+    """
+    if isinstance(key, str):
+        data = key.encode()
+    elif isinstance(key, (bytes, bytearray)):
+        data = bytes(key)
+    else:
+        data = str(key).encode()
+    _hash = FNV_OFFSET ^ len(data)
+    data += b"\0" * (-len(data) % 8)
+    for (word,) in struct.iter_unpack("<Q", data):
+        _hash = ((_hash ^ word) * FNV_PRIME) & MASK_64
+    _hash ^= _hash >> 33
+    _hash = (_hash * 0xff51afd7ed558ccd) & MASK_64
+    _hash ^= _hash >> 33
+    _hash = (_hash * 0xc4ceb9fe1a85ec53) & MASK_64
+    return _hash ^ (_hash >> 33)
+
+
 class HashTable:
     """Base class for all other HashTable classes.
+    Attributes:
+        table_size (int): The number of slots in the table
+        resize_threshold (float): Load factor at which the table grows
+        tombstone_threshold (float): Fraction of slots holding tombstones at
+                                     which the table is compacted
+        table (list): The slots of the table
+        num_items (int): The number of key/val pairs stored
+        num_deleted (int): The number of slots holding a tombstone
+        num_collisions (int): The number of collisions while inserting with
+                              put. Rebuilding the table never changes it
+        max_items (int): The number of items at which the load factor reaches
+                         resize_threshold. Updated whenever the table is rebuilt
+        hasher (function): Maps a key to an int independent of table_size,
+                           e.g. builtin_hash or fnv_hash. None uses the
+                           original string hash in hash_string
+        cache_hashes (bool): Store the full hash in each node so rebuilding
+                             the table never hashes a key again
+        stats (HashTableStats): Operation counters, or None while stats are
+                                disabled
+    Raises:
+        ValueError: If cache_hashes is set without a hasher
     """
-    def __init__(self, table_size, resize_threshold):
+    def __init__(self, table_size, resize_threshold, tombstone_threshold=0.2,
+                 hasher=None, cache_hashes=False):
+        if cache_hashes and hasher is None:
+            raise ValueError("cache_hashes needs a hasher")
         self.table_size = table_size
         self.resize_threshold = resize_threshold
+        self.tombstone_threshold = tombstone_threshold
+        self.hasher = hasher
+        self.cache_hashes = cache_hashes
+        self.stats = None
         self.table = [None] * self.table_size
         self.num_items = 0
+        self.num_deleted = 0
         self.num_collisions = 0
+        self.max_items = math.ceil(resize_threshold * table_size)
 
 
     def __eq__(self, other):
@@ -43,17 +301,22 @@ class HashTable:
         return self.contains(key)
 
 
-    def hash_string(self, string):
-        """Hashes a string into an integer index
+    def hash_string(self, string, size=None):
+        """Hashes a string into an integer index. With a hasher, any key the
+        hasher accepts can be used
         Arguments:
             string (str): The string to hash
-            size (int): The size of the table
+            size (int): The size of the table. Defaults to table_size
         Returns:
             int: The hashed string
         """
+        if size is None:
+            size = self.table_size
+        if self.hasher is not None:
+            return self.hasher(string) % size
         _hash = 0
         for char in string:
-            _hash = (_hash * 31 + ord(char)) % self.table_size
+            _hash = (_hash * 31 + ord(char)) % size
         return _hash
 
 
@@ -72,53 +335,360 @@ class HashTable:
         return (old_hash + value) % self.table_size
 
 
-    def put(self, key, data):
+    def index_for(self, key, hash_value, size=None):
+        """The index key hashes to. Uses the cached full hash when the table
+        caches hashes, so the key itself is not hashed again
+        Arguments:
+            key (str): The key to hash
+            hash_value (int): The full hash of key, or None if not known
+            size (int): The size of the table. Defaults to table_size
+        Returns:
+            int: The hashed index
+        """
+        if hash_value is None:
+            return self.hash_string(key, size)
+        return hash_value % (self.table_size if size is None else size)
+
+
+    def full_hash(self, key, hash_value=None):
+        """The full hash to cache alongside key
+        Arguments:
+            key (str): The key to hash
+            hash_value (int): The full hash of key, if already known
+        Returns:
+            int: The full hash, or None if the table does not cache hashes
+        """
+        if not self.cache_hashes:
+            return None
+        if hash_value is None:
+            return self.hasher(key)
+        return hash_value
+
+
+    def put(self, key, data, hash_value=None):
         """Insert a key/val pair into the hash table.
         Arguments:
             key (str): The key to be inserted
             data (any): The value associated with the key
+            hash_value (int): The full hash of key, if already known. Only
+                              used when the table caches hashes
         """
-        idx = self.hash_string(key)
-        self.put_helper(key, data, idx, 1)
-        if self.load_factor() >= self.resize_threshold:
+        hash_value = self.full_hash(key, hash_value)
+        idx = self.index_for(key, hash_value)
+        self.put_helper(key, data, idx, 1, hash_value)
+        if self.num_items >= self.max_items:
             self.resize()
 
 
-    def put_helper(self, key, data, idx, i):
-        """Helper for put method. Recursively probe for next available space.
+    def put_helper(self, key, data, idx, i, hash_value=None):
+        """Helper for put method. Iteratively probe for next available space,
+        so long probe sequences never grow the call stack. The first tombstone
+        passed is remembered and reused once the probe sequence shows that key
+        is not already in the table. If the sequence runs out after table_size
+        probes, the table is resized and the probing starts over.
         Arguments:
             key (str): The key to be inserted
             data (any): The value associated with the key
-            idx (int): The previous hash value (index) that was attempted
+            idx (int): The first hash value (index) to attempt
+            i (int): The number of the probe being made, starting at 1
+            hash_value (int): The full hash to cache in the new node
         """
-        if self.table[idx] is None:
-            self.table[idx] = Node(key, data)
-            self.num_items += 1
-            return
-        if self.table[idx].key == key:
-            self.table[idx] = Node(key, data)
+        table = self.table
+        rehash = self.rehash
+        free = None
+        collisions = 0
+        while i <= self.table_size:
+            pair = table[idx]
+            if pair is None:
+                break
+            if pair is TOMBSTONE:
+                if free is None:
+                    free = idx
+            elif pair.key == key:
+                pair.val = data
+                self.num_collisions += collisions
+                return
+            collisions += 1
+            idx = rehash(idx, i)
+            i += 1
+        self.num_collisions += collisions
+        if free is not None:
+            self.num_deleted -= 1
+            idx = free
+        elif i > self.table_size:
+            self.resize()
+            self.put_helper(key, data, self.index_for(key, hash_value), 1,
+                            hash_value)
             return
-        self.num_collisions += 1
-        self.put_helper(key, data, self.rehash(idx, i), i + 1)
+        table[idx] = Node(key, data, hash_value=hash_value)
+        self.num_items += 1
+
+
+    @classmethod
+    def from_iterable(cls, pairs, **kwargs):
+        """Build a table holding pairs, sized for them up front
+        Arguments:
+            pairs (iterable, dict): key/val pairs, or a mapping
+            kwargs: Passed on to the constructor
+        Returns:
+            HashTable: The new table
+        """
+        table = cls(**kwargs)
+        table.put_many(pairs)
+        return table
+
+
+    def put_many(self, pairs):
+        """Insert many key/val pairs. The table is grown once to fit them all,
+        so no resizes happen part way through. An empty table is filled by
+        load_pairs without any lookups, and pairs placed that way are not
+        counted as collisions. A later pair replaces the value of an earlier
+        one with the same key, as with put. With stats enabled, each pair
+        counts as a put
+        Arguments:
+            pairs (iterable, dict): key/val pairs, or a mapping
+        """
+        if hasattr(pairs, "items"):
+            pairs = pairs.items()
+        pairs = list(pairs)
+        if self.num_items == 0 and self.num_deleted == 0:
+            try:
+                unique = dict(pairs)
+            except TypeError:
+                unique = None
+            if unique is not None:
+                self.reserve(len(unique))
+                self.load_pairs(list(unique), list(unique.values()))
+                if self.stats is not None:
+                    self.stats.ops["put"] += len(pairs)
+                return
+        self.reserve(self.num_items + len(pairs))
+        put = self.put
+        for key, data in pairs:
+            put(key, data)
+
+
+    def load_pairs(self, keys, vals):
+        """Fill an empty table that is already big enough to hold keys. The
+        full hashes are computed in one pass when the table caches them
+        Arguments:
+            keys (list): The keys to store, all distinct
+            vals (list): The value for each key
+        """
+        if self.cache_hashes:
+            hashes = map(self.hasher, keys)
+        else:
+            hashes = itertools.repeat(None)
+        self.build_table([Node(key, val, hash_value=hash_value)
+                          for key, val, hash_value in zip(keys, vals, hashes)])
 
 
-    def resize(self):
+    def get_many(self, keys, default=MISSING):
+        """Look up many keys. find_many hashes every key in one pass and
+        probes the table for each one directly, without calling get. With
+        stats enabled, each key counts as a get and each absent key as a miss
+        Arguments:
+            keys (iterable): The keys to look up
+            default (any): Value for keys not in the table. If not given,
+                           a missing key raises KeyError
+        Returns:
+            list: The value of each key, in order
+        Raises:
+            KeyError: If a key is not in the table and default is not given
+        """
+        vals = self.find_many(list(keys))
+        misses = sum(1 for val in vals if val is MISSING)
+        if self.stats is not None:
+            self.stats.ops["get"] += len(vals)
+            self.stats.misses += misses
+        if misses:
+            if default is MISSING:
+                raise KeyError("Key not found")
+            vals = [default if val is MISSING else val for val in vals]
+        return vals
+
+
+    def home_indexes(self, keys):
+        """The index each key hashes to, hashing all the keys in one pass
+        Arguments:
+            keys (list): The keys to hash
+        Returns:
+            list: The hashed index of each key
+        """
+        if self.hasher is None:
+            return [self.hash_string(key) for key in keys]
+        size = self.table_size
+        return [hash_value % size for hash_value in map(self.hasher, keys)]
+
+
+    def find_many(self, keys):
+        """Follow the probe sequence of each key, as find_slot does, starting
+        from home indexes hashed in one pass
+        Arguments:
+            keys (list): The keys to search for
+        Returns:
+            list: The value of each key, MISSING for keys not in the table
+        """
+        table = self.table
+        rehash = self.rehash
+        size = self.table_size
+        vals = []
+        for key, idx in zip(keys, self.home_indexes(keys)):
+            pair = table[idx]
+            i = 1
+            while pair is not None and i <= size:
+                if pair is not TOMBSTONE and pair.key == key:
+                    vals.append(pair.val)
+                    break
+                idx = rehash(idx, i)
+                pair = table[idx]
+                i += 1
+            else:
+                vals.append(MISSING)
+        return vals
+
+
+    def reserve(self, num_items):
+        """Grow the table, in a single rebuild, until num_items pairs fit
+        without reaching the resize threshold. Never shrinks the table
+        Arguments:
+            num_items (int): The number of pairs to make room for
+        """
+        old_size = self.table_size
+        while math.ceil(self.resize_threshold * self.table_size) <= num_items:
+            self.table_size = self.next_size()
+        new_size = self.table_size
+        if new_size != old_size:
+            # The rebuild goes through resize, so stats count and time it
+            self.table_size = old_size
+            self.resize(new_size)
+
+
+    def resize(self, size=None):
         """Resize the table when the load factor becomes too large
+        Arguments:
+            size (int): The new table size. Defaults to next_size()
         """
-        self.table_size = (2 * self.table_size) + 1
+        self.table_size = self.next_size() if size is None else size
         self.rehash_table()
 
 
+    def next_size(self):
+        """The size to grow the table to. Linear probing and separate
+        chaining use 2n + 1
+        Returns:
+            int: The new table size
+        """
+        return (2 * self.table_size) + 1
+
+
     def rehash_table(self):
-        """Called only after the table is resized. Re-inserts every item
-        in the old table with its new hashed value (due to the resize)
+        """Called only after the table is resized. Moves every pair in the old
+        table straight into its slot in the new table, using cached hashes
+        when there are any. Keys are known to be distinct, so nothing is
+        compared, counted as a collision, or checked against the load factor
+        """
+        pairs = [pair for pair in self.table
+                 if pair is not None and pair is not TOMBSTONE]
+        self.build_table(pairs)
+
+
+    def build_table(self, pairs):
+        """Lay out pairs in a fresh table of table_size slots. If a probe
+        sequence runs out of slots, the table grows and the layout restarts
+        Arguments:
+            pairs (list): The Nodes to store, all with distinct keys
         """
-        old_table = self.table
         self.table = [None] * self.table_size
-        self.num_items = 0
-        for pair in old_table:
-            if pair is not None:
-                self.put(pair.key, pair.val)
+        self.max_items = math.ceil(self.resize_threshold * self.table_size)
+        self.num_items = len(pairs)
+        self.num_deleted = 0
+        for pair in pairs:
+            if not self.place(pair):
+                self.table_size = self.next_size()
+                self.build_table(pairs)
+                return
+
+
+    def place(self, pair):
+        """Store pair in the first empty slot of its probe sequence. Only for
+        rebuilding a table, where the key is known to be absent
+        Arguments:
+            pair (Node): The pair to store
+        Returns:
+            bool: True if stored, False if the probe sequence ran out
+        """
+        table = self.table
+        rehash = self.rehash
+        idx = self.index_for(pair.key, pair.hash_value)
+        for i in range(1, self.table_size + 1):
+            if table[idx] is None:
+                table[idx] = pair
+                return True
+            idx = rehash(idx, i)
+        return False
+
+
+    def compact(self):
+        """Rebuild the table at its current size to clear out tombstones.
+        Called automatically once tombstones pass tombstone_threshold
+        """
+        self.rehash_table()
+
+
+    def find_slot(self, key):
+        """Follow the probe sequence put used for key until the key, an empty
+        slot, or the end of the sequence is reached. Tombstones are skipped
+        Arguments:
+            key (str): The key to search for
+        Returns:
+            int: The index of the slot holding key, or None if it is absent
+        """
+        idx = self.hash_string(key)
+        for i in range(1, self.table_size + 1):
+            pair = self.table[idx]
+            if pair is None:
+                return None
+            if pair is not TOMBSTONE and pair.key == key:
+                return idx
+            idx = self.rehash(idx, i)
+        return None
+
+
+    def probe_length(self, key):
+        """The number of probes past its home slot at which key is stored
+        Arguments:
+            key (str): A key in the table
+        Returns:
+            int: The number of extra probes needed to find key
+        Raises:
+            KeyError: If the key is not found in the hash map
+        """
+        idx = self.hash_string(key)
+        for i in range(self.table_size):
+            pair = self.table[idx]
+            if pair is None:
+                break
+            if pair is not TOMBSTONE and pair.key == key:
+                return i
+            idx = self.rehash(idx, i + 1)
+        raise KeyError("Key not found")
+
+
+    def probe_histogram(self):
+        """Count how far past their home slot the keys are stored, to compare
+        probe length variance between collision resolution techniques
+        Returns:
+            list: counts[n] is the number of keys stored n probes past the
+                  slot they hash to
+        """
+        counts = []
+        for key in self.keys():
+            probes = self.probe_length(key)
+            while len(counts) <= probes:
+                counts.append(0)
+            counts[probes] += 1
+        return counts
 
 
     def get(self, key):
@@ -130,9 +700,10 @@ class HashTable:
         Raises:
             KeyError: If the key is not found in the hash map
         """
-        if not self.contains(key):
+        idx = self.find_slot(key)
+        if idx is None:
             raise KeyError("Key not found")
-        return self.table[self.hash_string(key)].val
+        return self.table[idx].val
 
 
     def contains(self, key):
@@ -142,37 +713,39 @@ class HashTable:
         Returns:
             bool: True if the key exists, False otherwise
         """
-        for pair in self.table:
-            if pair is not None and pair.key == key:
-                return True
-        return False
+        return self.find_slot(key) is not None
 
 
     def remove(self, key):
-        """Removes a key/val pair from the hash table
+        """Removes a key/val pair from the hash table. The slot is left
+        holding a tombstone so other keys' probe sequences stay intact
         Arguments:
             key (str): The key of the pair to remove
         Returns:
             Node: The key/val pair that was deleted
         """
-        if not self.contains(key):
+        idx = self.find_slot(key)
+        if idx is None:
             raise KeyError(f"Cannot delete key {key} because it does not exist")
-        idx = self.hash_string(key)
         pair = self.table[idx]
-        self.table[idx] = None
-        idx += 1
-        curr_items = self.num_items
-        curr_collisions = self.num_collisions
-        while self.table[idx] is not None:
-            adj_pair = self.table[idx]
-            self.table[idx] = None
-            self.put(adj_pair.key, adj_pair.val)
-            idx += 1
-        self.num_items = curr_items - 1
-        self.num_collisions = curr_collisions
+        self.table[idx] = TOMBSTONE
+        self.num_items -= 1
+        self.num_deleted += 1
+        if (self.num_items == 0 or
+                self.num_deleted >= self.tombstone_threshold * self.table_size):
+            self.compact()
         return pair
 
 
+    def keys(self):
+        """Returns a list of all the keys in the hashtable
+        Returns:
+            list: All keys in the hash table
+        """
+        return [pair.key for pair in self.table
+                if pair is not None and pair is not TOMBSTONE]
+
+
     def size(self):
         """The size of the hash table.
         Returns:
@@ -197,38 +770,136 @@ class HashTable:
         return self.num_collisions
 
 
+    def enable_stats(self):
+        """Start counting operations and timing resizes. The table's put,
+        get, contains, remove, resize and compact are wrapped for this
+        instance only
+        """
+        if self.stats is not None:
+            return
+        self.stats = HashTableStats()
+        for name in HashTableStats.COUNTED + HashTableStats.TIMED:
+            setattr(self, name, self.stats.wrap(name, getattr(self, name)))
+
+
+    def disable_stats(self):
+        """Stop counting, removing the wrappers and the collected counts
+        """
+        if self.stats is None:
+            return
+        for name in HashTableStats.COUNTED + HashTableStats.TIMED:
+            delattr(self, name)
+        self.stats = None
+
+
+    def stats_report(self):
+        """Summarize the shape of the table, plus the operation counters if
+        stats are enabled. Probe lengths are measured when this is called,
+        so they cost nothing while the table is in use
+        Returns:
+            dict: size, table_size, load_factor, collisions, max_probe,
+                  mean_probe and probe_histogram, and when stats are enabled
+                  ops, misses, resizes, compactions and resize_seconds
+        """
+        counts = self.probe_histogram()
+        total = sum(probes * num for probes, num in enumerate(counts))
+        report = {"size": self.size(),
+                  "table_size": self.table_size,
+                  "load_factor": self.load_factor(),
+                  "collisions": self.collisions(),
+                  "max_probe": max(0, len(counts) - 1),
+                  "mean_probe": total / self.size() if self.size() else 0.0,
+                  "probe_histogram": counts}
+        if self.stats is not None:
+            report["ops"] = dict(self.stats.ops)
+            report["misses"] = self.stats.misses
+            report["resizes"] = self.stats.resizes
+            report["compactions"] = self.stats.compactions
+            report["resize_seconds"] = self.stats.resize_seconds
+        return report
+
+
 class HashTableSepchain(HashTable):
     """Hashtable with Separate Chaining
+    Attributes:
+        bucket_class (class): The chain type. OrderedList (the default) keeps
+                              each chain as a sorted linked list, ArrayBucket
+                              as parallel lists
+        incremental (bool): Resize incrementally. Instead of moving every
+                            chain at once, the old table is kept and a few of
+                            its chains are moved on each operation
+        old_table (list): The table being moved out of during an incremental
+                          resize, or None when no resize is under way
+        old_size (int): The size of old_table
+        migrate_pos (int): Index of the next old_table chain to move
+        migrate_chains (int): The number of chains moved per operation
     """
-    def __init__(self, table_size=11):
-        super().__init__(table_size, resize_threshold=1.5)
+    def __init__(self, table_size=11, hasher=None, cache_hashes=False,
+                 incremental=False, bucket_class=OrderedList):
+        super().__init__(table_size, resize_threshold=1.5, hasher=hasher,
+                         cache_hashes=cache_hashes)
+        self.bucket_class = bucket_class
+        self.incremental = incremental
+        self.old_table = None
+        self.old_size = 0
+        self.migrate_pos = 0
+        self.migrate_chains = 2
 
 
-    def put(self, key, data):
+    def put(self, key, data, hash_value=None):
         """Insert a key/val pair into the hash table. Override from parent
-        class to work with linked list
+        class to work with chains. Only the chain at the key's hashed index
+        is searched, and an existing key has its value replaced in place
         Arguments:
             key (str): The key to be inserted
             data (any): The value associated with the key
+            hash_value (int): The full hash of key, if already known. Only
+                              used when the table caches hashes
         """
-        idx = self.hash_string(key)
-        # Index has no Linked list
-        if self.table[idx] is None:
-            self.table[idx] = OrderedList()
-            self.table[idx].add(key, data)
-        # Linked list is there, either replace or add key to list
-        else:
+        hash_value = self.full_hash(key, hash_value)
+        if self.old_table is not None:
+            chain, val = self.locate(key)
+            if val is not MISSING:
+                chain.put(key, data)
+                return
+        idx = self.index_for(key, hash_value)
+        chain = self.table[idx]
+        # Index has no chain
+        if chain is None:
+            self.table[idx] = self.bucket_class()
+            self.table[idx].add_pair(key, data, hash_value)
+        # Chain is there, either replace or add key to it
+        elif chain.put(key, data, hash_value):
             self.num_collisions += 1
-            if self.table[idx].search_forward(key):
-                self.table[idx].remove(key) # Replace by deleting & re-adding
-                self.num_items -= 1 # Essentially cancel out if item exists
-                self.num_collisions -= 1 # same with collisions
-            self.table[idx].add(key, data)
+        else:
+            return
         self.num_items += 1
-        if self.load_factor() >= self.resize_threshold:
+        if self.num_items >= self.max_items:
             self.resize()
 
 
+    def locate(self, key):
+        """Find the chain holding key by searching only the chain at the key's
+        hashed index, plus its chain in old_table while an incremental resize
+        is under way
+        Arguments:
+            key (str): The key to search for
+        Returns:
+            tuple: (chain, val) with the chain holding key and its value, or
+                   (None, MISSING) if the key is not in the table
+        """
+        if self.old_table is not None:
+            self.migrate()
+        chain = self.table[self.hash_string(key)]
+        val = MISSING if chain is None else chain.get(key, MISSING)
+        if val is MISSING and self.old_table is not None:
+            chain = self.old_table[self.hash_string(key, self.old_size)]
+            val = MISSING if chain is None else chain.get(key, MISSING)
+        if val is MISSING:
+            return None, MISSING
+        return chain, val
+
+
     def contains(self, key):
         """Checks if the hash map contains the given key.
         Override for Separate Chaining method
@@ -237,10 +908,7 @@ class HashTableSepchain(HashTable):
         Returns:
             bool: True if the key exists, False otherwise
         """
-        for pair in self.table:
-            if pair is not None and pair.search_forward(key):
-                return True
-        return False
+        return self.locate(key)[1] is not MISSING
 
 
     def remove(self, key):
@@ -250,20 +918,16 @@ class HashTableSepchain(HashTable):
         Returns:
             Node: The key/val pair that was deleted
         """
-        if not self.contains(key):
+        chain, val = self.locate(key)
+        if val is MISSING:
             raise KeyError(f"Cannot delete key {key} because it does not exist")
-        idx = self.hash_string(key)
-        node = self.table[idx].head
-        while node.key != key:
-            node = node.next_elem
-        self.table[idx].remove(key)
         self.num_items -= 1
-        return node
+        return chain.delete(key)
 
 
     def get(self, key):
         """Get the value of the key stored in the hash map. Override for
-        separate chaining with linked list.
+        separate chaining.
         Arguments:
             key (str): The key to search the value of
         Returns:
@@ -271,28 +935,52 @@ class HashTableSepchain(HashTable):
         Raises:
             KeyError: If the key is not found in the hash map
         """
-        if not self.contains(key):
+        val = self.locate(key)[1]
+        if val is MISSING:
             raise KeyError("Key not found")
-        node = self.table[self.hash_string(key)].head
-        while node.key != key:
-            node = node.next_elem
-        return node.val
+        return val
 
 
-    def rehash_table(self):
-        """Called only after the table is resized. Re-inserts every item
-        in the old table with its new hashed value (due to the resize).
-        Override for Separate Chaining method
+    def probe_length(self, key):
+        """Override for Separate Chaining method. The number of pairs ahead
+        of key in its chain
+        Arguments:
+            key (str): A key in the table
+        Returns:
+            int: The number of pairs passed before reaching key
+        Raises:
+            KeyError: If the key is not found in the hash map
         """
-        old_table = self.table
-        self.table = [None] * self.table_size
-        self.num_items = 0
-        for pair in old_table:
-            if pair is not None:
-                node = pair.head
-                while node is not None:
-                    self.put(node.key, node.val)
-                    node = node.next_elem
+        chain = self.locate(key)[0]
+        if chain is None:
+            raise KeyError("Key not found")
+        for i, pair in enumerate(chain.pairs()):
+            if pair[0] == key:
+                return i
+
+
+    def chain_histogram(self):
+        """Count the chains of each length, including empty slots
+        Returns:
+            list: counts[n] is the number of slots whose chain has n pairs
+        """
+        counts = [0]
+        for chain in self.table + (self.old_table or []):
+            length = 0 if chain is None else chain.size()
+            while len(counts) <= length:
+                counts.append(0)
+            counts[length] += 1
+        return counts
+
+
+    def stats_report(self):
+        """Override for Separate Chaining method, adding chain_histogram
+        Returns:
+            dict: The base report plus chain_histogram
+        """
+        report = super().stats_report()
+        report["chain_histogram"] = self.chain_histogram()
+        return report
 
 
     def keys(self):
@@ -301,27 +989,147 @@ class HashTableSepchain(HashTable):
             list: All keys in the hash table
         """
         keys = []
-        for pair in self.table:
-            if pair is not None:
-                pair = pair.head
-                while pair is not None:
-                    keys.append(pair.key)
-                    pair = pair.next_elem
+        old_table = self.old_table or []
+        for chain in self.table + old_table:
+            if chain is not None:
+                keys.extend(pair[0] for pair in chain.pairs())
         return keys
 
 
+    def resize(self, size=None):
+        """Resize override for incremental mode. The new table starts empty
+        and the old table's chains are moved over a few at a time by migrate.
+        A resize to a given size, as reserve makes, is always done at once
+        Arguments:
+            size (int): The new table size. Defaults to next_size()
+        """
+        if not self.incremental or size is not None:
+            super().resize(size)
+            return
+        self.finish_resize()
+        self.old_table = self.table
+        self.old_size = self.table_size
+        self.migrate_pos = 0
+        self.table_size = self.next_size()
+        self.table = [None] * self.table_size
+        self.max_items = math.ceil(self.resize_threshold * self.table_size)
+
+
+    def migrate(self):
+        """Move the next migrate_chains chains of old_table into the table,
+        ending the incremental resize once old_table is empty
+        """
+        end = min(self.migrate_pos + self.migrate_chains, self.old_size)
+        for idx in range(self.migrate_pos, end):
+            chain = self.old_table[idx]
+            if chain is not None:
+                self.old_table[idx] = None
+                self.move_chain(chain)
+        self.migrate_pos = end
+        if end == self.old_size:
+            self.old_table = None
+
+
+    def finish_resize(self):
+        """Move everything left in old_table, if an incremental resize is
+        under way
+        """
+        while self.old_table is not None:
+            self.migrate()
+
+
+    def move_chain(self, chain):
+        """Add every pair of a chain from an old table to the table, using
+        cached hashes when there are any. Keys are known to be distinct, so no
+        lookups, collision counts or load checks are done
+        Arguments:
+            chain (OrderedList, ArrayBucket): The chain to move
+        """
+        for key, val, hash_value in chain.pairs():
+            idx = self.index_for(key, hash_value)
+            if self.table[idx] is None:
+                self.table[idx] = self.bucket_class()
+            self.table[idx].add_pair(key, val, hash_value)
+
+
+    def reserve(self, num_items):
+        """Reserve override for Separate Chaining method. Any incremental
+        resize under way is finished first, at the old size
+        Arguments:
+            num_items (int): The number of pairs to make room for
+        """
+        self.finish_resize()
+        super().reserve(num_items)
+
+
+    def find_many(self, keys):
+        """Override for Separate Chaining method. Only the chain at each
+        key's hashed index is searched. Any incremental resize under way is
+        finished first, so there is a single table to look in
+        Arguments:
+            keys (list): The keys to search for
+        Returns:
+            list: The value of each key, MISSING for keys not in the table
+        """
+        self.finish_resize()
+        table = self.table
+        vals = []
+        for key, idx in zip(keys, self.home_indexes(keys)):
+            chain = table[idx]
+            vals.append(MISSING if chain is None else chain.get(key, MISSING))
+        return vals
+
+
+    def load_pairs(self, keys, vals):
+        """Fill an empty table by adding each pair straight to its chain.
+        Every key is hashed in one pass before any chain is touched
+        Arguments:
+            keys (list): The keys to store, all distinct
+            vals (list): The value for each key
+        """
+        if self.hasher is not None:
+            hashes = list(map(self.hasher, keys))
+            indexes = [hash_value % self.table_size for hash_value in hashes]
+        else:
+            indexes = [self.hash_string(key) for key in keys]
+        if not self.cache_hashes:
+            hashes = itertools.repeat(None)
+        table = self.table
+        for idx, key, val, hash_value in zip(indexes, keys, vals, hashes):
+            if table[idx] is None:
+                table[idx] = self.bucket_class()
+            table[idx].add_pair(key, val, hash_value)
+        self.num_items = len(keys)
+
+
+    def rehash_table(self):
+        """Called only after the table is resized. Moves every item in the old
+        table to its chain in the new table.
+        Override for Separate Chaining method
+        """
+        self.finish_resize()
+        old_table = self.table
+        self.table = [None] * self.table_size
+        self.max_items = math.ceil(self.resize_threshold * self.table_size)
+        for chain in old_table:
+            if chain is not None:
+                self.move_chain(chain)
+
+
 class HashTableLinear(HashTable):
     """Hashtable with Linear Probing
     """
-    def __init__(self, table_size=11):
-        super().__init__(table_size, resize_threshold=0.75)
+    def __init__(self, table_size=11, hasher=None, cache_hashes=False):
+        super().__init__(table_size, resize_threshold=0.75, hasher=hasher,
+                         cache_hashes=cache_hashes)
 
 
 class HashTableQuadratic(HashTable):
     """Hashtable with Quadratic Probing
     """
-    def __init__(self, table_size=16):
-        super().__init__(table_size, resize_threshold=0.75)
+    def __init__(self, table_size=16, hasher=None, cache_hashes=False):
+        super().__init__(table_size, resize_threshold=0.75, hasher=hasher,
+                         cache_hashes=cache_hashes)
 
 
     def rehash(self, old_hash, i):
@@ -336,13 +1144,640 @@ class HashTableQuadratic(HashTable):
         return (old_hash + ((i + i ** 2) // 2)) % self.table_size
 
 
-    def resize(self):
-        """Resize override for quadtratic probing method. Double table size
+    def next_size(self):
+        """Size override for quadtratic probing method. Double table size
+        Returns:
+            int: The new table size
+        """
+        return 2 * self.table_size
+
+
+class HashTableCompact(HashTable):
+    """Hashtable with Linear Probing and a compact layout, in the style of
+    CPython's dict. Pairs are kept in dense parallel arrays in the order they
+    were inserted, and each slot of the table is a small int giving the
+    position of its pair in those arrays (or EMPTY_SLOT / DELETED_SLOT). The
+    ints are stored in an array whose item size fits the table, so a slot
+    takes 1 to 8 bytes instead of a Node.
+    Attributes:
+        hashes (array): The full hash of each pair's key
+        entry_keys (list): The key of each pair. TOMBSTONE once removed
+        entry_vals (list): The value of each pair
+    """
+    def __init__(self, table_size=8, hasher=builtin_hash):
+        super().__init__(table_size, resize_threshold=2 / 3, hasher=hasher)
+        self.table = self.new_index(table_size)
+        self.hashes = array("Q")
+        self.entry_keys = []
+        self.entry_vals = []
+
+
+    def __eq__(self, other):
+        return (isinstance(other, type(self)) and self.table == other.table
+                and self.entry_keys == other.entry_keys)
+
+
+    def __repr__(self):
+        pairs = ", ".join(f"{key}: {val}" for key, val
+                          in zip(self.entry_keys, self.entry_vals)
+                          if key is not TOMBSTONE)
+        return f"{self.__class__.__name__}({{{pairs}}})"
+
+
+    def new_index(self, size):
+        """Make an empty table using the smallest int type that can hold
+        every position in the pair arrays
+        Arguments:
+            size (int): The number of slots
+        Returns:
+            array: The table, with every slot set to EMPTY_SLOT
+        """
+        if size < 2 ** 7:
+            typecode = "b"
+        elif size < 2 ** 15:
+            typecode = "h"
+        elif size < 2 ** 31:
+            typecode = "i"
+        else:
+            typecode = "q"
+        return array(typecode, [EMPTY_SLOT]) * size
+
+
+    def lookup(self, key, hash_value):
+        """Follow the probe sequence for key through the table
+        Arguments:
+            key (str): The key to search for
+            hash_value (int): The full hash of key
+        Returns:
+            tuple: (slot, entry, collisions). If key is present, slot points
+                   at its pair and entry is the pair's position. Otherwise
+                   entry is -1 and slot is the first free slot on the
+                   sequence, or None if there is none. collisions is the
+                   number of other pairs passed on the way
+        """
+        table = self.table
+        hashes = self.hashes
+        keys = self.entry_keys
+        rehash = self.rehash
+        idx = hash_value % self.table_size
+        free = None
+        for i in range(1, self.table_size + 1):
+            entry = table[idx]
+            if entry == EMPTY_SLOT:
+                return (idx if free is None else free), -1, i - 1
+            if entry == DELETED_SLOT:
+                if free is None:
+                    free = idx
+            elif hashes[entry] == hash_value and keys[entry] == key:
+                return idx, entry, i - 1
+            idx = rehash(idx, i)
+        return free, -1, self.table_size
+
+
+    def put(self, key, data, hash_value=None):
+        """Insert a key/val pair into the hash table. A new pair is appended
+        to the pair arrays; an existing key has its value replaced in place
+        Arguments:
+            key (str): The key to be inserted
+            data (any): The value associated with the key
+            hash_value (int): The full hash of key, if already known
+        """
+        if hash_value is None:
+            hash_value = self.hasher(key) & MASK_64
+        slot, entry, collisions = self.lookup(key, hash_value)
+        if entry >= 0:
+            self.entry_vals[entry] = data
+            return
+        self.num_collisions += collisions
+        if slot is None:
+            self.resize()
+            self.put(key, data, hash_value)
+            return
+        if self.table[slot] == DELETED_SLOT:
+            self.num_deleted -= 1
+        self.table[slot] = len(self.entry_keys)
+        self.hashes.append(hash_value)
+        self.entry_keys.append(key)
+        self.entry_vals.append(data)
+        self.num_items += 1
+        if self.num_items + self.num_deleted >= self.max_items:
+            self.resize()
+
+
+    def find_entry(self, key):
+        """Find the position of key's pair in the pair arrays
+        Arguments:
+            key (str): The key to search for
+        Returns:
+            int: The position of the pair, or -1 if key is not in the table
+        """
+        return self.lookup(key, self.hasher(key) & MASK_64)[1]
+
+
+    def get(self, key):
+        """Get the value of the key stored in the hash map
+        Arguments:
+            key (str): The key to search the value of
+        Returns:
+            any: The value associated with key
+        Raises:
+            KeyError: If the key is not found in the hash map
+        """
+        entry = self.find_entry(key)
+        if entry < 0:
+            raise KeyError("Key not found")
+        return self.entry_vals[entry]
+
+
+    def find_many(self, keys):
+        """Follow the probe sequence of each key, as lookup does, with the
+        full hashes of all the keys computed in one pass
+        Arguments:
+            keys (list): The keys to search for
+        Returns:
+            list: The value of each key, MISSING for keys not in the table
+        """
+        table = self.table
+        hashes = self.hashes
+        entry_keys = self.entry_keys
+        entry_vals = self.entry_vals
+        rehash = self.rehash
+        size = self.table_size
+        vals = []
+        for key, hash_value in zip(keys, [hash_value & MASK_64 for hash_value
+                                          in map(self.hasher, keys)]):
+            idx = hash_value % size
+            entry = table[idx]
+            i = 1
+            while entry != EMPTY_SLOT and i <= size:
+                if (entry >= 0 and hashes[entry] == hash_value
+                        and entry_keys[entry] == key):
+                    vals.append(entry_vals[entry])
+                    break
+                idx = rehash(idx, i)
+                entry = table[idx]
+                i += 1
+            else:
+                vals.append(MISSING)
+        return vals
+
+
+    def contains(self, key):
+        """Checks if the hash map contains the given key
+        Arguments:
+            key (str): The key to check for
+        Returns:
+            bool: True if the key exists, False otherwise
+        """
+        return self.find_entry(key) >= 0
+
+
+    def probe_length(self, key):
+        """The number of probes past its home slot at which key is stored
+        Arguments:
+            key (str): A key in the table
+        Returns:
+            int: The number of extra probes needed to find key
+        Raises:
+            KeyError: If the key is not found in the hash map
+        """
+        _, entry, probes = self.lookup(key, self.hasher(key) & MASK_64)
+        if entry < 0:
+            raise KeyError("Key not found")
+        return probes
+
+
+    def remove(self, key):
+        """Removes a key/val pair from the hash table. The slot is marked
+        DELETED_SLOT and the pair's arrays entry is cleared; both are
+        reclaimed when the table is next rebuilt
+        Arguments:
+            key (str): The key of the pair to remove
+        Returns:
+            Node: The key/val pair that was deleted
         """
-        self.table_size = 2 * self.table_size
+        slot, entry, _ = self.lookup(key, self.hasher(key) & MASK_64)
+        if entry < 0:
+            raise KeyError(f"Cannot delete key {key} because it does not exist")
+        pair = Node(key, self.entry_vals[entry])
+        self.table[slot] = DELETED_SLOT
+        self.entry_keys[entry] = TOMBSTONE
+        self.entry_vals[entry] = None
+        self.num_items -= 1
+        self.num_deleted += 1
+        if (self.num_items == 0 or
+                self.num_deleted >= self.tombstone_threshold * self.table_size):
+            self.compact()
+        return pair
+
+
+    def keys(self):
+        """Returns a list of all the keys in the hashtable, in the order they
+        were inserted
+        Returns:
+            list: All keys in the hash table
+        """
+        if len(self.entry_keys) == self.num_items:
+            return self.entry_keys[:]
+        return [key for key in self.entry_keys if key is not TOMBSTONE]
+
+
+    def load_pairs(self, keys, vals):
+        """Fill an empty table by appending every pair to the pair arrays,
+        hashing all the keys in one pass, then building the table
+        Arguments:
+            keys (list): The keys to store, all distinct
+            vals (list): The value for each key
+        """
+        self.hashes = array("Q", [hash_value & MASK_64 for hash_value
+                                  in map(self.hasher, keys)])
+        self.entry_keys = list(keys)
+        self.entry_vals = list(vals)
+        self.num_items = len(keys)
         self.rehash_table()
 
 
+    def next_size(self):
+        """Size override for the compact table. Double table size
+        Returns:
+            int: The new table size
+        """
+        return 2 * self.table_size
+
+
+    def rehash_table(self):
+        """Called after the table is resized or compacted. Drops removed pairs
+        from the pair arrays, then rebuilds the table from the stored hashes
+        without hashing or comparing any keys
+        """
+        if len(self.entry_keys) != self.num_items:
+            live = [entry for entry, key in enumerate(self.entry_keys)
+                    if key is not TOMBSTONE]
+            self.hashes = array("Q", [self.hashes[entry] for entry in live])
+            self.entry_keys = [self.entry_keys[entry] for entry in live]
+            self.entry_vals = [self.entry_vals[entry] for entry in live]
+        table = self.new_index(self.table_size)
+        rehash = self.rehash
+        for entry, hash_value in enumerate(self.hashes):
+            idx = hash_value % self.table_size
+            i = 1
+            while table[idx] != EMPTY_SLOT:
+                idx = rehash(idx, i)
+                i += 1
+            table[idx] = entry
+        self.table = table
+        self.max_items = math.ceil(self.resize_threshold * self.table_size)
+        self.num_deleted = 0
+
+
+class HashTableRobinHood(HashTable):
+    """Hashtable with Robin Hood Linear Probing. While probing for a place
+    to insert, a pair that is further from its home slot than the pair in
+    the slot being checked takes that slot, and the displaced pair carries
+    on probing. This evens out probe lengths, and lets a search stop early
+    once it reaches a pair closer to home than the key would be. Removal
+    shifts the following pairs back instead of leaving tombstones.
+    Attributes:
+        dists (list): The number of probes past its home slot for the pair
+                      in each slot, -1 for an empty slot
+        last_probes (int): The number of occupied slots passed by the last
+                           call to place
+    """
+    def __init__(self, table_size=11, hasher=None, cache_hashes=False):
+        super().__init__(table_size, resize_threshold=0.75, hasher=hasher,
+                         cache_hashes=cache_hashes)
+        self.dists = [-1] * table_size
+        self.last_probes = 0
+
+
+    def put(self, key, data, hash_value=None):
+        """Insert a key/val pair into the hash table, displacing pairs that
+        are closer to their home slot than the new pair
+        Arguments:
+            key (str): The key to be inserted
+            data (any): The value associated with the key
+            hash_value (int): The full hash of key, if already known. Only
+                              used when the table caches hashes
+        """
+        hash_value = self.full_hash(key, hash_value)
+        idx = self.find_slot(key, hash_value)
+        if idx is not None:
+            self.table[idx].val = data
+            return
+        self.place(Node(key, data, hash_value=hash_value))
+        self.num_collisions += self.last_probes
+        self.num_items += 1
+        if self.num_items >= self.max_items:
+            self.resize()
+
+
+    def place(self, pair):
+        """Store a pair whose key is known to be absent, Robin Hood style.
+        The number of occupied slots passed is left in last_probes
+        Arguments:
+            pair (Node): The pair to store
+        Returns:
+            bool: Always True, linear probing never runs out of slots
+        """
+        table = self.table
+        dists = self.dists
+        idx = self.index_for(pair.key, pair.hash_value)
+        dist = 0
+        probes = 0
+        while table[idx] is not None:
+            if dists[idx] < dist:
+                table[idx], pair = pair, table[idx]
+                dists[idx], dist = dist, dists[idx]
+            probes += 1
+            idx = (idx + 1) % self.table_size
+            dist += 1
+        table[idx] = pair
+        dists[idx] = dist
+        self.last_probes = probes
+        return True
+
+
+    def build_table(self, pairs):
+        """Lay out pairs in a fresh table of table_size slots
+        Arguments:
+            pairs (list): The Nodes to store, all with distinct keys
+        """
+        self.dists = [-1] * self.table_size
+        super().build_table(pairs)
+
+
+    def find_slot(self, key, hash_value=None):
+        """Probe for key, stopping at an empty slot or at a pair closer to its
+        home slot than key would be at that point
+        Arguments:
+            key (str): The key to search for
+            hash_value (int): The full hash of key, if cached
+        Returns:
+            int: The index of the slot holding key, or None if it is absent
+        """
+        table = self.table
+        dists = self.dists
+        idx = self.index_for(key, hash_value)
+        for dist in range(self.table_size):
+            if dists[idx] < dist:
+                return None
+            if table[idx].key == key:
+                return idx
+            idx = (idx + 1) % self.table_size
+        return None
+
+
+    def find_many(self, keys):
+        """Probe for each key as find_slot does, starting from home indexes
+        hashed in one pass
+        Arguments:
+            keys (list): The keys to search for
+        Returns:
+            list: The value of each key, MISSING for keys not in the table
+        """
+        table = self.table
+        dists = self.dists
+        size = self.table_size
+        vals = []
+        for key, idx in zip(keys, self.home_indexes(keys)):
+            dist = 0
+            while dists[idx] >= dist and dist < size:
+                pair = table[idx]
+                if pair.key == key:
+                    vals.append(pair.val)
+                    break
+                idx = (idx + 1) % size
+                dist += 1
+            else:
+                vals.append(MISSING)
+        return vals
+
+
+    def remove(self, key):
+        """Removes a key/val pair from the hash table, shifting the pairs
+        after it back one slot until one is found in its home slot
+        Arguments:
+            key (str): The key of the pair to remove
+        Returns:
+            Node: The key/val pair that was deleted
+        """
+        idx = self.find_slot(key)
+        if idx is None:
+            raise KeyError(f"Cannot delete key {key} because it does not exist")
+        pair = self.table[idx]
+        nxt = (idx + 1) % self.table_size
+        while self.dists[nxt] > 0:
+            self.table[idx] = self.table[nxt]
+            self.dists[idx] = self.dists[nxt] - 1
+            idx = nxt
+            nxt = (nxt + 1) % self.table_size
+        self.table[idx] = None
+        self.dists[idx] = -1
+        self.num_items -= 1
+        return pair
+
+
+    def probe_length(self, key):
+        """The number of probes past its home slot at which key is stored
+        Arguments:
+            key (str): A key in the table
+        Returns:
+            int: The number of extra probes needed to find key
+        Raises:
+            KeyError: If the key is not found in the hash map
+        """
+        idx = self.find_slot(key)
+        if idx is None:
+            raise KeyError("Key not found")
+        return self.dists[idx]
+
+
+class HashTableCuckoo(HashTable):
+    """Hashtable with Cuckoo Hashing. Every key has two possible slots, one
+    from each of two hash functions, so a search never looks at more than
+    two slots. Inserting into two full slots evicts the pair in the first,
+    which moves to its other slot, possibly evicting another pair, and so on.
+    If that goes on for max_kicks moves the table grows.
+    Attributes:
+        max_kicks (int): The number of evictions allowed per insert
+        homeless (Node): The pair left without a slot by the last failed
+                         insert, until the table has grown to fit it
+        last_probes (int): The number of evictions made by the last call to
+                           place
+    """
+    def __init__(self, table_size=11, hasher=None, cache_hashes=False,
+                 max_kicks=32):
+        super().__init__(table_size, resize_threshold=0.45, hasher=hasher,
+                         cache_hashes=cache_hashes)
+        self.max_kicks = max_kicks
+        self.homeless = None
+        self.last_probes = 0
+
+
+    def slots_for(self, key, hash_value=None):
+        """The two slots key may be stored in
+        Arguments:
+            key (str): The key to hash
+            hash_value (int): The full hash of key, if cached
+        Returns:
+            tuple: The first and second slot for key
+        """
+        if hash_value is None and self.hasher is not None:
+            hash_value = self.hasher(key)
+        if hash_value is not None:
+            return (hash_value % self.table_size,
+                    (hash_value // self.table_size) % self.table_size)
+        second = 0
+        for char in key:
+            second = (second * 37 + ord(char)) % self.table_size
+        return self.hash_string(key), (second + 1) % self.table_size
+
+
+    def put(self, key, data, hash_value=None):
+        """Insert a key/val pair into one of its two slots, evicting pairs
+        into their other slot if both are taken
+        Arguments:
+            key (str): The key to be inserted
+            data (any): The value associated with the key
+            hash_value (int): The full hash of key, if already known. Only
+                              used when the table caches hashes
+        """
+        hash_value = self.full_hash(key, hash_value)
+        idx = self.find_slot(key, hash_value)
+        if idx is not None:
+            self.table[idx].val = data
+            return
+        pair = Node(key, data, hash_value=hash_value)
+        self.num_items += 1
+        placed = self.place(pair)
+        self.num_collisions += self.last_probes
+        if not placed or self.num_items >= self.max_items:
+            self.resize()
+
+
+    def place(self, pair):
+        """Store a pair whose key is known to be absent, evicting pairs into
+        their other slot until every pair has a slot or max_kicks is reached
+        Arguments:
+            pair (Node): The pair to store
+        Returns:
+            bool: True if stored. False if a pair was left without a slot, in
+                  which case it is kept in homeless
+        """
+        first, second = self.slots_for(pair.key, pair.hash_value)
+        if self.table[first] is not None and self.table[second] is None:
+            first = second
+        idx = first
+        for kicks in range(self.max_kicks):
+            if self.table[idx] is None:
+                self.table[idx] = pair
+                self.last_probes = kicks
+                return True
+            self.table[idx], pair = pair, self.table[idx]
+            first, second = self.slots_for(pair.key, pair.hash_value)
+            idx = second if idx == first else first
+        self.homeless = pair
+        self.last_probes = self.max_kicks
+        return False
+
+
+    def rehash_table(self):
+        """Called only after the table is resized. Lays out every pair
+        again, including the one left homeless by a failed insert
+        """
+        pairs = [pair for pair in self.table if pair is not None]
+        if self.homeless is not None:
+            pairs.append(self.homeless)
+        self.build_table(pairs)
+
+
+    def build_table(self, pairs):
+        """Lay out pairs in a fresh table, growing it until every pair has a
+        slot. No pair is left homeless afterwards
+        Arguments:
+            pairs (list): The Nodes to store, all with distinct keys
+        """
+        super().build_table(pairs)
+        self.homeless = None
+
+
+    def find_slot(self, key, hash_value=None):
+        """Check the two slots key may be stored in
+        Arguments:
+            key (str): The key to search for
+            hash_value (int): The full hash of key, if cached
+        Returns:
+            int: The index of the slot holding key, or None if it is absent
+        """
+        for idx in self.slots_for(key, hash_value):
+            pair = self.table[idx]
+            if pair is not None and pair.key == key:
+                return idx
+        return None
+
+
+    def find_many(self, keys):
+        """Check the two slots of each key. With a hasher, the full hashes
+        of all the keys are computed in one pass, and the second slot is only
+        worked out for keys not in their first
+        Arguments:
+            keys (list): The keys to search for
+        Returns:
+            list: The value of each key, MISSING for keys not in the table
+        """
+        table = self.table
+        size = self.table_size
+        vals = []
+        if self.hasher is None:
+            for key in keys:
+                first, second = self.slots_for(key)
+                pair = table[first]
+                if pair is None or pair.key != key:
+                    pair = table[second]
+                vals.append(MISSING if pair is None or pair.key != key
+                            else pair.val)
+            return vals
+        for key, hash_value in zip(keys, list(map(self.hasher, keys))):
+            pair = table[hash_value % size]
+            if pair is None or pair.key != key:
+                pair = table[(hash_value // size) % size]
+            vals.append(MISSING if pair is None or pair.key != key
+                        else pair.val)
+        return vals
+
+
+    def remove(self, key):
+        """Removes a key/val pair from the hash table. No other pair depends
+        on the slot, so it is simply emptied
+        Arguments:
+            key (str): The key of the pair to remove
+        Returns:
+            Node: The key/val pair that was deleted
+        """
+        idx = self.find_slot(key)
+        if idx is None:
+            raise KeyError(f"Cannot delete key {key} because it does not exist")
+        pair = self.table[idx]
+        self.table[idx] = None
+        self.num_items -= 1
+        return pair
+
+
+    def probe_length(self, key):
+        """0 if key is in its first slot, 1 if it is in its second
+        Arguments:
+            key (str): A key in the table
+        Returns:
+            int: The number of extra probes needed to find key
+        Raises:
+            KeyError: If the key is not found in the hash map
+        """
+        idx = self.find_slot(key)
+        if idx is None:
+            raise KeyError("Key not found")
+        return 0 if idx == self.slots_for(key)[0] else 1
+
+
 def import_stopwords(filename, hashtable):
     """Create a hashtable of words imported from filename
     Arguments:
@@ -353,6 +1788,6 @@ def import_stopwords(filename, hashtable):
     """
     with open(filename, 'r') as file:
         data = file.readlines()[0].split(' ')
-        for word in data:
-            hashtable.put(word, word)
+        hashtable.put_many((word, word) for word in data)
     return hashtable
+
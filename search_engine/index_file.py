@@ -0,0 +1,432 @@
+"""Binary file format for an InvertedIndex. Loading memory-maps the file,
+and the index is used in place through memoryviews: nothing is parsed or
+copied up front, so a loaded index can answer queries at once.
+
+The file is a header followed by sections, each aligned to 8 bytes. The
+header holds a magic string, the byte order and format version, then the
+offset and byte size of each section in SECTIONS. Strings are stored as a
+blob of UTF-8 with an array of start offsets. Terms and document names can
+be looked up through a linear probing table of IDs hashed with fnv_hash,
+which is stable across runs, unlike the built in hash. Posting lists are
+stored compressed by PostingList.encode, and each is decoded the first time
+its term is used. The positions of a positional index are stored term by
+term after the postings; a plain index leaves those sections empty.
+Removed documents
+are dropped when saving and the rest renumbered, so a file has no gaps in
+its doc IDs.
+Author: Ben Paulson
+"""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+from hashtables import HashTableSepchain as HashTable, fnv_hash
+from inverted_index import InvertedIndex, PostingList, positions_size
+
+
+MAGIC = b"SEIX"
+VERSION = 4
+SECTIONS = ("doc_lengths", "doc_name_offsets", "doc_names", "doc_slots",
+            "term_offsets", "terms", "term_slots", "posting_offsets",
+            "postings", "doc_term_offsets", "doc_terms", "doc_stamps",
+            "position_offsets", "positions")
+TYPECODES = ("I", "Q", "B", "i", "Q", "B", "i", "Q", "B", "Q", "I", "Q",
+             "Q", "B")
+HEADER = struct.Struct("<4s1s3xI" + "QQ" * len(SECTIONS))
+EMPTY_ID = -1
+
+
+class MappedStrings:
+    """A read only list of strings stored in an index file, decoded when
+    used. Strings appended after loading are kept in a list
+    Attributes:
+        offsets (memoryview): The byte offset of each string in blob, plus
+                              the end of the last string
+        blob (memoryview): The UTF-8 bytes of every string
+        added (list): Strings appended since loading
+    """
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self.added = []
+
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.added)
+
+
+    def __getitem__(self, idx):
+        mapped = len(self.offsets) - 1
+        if idx < 0:
+            idx += len(self)
+        if idx >= mapped:
+            return self.added[idx - mapped]
+        return str(self.blob[self.offsets[idx]:self.offsets[idx + 1]],
+                   "utf-8")
+
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+    def append(self, string):
+        """Add a string after the mapped ones
+        Arguments:
+            string (str): The string to add
+        """
+        self.added.append(string)
+
+
+class MappedTable:
+    """A hash table from the strings in a MappedStrings to their positions,
+    searched in place in the index file. Keys set or removed after loading
+    are kept in a HashTable, which is checked first
+    Attributes:
+        slots (memoryview): Linear probing table of string IDs, EMPTY_ID for
+                            an empty slot
+        strings (MappedStrings): The strings the IDs refer to
+        added (HashTable): Keys set since loading, with None for keys
+                           removed since loading
+    """
+    def __init__(self, slots, strings):
+        self.slots = slots
+        self.strings = strings
+        self.added = HashTable()
+
+
+    def __contains__(self, key):
+        if key in self.added:
+            return self.added[key] is not None
+        return self.find(key) is not None
+
+
+    def __getitem__(self, key):
+        if key in self.added:
+            ident = self.added[key]
+        else:
+            ident = self.find(key)
+        if ident is None:
+            raise KeyError(key)
+        return ident
+
+
+    def __setitem__(self, key, val):
+        self.added[key] = val
+
+
+    def remove(self, key):
+        """Remove a key
+        Arguments:
+            key (str): The key to remove
+        Raises:
+            KeyError: If key is not in the table
+        """
+        if key not in self:
+            raise KeyError(key)
+        self.added[key] = None
+
+
+    def find(self, key):
+        """Probe the mapped slots for key
+        Arguments:
+            key (str): The key to search for
+        Returns:
+            int: The ID of key, or None if it is not in the mapped table
+        """
+        slots = self.slots
+        size = len(slots)
+        if size == 0:
+            return None
+        idx = fnv_hash(key) % size
+        while slots[idx] != EMPTY_ID:
+            if self.strings[slots[idx]] == key:
+                return slots[idx]
+            idx = (idx + 1) % size
+        return None
+
+
+    def keys(self):
+        """Every key in the table
+        Returns:
+            list: The keys
+        """
+        mapped = len(self.strings.offsets) - 1
+        keys = [self.strings[idx] for idx in range(mapped)
+                if self.strings[idx] not in self.added]
+        return keys + [key for key in self.added.keys()
+                       if self.added[key] is not None]
+
+
+class MappedPostings:
+    """The posting lists of a loaded index, by term ID. Each term's encoded
+    postings are decoded into a PostingList the first time it is used
+    Attributes:
+        offsets (memoryview): The byte offset of each term's postings in
+                              data, plus the end of the last
+        data (memoryview): Every encoded posting list, one after another
+        position_offsets (memoryview): The byte offset of each term's
+                                       positions in positions, plus the end
+                                       of the last. Empty if the index does
+                                       not keep positions
+        positions (memoryview): Every term's encoded positions, one posting
+                                after another
+        lists (list): The PostingList of each term, None until first used
+    """
+    def __init__(self, offsets, data, position_offsets, positions):
+        self.offsets = offsets
+        self.data = data
+        self.position_offsets = position_offsets
+        self.positions = positions
+        self.lists = [None] * (len(offsets) - 1)
+
+
+    def __len__(self):
+        return len(self.lists)
+
+
+    def __getitem__(self, term_id):
+        postings = self.lists[term_id]
+        if postings is None:
+            start = self.offsets[term_id]
+            end = self.offsets[term_id + 1]
+            postings = PostingList.decode(self.data[start:end])
+            if len(self.position_offsets) > 0:
+                postings.positions, postings.position_offsets = \
+                    self.split_positions(term_id, postings.freqs)
+            self.lists[term_id] = postings
+        return postings
+
+
+    def __iter__(self):
+        for term_id in range(len(self)):
+            yield self[term_id]
+
+
+    def split_positions(self, term_id, freqs):
+        """Copy out a term's positions and find where each posting's start
+        Arguments:
+            term_id (int): The term ID
+            freqs (array): The frequency of each of the term's postings
+        Returns:
+            tuple: (positions, position_offsets) as PostingList keeps them
+        """
+        start = self.position_offsets[term_id]
+        end = self.position_offsets[term_id + 1]
+        data = bytearray(self.positions[start:end])
+        offsets = array("Q", [0])
+        pos = 0
+        for freq in freqs:
+            pos += positions_size(data, pos, freq)
+            offsets.append(pos)
+        return data, offsets
+
+
+    def append(self, postings):
+        """Add the posting list of a term added since loading
+        Arguments:
+            postings (PostingList): The posting list
+        """
+        self.lists.append(postings)
+
+
+class MappedArrays:
+    """A list of int arrays stored one after another in an index file, used
+    as views of the file until replaced
+    Attributes:
+        offsets (memoryview): The start of each array in values, plus the
+                              end of the last
+        values (memoryview): Every array's values, one after another
+        changed (list): Arrays set or appended since loading, None for the
+                        ones still in the file
+    """
+    def __init__(self, offsets, values):
+        self.offsets = offsets
+        self.values = values
+        self.changed = [None] * (len(offsets) - 1)
+
+
+    def __len__(self):
+        return len(self.changed)
+
+
+    def __getitem__(self, idx):
+        values = self.changed[idx]
+        if values is None:
+            return self.values[self.offsets[idx]:self.offsets[idx + 1]]
+        return values
+
+
+    def __setitem__(self, idx, values):
+        self.changed[idx] = values
+
+
+    def append(self, values):
+        """Add an array after the mapped ones
+        Arguments:
+            values (array): The array to add
+        """
+        self.changed.append(values)
+
+
+def concat_section(arrays, typecode, new_ids=None):
+    """Store int arrays one after another
+    Arguments:
+        arrays (iterable): The arrays
+        typecode (str): The array type of the values
+        new_ids (list): Map each value through this list, e.g. to renumber
+                        doc IDs. None stores the values as they are
+    Returns:
+        tuple: (offsets, values) as an array of "Q" and of typecode
+    """
+    offsets = array("Q", [0])
+    values = array(typecode)
+    for part in arrays:
+        if new_ids is None:
+            values.frombytes(memoryview(part).cast("B"))
+        else:
+            values.extend([new_ids[value] for value in part])
+        offsets.append(len(values))
+    return offsets, values
+
+
+def string_sections(strings):
+    """Encode strings as an offsets array and a blob
+    Arguments:
+        strings (list): The strings
+    Returns:
+        tuple: (offsets, blob) as an array of "Q" and bytes
+    """
+    encoded = [string.encode() for string in strings]
+    offsets = array("Q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return offsets, b"".join(encoded)
+
+
+def slot_section(strings):
+    """Build the linear probing table MappedTable searches, at most half full
+    Arguments:
+        strings (list): The strings, whose positions are their IDs
+    Returns:
+        array: The slots, as an array of "i"
+    """
+    size = 1 << max(3, (2 * len(strings)).bit_length())
+    slots = array("i", [EMPTY_ID]) * size
+    for ident, string in enumerate(strings):
+        idx = fnv_hash(string) % size
+        while slots[idx] != EMPTY_ID:
+            idx = (idx + 1) % size
+        slots[idx] = ident
+    return slots
+
+
+def encode_postings(postings, new_ids=None):
+    """Encode a posting list for the postings section
+    Arguments:
+        postings (PostingList): The posting list
+        new_ids (list): Map each doc ID through this list. None stores the
+                        doc IDs as they are
+    Returns:
+        bytes: The encoded postings
+    """
+    if new_ids is not None:
+        postings = PostingList(
+            array("I", [new_ids[doc_id] for doc_id in postings.doc_ids]),
+            postings.freqs)
+    return postings.encode()
+
+
+def save_index(index, path):
+    """Write an index to a file. The file is written under a temporary name
+    and then moved over path, so an index already loaded from path is never
+    left mapping a half written file
+    Arguments:
+        index (InvertedIndex): The index to write
+        path (str): The file to write to
+    """
+    live, new_ids = index.renumbering()
+    doc_names = [index.doc_names[doc_id] for doc_id in live]
+    terms = list(index.terms)
+    posting_offsets, posting_data = concat_section(
+        (encode_postings(postings, new_ids) for postings in index.postings),
+        "B")
+    if index.positional:
+        position_offsets, positions = concat_section(
+            (postings.positions for postings in index.postings),
+            "B")
+    else:
+        position_offsets, positions = array("Q"), array("B")
+    doc_term_offsets, doc_terms = concat_section(
+        (index.doc_terms[doc_id] for doc_id in live), "I")
+    fields = index.STAMP_FIELDS
+    doc_lengths = array("I", [index.doc_lengths[doc_id] for doc_id in live])
+    doc_stamps = array("Q")
+    for doc_id in live:
+        doc_stamps.extend(index.doc_stamps[doc_id * fields:
+                                           (doc_id + 1) * fields])
+    doc_name_offsets, doc_name_blob = string_sections(doc_names)
+    term_offsets, term_blob = string_sections(terms)
+    sections = [doc_lengths, doc_name_offsets, doc_name_blob,
+                slot_section(doc_names), term_offsets, term_blob,
+                slot_section(terms), posting_offsets, posting_data,
+                doc_term_offsets, doc_terms, doc_stamps, position_offsets,
+                positions]
+    layout = []
+    offset = HEADER.size
+    for section in sections:
+        offset += -offset % 8
+        size = len(memoryview(section).cast("B"))
+        layout.extend((offset, size))
+        offset += size
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as outf:
+        outf.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), VERSION,
+                               *layout))
+        for section, offset in zip(sections, layout[::2]):
+            outf.write(b"\0" * (offset - outf.tell()))
+            outf.write(section)
+    os.replace(temp_path, path)
+
+
+def load_index(path):
+    """Memory-map an index file written by save_index
+    Arguments:
+        path (str): The file to load
+    Returns:
+        InvertedIndex: The index, backed by the mapped file
+    Raises:
+        ValueError: If the file is not an index file this version can read
+    """
+    with open(path, "rb") as inf:
+        mapped = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is not an index file")
+    magic, byteorder, version, *layout = HEADER.unpack(view[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an index file")
+    if version != VERSION or byteorder != sys.byteorder[0].encode():
+        raise ValueError(f"{path} was written by an incompatible version "
+                         "or machine")
+    sections = {}
+    for name, typecode, offset, size in zip(SECTIONS, TYPECODES,
+                                            layout[::2], layout[1::2]):
+        sections[name] = view[offset:offset + size].cast(typecode)
+    index = InvertedIndex(len(sections["position_offsets"]) > 0)
+    index.doc_names = MappedStrings(sections["doc_name_offsets"],
+                                    sections["doc_names"])
+    index.doc_ids = MappedTable(sections["doc_slots"], index.doc_names)
+    index.doc_lengths = sections["doc_lengths"]
+    index.terms = MappedStrings(sections["term_offsets"], sections["terms"])
+    index.term_ids = MappedTable(sections["term_slots"], index.terms)
+    index.postings = MappedPostings(sections["posting_offsets"],
+                                    sections["postings"],
+                                    sections["position_offsets"],
+                                    sections["positions"])
+    index.doc_terms = MappedArrays(sections["doc_term_offsets"],
+                                   sections["doc_terms"])
+    index.doc_stamps = sections["doc_stamps"]
+    return index
@@ -0,0 +1,149 @@
+"""Tests for saving and loading index files
+Author: Ben Paulson
+"""
+
+import os
+import pickle
+import unittest
+import tempfile
+from inverted_index import InvertedIndex, merge, encode_positions
+from index_file import save_index, load_index
+
+
+class IndexFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "index.bin")
+        self.index = InvertedIndex()
+        self.index.add_document("a", ["hash", "table", "hash"])
+        self.index.add_document("b", ["table", "list", "café"])
+        self.index.add_document("c", ["hash"])
+        save_index(self.index, self.path)
+        self.loaded = load_index(self.path)
+
+
+    def tearDown(self):
+        self.loaded = None
+        self.dir.cleanup()
+
+
+    def test_round_trip(self):
+        self.assertEqual(self.loaded.num_docs(), 3)
+        self.assertEqual(self.loaded.num_terms(), 4)
+        self.assertEqual(list(self.loaded.doc_names), ["a", "b", "c"])
+        self.assertEqual(list(self.loaded.doc_lengths), [3, 3, 1])
+        self.assertEqual(self.loaded.doc_length("b"), 3)
+        self.assertEqual(list(self.loaded.terms), list(self.index.terms))
+        for term in self.index.terms:
+            self.assertEqual(self.loaded.term_id(term),
+                             self.index.term_id(term))
+            self.assertEqual(self.loaded.posting_list(term),
+                             self.index.posting_list(term))
+        self.assertIsNone(self.loaded.term_id("tree"))
+        self.assertIsNone(self.loaded.posting_list("tree"))
+        with self.assertRaises(KeyError):
+            self.loaded.doc_length("d")
+        lists = [self.loaded.posting_list("hash"),
+                 self.loaded.posting_list("table")]
+        self.assertEqual(list(merge(lists)),
+                         [(0, [2, 1]), (1, [0, 1]), (2, [1, 0])])
+
+
+    def test_empty_index(self):
+        save_index(InvertedIndex(), self.path)
+        index = load_index(self.path)
+        self.assertEqual(index.num_docs(), 0)
+        self.assertIsNone(index.posting_list("hash"))
+
+
+    def test_add_after_load(self):
+        self.loaded.add_document("d", ["hash", "tree"])
+        self.assertEqual(self.loaded.num_docs(), 4)
+        self.assertEqual(self.loaded.doc_length("d"), 2)
+        self.assertEqual(list(self.loaded.posting_list("hash")),
+                         [(0, 2), (2, 1), (3, 1)])
+        self.assertEqual(list(self.loaded.posting_list("tree")), [(3, 1)])
+        self.assertEqual(self.loaded.terms[-1], "tree")
+        save_index(self.loaded, self.path)
+        index = load_index(self.path)
+        self.assertEqual(list(index.posting_list("tree")), [(3, 1)])
+        self.assertEqual(list(index.doc_names), ["a", "b", "c", "d"])
+
+
+    def test_remove_after_load(self):
+        self.loaded.COMPACT_FRACTION = 1
+        self.loaded.remove_document("a")
+        self.loaded.add_document("b", ["list"], (7, 8, 9))
+        self.assertEqual(self.loaded.num_docs(), 2)
+        self.assertEqual(list(self.loaded.posting_list("hash")), [(2, 1)])
+        self.assertEqual(list(self.loaded.posting_list("list")), [(3, 1)])
+        save_index(self.loaded, self.path)
+        index = load_index(self.path)
+        self.assertEqual(list(index.doc_names), ["c", "b"])
+        self.assertEqual(index.num_docs(), 2)
+        self.assertEqual(list(index.posting_list("hash")), [(0, 1)])
+        self.assertEqual(list(index.posting_list("list")), [(1, 1)])
+        self.assertEqual(index.doc_freq("table"), 0)
+        self.assertEqual(index.doc_stamp("b"), (7, 8, 9))
+        index.remove_document("c")
+        self.assertEqual(index.documents(), ["b"])
+
+
+    def test_compact_after_load(self):
+        self.loaded.remove_document("a")
+        self.loaded.remove_document("c")
+        self.assertEqual(list(self.loaded.doc_names), ["b"])
+        self.assertEqual(list(self.loaded.posting_list("table")), [(0, 1)])
+        self.assertEqual(self.loaded.doc_freq("hash"), 0)
+        self.loaded.add_document("d", ["hash", "tree"])
+        self.assertEqual(list(self.loaded.posting_list("hash")), [(1, 1)])
+        copy = pickle.loads(pickle.dumps(self.loaded))
+        self.assertEqual(copy.documents(), ["b", "d"])
+        save_index(self.loaded, self.path)
+        index = load_index(self.path)
+        self.assertEqual(list(index.doc_names), ["b", "d"])
+        self.assertEqual(list(index.posting_list("tree")), [(1, 1)])
+
+
+    def test_pickle(self):
+        self.loaded.remove_document("b")
+        copy = pickle.loads(pickle.dumps(self.loaded))
+        self.assertEqual(copy.documents(), ["a", "c"])
+        self.assertEqual(list(copy.doc_names), ["a", "b", "c"])
+        self.assertEqual(copy.doc_length("c"), 1)
+        self.assertEqual(list(copy.posting_list("hash")), [(0, 2), (2, 1)])
+        copy.add_document("d", ["tree"])
+        self.assertEqual(list(copy.posting_list("tree")), [(3, 1)])
+
+
+    def test_positions(self):
+        self.assertFalse(self.loaded.positional)
+        index = InvertedIndex(positional=True)
+        index.add_document("a", ["hash", "table", "hash"])
+        index.add_document("b", ["table", "hash"])
+        index.remove_document("a")
+        index.add_document("c", ["hash"] * 300)
+        save_index(index, self.path)
+        loaded = load_index(self.path)
+        self.assertTrue(loaded.positional)
+        postings = loaded.posting_list("hash")
+        self.assertEqual(list(postings), [(0, 1), (1, 300)])
+        self.assertEqual([postings.positions_at(pos)
+                          for pos in range(len(postings))],
+                         [[1], list(range(300))])
+        loaded.add_document("d", ["tree", "hash"])
+        self.assertEqual(postings.positions_at(2), [1])
+        self.assertEqual(loaded.posting_list("tree").positions,
+                         encode_positions([0]))
+
+
+    def test_bad_file(self):
+        with open(self.path, "wb") as outf:
+            outf.write(b"not an index file at all" * 10)
+        with self.assertRaises(ValueError):
+            load_index(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
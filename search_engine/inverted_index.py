@@ -0,0 +1,813 @@
+"""Inverted index for the search engine. Terms and documents are given
+integer IDs, and each term has a posting list of the documents it occurs
+in, sorted by doc ID.
+Author: Ben Paulson
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
+from hashtables import HashTableSepchain as HashTable, builtin_hash
+
+
+# The number of postings in each block of an encoded posting list
+BLOCK_SIZE = 128
+# The array types a block's values can be packed into, by width code
+WIDTH_TYPECODES = "BHI"
+
+
+class PostingList:
+    """The documents a term occurs in, sorted by doc ID, with the number of
+    times the term occurs in each. Stored as two parallel arrays of ints,
+    which may be read only views such as memoryviews until the first change
+    copies them. encode and decode convert the list to and from a compressed
+    form for index files
+    Attributes:
+        doc_ids (array, memoryview): The doc IDs, in increasing order
+        freqs (array, memoryview): The frequency of the term in each document
+        positions (bytearray): The positions of the term in each document,
+                               encoded by encode_positions, one document
+                               after another. None if the index does not
+                               keep positions
+        position_offsets (array): The start of each document's positions in
+                                  positions, plus the end of the last. None
+                                  if the index does not keep positions
+    """
+    def __init__(self, doc_ids=None, freqs=None, positions=None,
+                 position_offsets=None):
+        self.doc_ids = array("I") if doc_ids is None else doc_ids
+        self.freqs = array("I") if freqs is None else freqs
+        self.positions = positions
+        self.position_offsets = position_offsets
+        if positions is not None and position_offsets is None:
+            self.position_offsets = array("Q", [0])
+
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+
+    def __iter__(self):
+        return zip(self.doc_ids, self.freqs)
+
+
+    def __eq__(self, other):
+        return isinstance(other, PostingList) and list(self) == list(other)
+
+
+    def __repr__(self):
+        return f"PostingList({list(self)})"
+
+
+    def append(self, doc_id, freq, positions=None):
+        """Add a posting for a document after every document in the list
+        Arguments:
+            doc_id (int): The doc ID, greater than every doc ID in the list
+            freq (int): The frequency of the term in the document
+            positions (bytes): The term's positions in the document, from
+                               encode_positions, if the list keeps them
+        """
+        self.own_arrays()
+        self.doc_ids.append(doc_id)
+        self.freqs.append(freq)
+        if self.positions is not None:
+            self.positions += positions
+            self.position_offsets.append(len(self.positions))
+
+
+    def extend(self, other, offset=0):
+        """Add every posting of another posting list after the postings in
+        this one
+        Arguments:
+            other (PostingList): The postings to add
+            offset (int): Added to each doc ID of other, which must then be
+                          greater than every doc ID in this list
+        """
+        self.own_arrays()
+        if offset:
+            self.doc_ids.extend([doc_id + offset for doc_id in other.doc_ids])
+        else:
+            self.doc_ids.frombytes(memoryview(other.doc_ids).cast("B"))
+        self.freqs.frombytes(memoryview(other.freqs).cast("B"))
+        if self.positions is not None:
+            start = len(self.positions)
+            self.positions += other.positions
+            self.position_offsets.extend([start + end for end in
+                                          other.position_offsets[1:]])
+
+
+    def next_geq(self, pos, doc_id):
+        """Find the first posting at or after pos with a doc ID of at least
+        doc_id, with next_geq
+        Arguments:
+            pos (int): The position to search from
+            doc_id (int): The doc ID to skip to
+        Returns:
+            int: The position of the posting, or len(self) if there is none
+        """
+        return next_geq(self.doc_ids, pos, doc_id)
+
+
+    def remove(self, doc_id):
+        """Remove the posting for a document, found by binary search
+        Arguments:
+            doc_id (int): The doc ID to remove
+        Returns:
+            int: The frequency the posting held, or 0 if there was none
+        """
+        pos = bisect_left(self.doc_ids, doc_id)
+        if pos == len(self.doc_ids) or self.doc_ids[pos] != doc_id:
+            return 0
+        self.own_arrays()
+        freq = self.freqs[pos]
+        del self.doc_ids[pos]
+        del self.freqs[pos]
+        if self.positions is not None:
+            offsets = self.position_offsets
+            start = offsets[pos]
+            size = offsets[pos + 1] - start
+            del self.positions[start:start + size]
+            offsets[pos + 1:] = array("Q", [end - size for end
+                                            in offsets[pos + 2:]])
+        return freq
+
+
+    def positions_at(self, pos):
+        """The positions of the term in the document of a posting
+        Arguments:
+            pos (int): The position of the posting in the list
+        Returns:
+            list: The positions, in increasing order
+        """
+        offsets = self.position_offsets
+        return decode_positions(self.positions[offsets[pos]:offsets[pos + 1]])
+
+
+    def encode(self):
+        """Compress the list into bytes. Postings are packed in blocks of up
+        to BLOCK_SIZE. Each doc ID is stored as the gap from the one before
+        it, which is small for any term in many documents, and each block
+        stores its gaps and its frequencies as arrays of the narrowest of 1,
+        2 or 4 bytes that fits the largest value in the block. A block is a
+        byte holding its number of postings - 1, a byte holding the width
+        codes of its gaps and frequencies, then the two arrays
+        Returns:
+            bytes: The encoded postings
+        """
+        encoded = bytearray()
+        last = 0
+        for start in range(0, len(self.doc_ids), BLOCK_SIZE):
+            doc_ids = self.doc_ids[start:start + BLOCK_SIZE]
+            freqs = self.freqs[start:start + BLOCK_SIZE]
+            gaps = [doc_id - prev
+                    for doc_id, prev in zip(doc_ids, chain((last,), doc_ids))]
+            gap_code = width_code(max(gaps))
+            freq_code = width_code(max(freqs))
+            encoded.append(len(gaps) - 1)
+            encoded.append(gap_code | freq_code << 2)
+            encoded += array(WIDTH_TYPECODES[gap_code], gaps).tobytes()
+            encoded += array(WIDTH_TYPECODES[freq_code], freqs).tobytes()
+            last = doc_ids[-1]
+        return bytes(encoded)
+
+
+    @classmethod
+    def decode(cls, data):
+        """Decompress bytes written by encode. Each block is read straight
+        into an array and the gaps summed with accumulate, so no Python code
+        runs per posting
+        Arguments:
+            data (bytes, memoryview): The encoded postings
+        Returns:
+            PostingList: The posting list
+        """
+        doc_ids = array("I")
+        freqs = array("I")
+        pos = 0
+        last = 0
+        while pos < len(data):
+            count = data[pos] + 1
+            codes = data[pos + 1]
+            pos += 2
+            gaps = array(WIDTH_TYPECODES[codes & 3])
+            end = pos + count * gaps.itemsize
+            gaps.frombytes(data[pos:end])
+            doc_id_iter = accumulate(gaps, initial=last)
+            next(doc_id_iter)
+            doc_ids.extend(doc_id_iter)
+            last = doc_ids[-1]
+            block_freqs = array(WIDTH_TYPECODES[codes >> 2])
+            pos = end + count * block_freqs.itemsize
+            block_freqs.frombytes(data[end:pos])
+            if block_freqs.typecode == "I":
+                freqs.extend(block_freqs)
+            else:
+                freqs.extend(iter(block_freqs))
+        return cls(doc_ids, freqs)
+
+
+    def renumber(self, new_ids):
+        """Give every posting a new doc ID
+        Arguments:
+            new_ids (list): The new ID of each old doc ID, in the same order
+                            as the old IDs, so the list stays sorted
+        """
+        self.own_arrays()
+        self.doc_ids = array("I", [new_ids[doc_id] for doc_id in self.doc_ids])
+
+
+    def own_arrays(self):
+        """Copy read only views of an index file into arrays that can be
+        changed
+        """
+        if not isinstance(self.doc_ids, array):
+            self.doc_ids = array("I", self.doc_ids)
+            self.freqs = array("I", self.freqs)
+
+
+def next_geq(doc_ids, pos, doc_id):
+    """Find the first doc ID at or after pos that is at least doc_id, by
+    galloping: probe 1, 2, 4, ... places ahead until passing doc_id, then
+    binary search the last gap. A skip of d places costs O(log d), so
+    walking a list in short skips costs little more than stepping through it
+    Arguments:
+        doc_ids (array): Doc IDs in increasing order
+        pos (int): The position to search from
+        doc_id (int): The doc ID to skip to
+    Returns:
+        int: The position of the doc ID, or len(doc_ids) if there is none
+    """
+    end = len(doc_ids)
+    probe = pos
+    step = 1
+    while probe < end and doc_ids[probe] < doc_id:
+        pos = probe + 1
+        probe += step
+        step *= 2
+    return bisect_left(doc_ids, doc_id, pos, min(probe, end))
+
+
+def encode_positions(positions):
+    """Compress the positions of a term in a document: a byte holding the
+    width code of the gaps between positions, then the gaps as an array of
+    that width
+    Arguments:
+        positions (array): The positions, in increasing order
+    Returns:
+        bytes: The encoded positions
+    """
+    gaps = [pos - prev for pos, prev in zip(positions, chain((0,), positions))]
+    code = width_code(max(gaps))
+    return bytes((code,)) + array(WIDTH_TYPECODES[code], gaps).tobytes()
+
+
+def decode_positions(data):
+    """Decompress positions written by encode_positions
+    Arguments:
+        data (bytes): The encoded positions
+    Returns:
+        list: The positions, in increasing order
+    """
+    gaps = array(WIDTH_TYPECODES[data[0]])
+    gaps.frombytes(data[1:])
+    return list(accumulate(gaps))
+
+
+def positions_size(data, pos, freq):
+    """The length of encoded positions in a buffer of them, one after
+    another
+    Arguments:
+        data (bytes): The buffer
+        pos (int): Where the positions start in data
+        freq (int): The number of positions
+    Returns:
+        int: The number of bytes they take
+    """
+    return 1 + freq * array(WIDTH_TYPECODES[data[pos]]).itemsize
+
+
+def width_code(value):
+    """The width code of the narrowest array type in WIDTH_TYPECODES that
+    can hold a value
+    Arguments:
+        value (int): The largest value to store, at least 0
+    Returns:
+        int: The index of the array type in WIDTH_TYPECODES
+    """
+    if value < 1 << 8:
+        return 0
+    if value < 1 << 16:
+        return 1
+    return 2
+
+
+class InvertedIndex:
+    """Maps each term to the posting list of the documents it occurs in.
+    Doc IDs are handed out in increasing order as documents are added, so
+    every posting list stays sorted by doc ID without any sorting. A
+    document that is indexed again is removed and added with a new doc ID.
+    The doc IDs of removed documents are not reused; their entries in the
+    lists below stay until compact renumbers the documents left, which
+    happens once they pass COMPACT_FRACTION of all doc IDs, or the index is
+    saved. An index read by index_file.load_index keeps the same attributes,
+    backed by the mapped file instead
+    Attributes:
+        term_ids (HashTable): The term ID of each term, hashed with
+                              builtin_hash
+        terms (list): The term for each term ID
+        postings (list): The PostingList for each term ID
+        doc_ids (HashTable): The doc ID of each document name
+        doc_names (list): The name of each document, by doc ID
+        doc_lengths (array): The number of words in each document, by doc ID
+        doc_terms (list): The term IDs of each document, by doc ID, so that
+                          removing a document only visits its own terms
+        doc_stamps (array): STAMP_FIELDS ints per doc ID identifying the
+                            version of the document that was indexed, e.g.
+                            its modification time, size and a content hash
+        num_removed (int): The number of doc IDs of removed documents
+        version (int): Counts the changes made to the documents in the
+                       index, so anything computed from it can tell when it
+                       is out of date
+        positional (bool): Whether posting lists keep the position of each
+                           occurrence of their term, for phrase queries
+        live_cache (tuple): The version live_doc_ids was last computed for,
+                            and the doc IDs it gave
+    """
+    STAMP_FIELDS = 3
+    # remove_document compacts the index once more than this fraction of
+    # the doc IDs belong to removed documents
+    COMPACT_FRACTION = 0.5
+
+    def __init__(self, positional=False):
+        self.positional = positional
+        self.term_ids = HashTable(hasher=builtin_hash)
+        self.terms = []
+        self.postings = []
+        self.doc_ids = HashTable(hasher=builtin_hash)
+        self.doc_names = []
+        self.doc_lengths = array("I")
+        self.doc_terms = []
+        self.doc_stamps = array("Q")
+        self.num_removed = 0
+        self.version = 0
+        self.live_cache = None
+
+
+    def __getstate__(self):
+        """Pickle without the term_ids and doc_ids hash tables. Their layout
+        depends on the per process string hash, so they are rebuilt in bulk
+        from terms and doc_names when unpickling, which is also faster than
+        pickling their nodes. Shard indexes are sent between processes this
+        way. The parts of an index loaded from a file are copied out of the
+        file into lists and arrays
+        """
+        state = self.__dict__.copy()
+        del state["term_ids"]
+        del state["doc_ids"]
+        state["live_docs"] = None
+        if self.num_removed:
+            state["live_docs"] = [doc_id for doc_id in
+                                  range(len(self.doc_names))
+                                  if self.is_live(doc_id)]
+        if not isinstance(self.postings, list):
+            state["doc_names"] = list(self.doc_names)
+            state["terms"] = list(self.terms)
+            state["postings"] = list(self.postings)
+            state["doc_terms"] = [array("I", values)
+                                  for values in self.doc_terms]
+            state["doc_lengths"] = array("I", self.doc_lengths)
+            state["doc_stamps"] = array("Q", self.doc_stamps)
+        return state
+
+
+    def __setstate__(self, state):
+        live_docs = state.pop("live_docs")
+        if live_docs is None:
+            live_docs = range(len(state["doc_names"]))
+        self.__dict__.update(state)
+        self.term_ids = HashTable.from_iterable(
+            ((term, term_id) for term_id, term in enumerate(self.terms)),
+            hasher=builtin_hash)
+        self.doc_ids = HashTable.from_iterable(
+            ((self.doc_names[doc_id], doc_id) for doc_id in live_docs),
+            hasher=builtin_hash)
+
+
+    def num_docs(self):
+        """The number of documents in the index
+        Returns:
+            int: The number of documents
+        """
+        return len(self.doc_names) - self.num_removed
+
+
+    def documents(self):
+        """The names of the documents in the index
+        Returns:
+            list: The names, in doc ID order
+        """
+        return [name for doc_id, name in enumerate(self.doc_names)
+                if self.is_live(doc_id)]
+
+
+    def live_doc_ids(self):
+        """The doc IDs of the documents in the index, computed once per
+        version of the index. The array is shared, so it must not be changed
+        Returns:
+            array: The doc IDs, in increasing order
+        """
+        if self.live_cache is None or self.live_cache[0] != self.version:
+            if self.num_removed == 0:
+                live = array("I", range(len(self.doc_names)))
+            else:
+                live = array("I", [doc_id for doc_id
+                                   in range(len(self.doc_names))
+                                   if self.is_live(doc_id)])
+            self.live_cache = (self.version, live)
+        return self.live_cache[1]
+
+
+    def is_live(self, doc_id):
+        """Check that a doc ID belongs to a document still in the index
+        Arguments:
+            doc_id (int): The doc ID
+        Returns:
+            bool: False if the document was removed or indexed again
+        """
+        name = self.doc_names[doc_id]
+        return name in self.doc_ids and self.doc_ids[name] == doc_id
+
+
+    def num_terms(self):
+        """The number of distinct terms in the index
+        Returns:
+            int: The number of terms
+        """
+        return len(self.terms)
+
+
+    def add_document(self, name, words, stamp=None):
+        """Index a document, giving it the next doc ID. A document already in
+        the index under the same name is removed first. The words are read
+        once, so they can come straight from a tokenizer without a list
+        Arguments:
+            name (str): The name of the document, e.g. its path
+            words (iterable): The words of the document, in order
+            stamp (tuple): STAMP_FIELDS ints identifying this version of the
+                           document. Defaults to zeros
+        Returns:
+            int: The doc ID of the document
+        """
+        if name in self.doc_ids:
+            self.remove_document(name)
+        self.own_doc_arrays()
+        doc_id = len(self.doc_names)
+        counts = HashTable(hasher=builtin_hash)
+        num_words = 0
+        if self.positional:
+            # Each word's positions stand in for its count
+            for word in words:
+                if word in counts:
+                    counts[word].append(num_words)
+                else:
+                    counts[word] = array("I", [num_words])
+                num_words += 1
+        else:
+            for word in words:
+                num_words += 1
+                if word in counts:
+                    counts[word] += 1
+                else:
+                    counts[word] = 1
+        self.doc_ids[name] = doc_id
+        self.doc_names.append(name)
+        self.doc_lengths.append(num_words)
+        self.doc_stamps.extend(stamp or (0,) * self.STAMP_FIELDS)
+        term_ids = array("I")
+        for word in counts.keys():
+            term_id = self.add_term(word)
+            if self.positional:
+                positions = counts[word]
+                self.postings[term_id].append(doc_id, len(positions),
+                                              encode_positions(positions))
+            else:
+                self.postings[term_id].append(doc_id, counts[word])
+            term_ids.append(term_id)
+        self.doc_terms.append(term_ids)
+        self.version += 1
+        return doc_id
+
+
+    def extend(self, other):
+        """Add every document of another index after the documents in this
+        one, e.g. an index built from another shard of the files. Doc IDs
+        from other are shifted past the ones in this index, so each posting
+        list is extended with a single copy. Documents already in this index
+        are removed first, as in add_document
+        Arguments:
+            other (InvertedIndex): The index to add, with no removed documents
+        Raises:
+            ValueError: If only one of the indexes keeps positions
+        """
+        if other.positional != self.positional:
+            raise ValueError("cannot mix positional and plain indexes")
+        for name in other.doc_names:
+            if name in self.doc_ids:
+                self.remove_document(name)
+        self.own_doc_arrays()
+        offset = len(self.doc_names)
+        for doc_id, name in enumerate(other.doc_names):
+            self.doc_ids[name] = offset + doc_id
+            self.doc_names.append(name)
+        self.doc_lengths.extend(other.doc_lengths)
+        self.doc_stamps.extend(other.doc_stamps)
+        term_ids = [self.add_term(term) for term in other.terms]
+        for doc_terms in other.doc_terms:
+            self.doc_terms.append(array("I", [term_ids[term_id]
+                                              for term_id in doc_terms]))
+        for term_id, postings in zip(term_ids, other.postings):
+            self.postings[term_id].extend(postings, offset)
+        self.version += 1
+
+
+    def remove_document(self, name):
+        """Remove a document, taking its postings out of the posting list of
+        each of its terms
+        Arguments:
+            name (str): The name of the document
+        Raises:
+            KeyError: If the document is not in the index
+        """
+        doc_id = self.doc_ids[name]
+        for term_id in self.doc_terms[doc_id]:
+            self.postings[term_id].remove(doc_id)
+        self.doc_terms[doc_id] = array("I")
+        self.doc_ids.remove(name)
+        self.num_removed += 1
+        self.version += 1
+        if self.num_removed > self.COMPACT_FRACTION * len(self.doc_names):
+            self.compact()
+
+
+    def renumbering(self):
+        """The doc IDs the documents left get when the doc IDs of removed
+        documents are dropped: 0, 1, 2, ... in their old order
+        Returns:
+            tuple: (live, new_ids), the doc IDs of the documents left in
+                   increasing order, and the new ID of each old doc ID, None
+                   for removed documents. new_ids is None if no document was
+                   removed
+        """
+        live = self.live_doc_ids()
+        if len(live) == len(self.doc_names):
+            return live, None
+        new_ids = [None] * len(self.doc_names)
+        for new_id, doc_id in enumerate(live):
+            new_ids[doc_id] = new_id
+        return live, new_ids
+
+
+    def compact(self):
+        """Renumber the documents left after removals with renumbering, as
+        save_index does when writing a file, and drop the entries of removed
+        doc IDs, so an index whose documents are indexed again and again
+        does not keep growing. The order of the documents is kept, so each
+        posting list stays sorted. Parts of an index file are copied into
+        memory. Doc IDs from before compacting are no longer valid
+        """
+        live, new_ids = self.renumbering()
+        if new_ids is None:
+            return
+        if not isinstance(self.postings, list):
+            self.postings = list(self.postings)
+            self.terms = list(self.terms)
+            self.term_ids = HashTable.from_iterable(
+                ((term, term_id) for term_id, term in enumerate(self.terms)),
+                hasher=builtin_hash)
+        for postings in self.postings:
+            postings.renumber(new_ids)
+        fields = self.STAMP_FIELDS
+        doc_stamps = array("Q")
+        for doc_id in live:
+            doc_stamps.extend(self.doc_stamps[doc_id * fields:
+                                              (doc_id + 1) * fields])
+        self.doc_names = [self.doc_names[doc_id] for doc_id in live]
+        self.doc_lengths = array("I", [self.doc_lengths[doc_id]
+                                       for doc_id in live])
+        self.doc_terms = [array("I", self.doc_terms[doc_id])
+                          for doc_id in live]
+        self.doc_stamps = doc_stamps
+        self.doc_ids = HashTable.from_iterable(
+            ((name, doc_id) for doc_id, name in enumerate(self.doc_names)),
+            hasher=builtin_hash)
+        self.num_removed = 0
+        self.version += 1
+
+
+    def doc_stamp(self, name):
+        """The stamp a document was indexed with
+        Arguments:
+            name (str): The name of the document
+        Returns:
+            tuple: STAMP_FIELDS ints
+        Raises:
+            KeyError: If the document is not in the index
+        """
+        start = self.doc_ids[name] * self.STAMP_FIELDS
+        return tuple(self.doc_stamps[start:start + self.STAMP_FIELDS])
+
+
+    def set_doc_stamp(self, name, stamp):
+        """Change the stamp of a document without indexing it again, e.g.
+        when its modification time changed but its contents did not
+        Arguments:
+            name (str): The name of the document
+            stamp (tuple): STAMP_FIELDS ints
+        Raises:
+            KeyError: If the document is not in the index
+        """
+        self.own_doc_arrays()
+        start = self.doc_ids[name] * self.STAMP_FIELDS
+        self.doc_stamps[start:start + self.STAMP_FIELDS] = array("Q", stamp)
+
+
+    def own_doc_arrays(self):
+        """Copy read only views of an index file into arrays that can be
+        changed
+        """
+        if not isinstance(self.doc_lengths, array):
+            self.doc_lengths = array("I", self.doc_lengths)
+            self.doc_stamps = array("Q", self.doc_stamps)
+
+
+    def doc_length(self, name):
+        """The number of words in a document
+        Arguments:
+            name (str): The name of the document
+        Returns:
+            int: The length of the document
+        Raises:
+            KeyError: If the document is not in the index
+        """
+        return self.doc_lengths[self.doc_ids[name]]
+
+
+    def term_id(self, term):
+        """Look up the ID of a term
+        Arguments:
+            term (str): The term
+        Returns:
+            int: The term ID, or None if the term is not in the index
+        """
+        if term in self.term_ids:
+            return self.term_ids[term]
+        return None
+
+
+    def posting_list(self, term, create=False):
+        """Get the posting list of a term
+        Arguments:
+            term (str): The term
+            create (bool): Add the term with an empty posting list if it is
+                           not in the index
+        Returns:
+            PostingList: The posting list, or None if the term is not in the
+                         index and create is False
+        """
+        term_id = self.term_id(term)
+        if term_id is None:
+            if not create:
+                return None
+            term_id = self.add_term(term)
+        return self.postings[term_id]
+
+
+    def add_term(self, term):
+        """Get the ID of a term, adding it with an empty posting list if it
+        is not in the index
+        Arguments:
+            term (str): The term
+        Returns:
+            int: The term ID
+        """
+        term_id = self.term_id(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.term_ids[term] = term_id
+            self.terms.append(term)
+            self.postings.append(
+                PostingList(positions=bytearray() if self.positional
+                            else None))
+        return term_id
+
+
+    def doc_freq(self, term):
+        """The number of documents a term occurs in
+        Arguments:
+            term (str): The term
+        Returns:
+            int: The document frequency of term
+        """
+        postings = self.posting_list(term)
+        return 0 if postings is None else len(postings)
+
+
+class DocLengths:
+    """Read only mapping from document name to the number of words in the
+    document, looked up in an index
+    Attributes:
+        index (InvertedIndex): The index holding the documents
+    """
+    def __init__(self, index):
+        self.index = index
+
+
+    def __getitem__(self, name):
+        return self.index.doc_length(name)
+
+
+    def __contains__(self, name):
+        return name in self.index.doc_ids
+
+
+    def keys(self):
+        """The names of every document
+        Returns:
+            list: The document names, in doc ID order
+        """
+        return self.index.documents()
+
+
+def merge(posting_lists):
+    """Walk several posting lists together in doc ID order, visiting each
+    document that occurs in any of them once. Each list is read once from
+    front to back, so the cost is the total length of the lists
+    Arguments:
+        posting_lists (list): The PostingLists to merge
+    Yields:
+        tuple: (doc_id, freqs), where freqs holds the frequency from each
+               posting list in order, 0 for the lists without doc_id
+    """
+    cursors = [0] * len(posting_lists)
+    lengths = [len(postings) for postings in posting_lists]
+    while True:
+        doc_id = None
+        for postings, pos, length in zip(posting_lists, cursors, lengths):
+            if pos < length and (doc_id is None
+                                 or postings.doc_ids[pos] < doc_id):
+                doc_id = postings.doc_ids[pos]
+        if doc_id is None:
+            return
+        freqs = []
+        for i, postings in enumerate(posting_lists):
+            pos = cursors[i]
+            if pos < lengths[i] and postings.doc_ids[pos] == doc_id:
+                freqs.append(postings.freqs[pos])
+                cursors[i] = pos + 1
+            else:
+                freqs.append(0)
+        yield doc_id, freqs
+
+
+def intersect(posting_lists):
+    """Walk several posting lists together, visiting only the documents
+    that occur in all of them, with intersect_ids
+    Arguments:
+        posting_lists (list): The PostingLists to intersect
+    Yields:
+        tuple: (doc_id, positions), where positions holds the position of
+               doc_id's posting in each list, in order
+    """
+    return intersect_ids([postings.doc_ids for postings in posting_lists])
+
+
+def intersect_ids(id_lists):
+    """Walk several lists of doc IDs together, visiting only the doc IDs in
+    all of them. The shortest list leads, and the others gallop ahead to
+    each candidate with next_geq instead of stepping through every doc ID
+    Arguments:
+        id_lists (list): Sequences of doc IDs, each in increasing order
+    Yields:
+        tuple: (doc_id, positions), where positions holds the position of
+               doc_id in each list, in order
+    """
+    if not id_lists or min(len(doc_ids) for doc_ids in id_lists) == 0:
+        return
+    order = sorted(range(len(id_lists)), key=lambda i: len(id_lists[i]))
+    cursors = [0] * len(id_lists)
+    doc_id = id_lists[order[0]][0]
+    while True:
+        matched = True
+        for i in order:
+            doc_ids = id_lists[i]
+            pos = next_geq(doc_ids, cursors[i], doc_id)
+            if pos == len(doc_ids):
+                return
+            cursors[i] = pos
+            if doc_ids[pos] != doc_id:
+                doc_id = doc_ids[pos]
+                matched = False
+                break
+        if matched:
+            yield doc_id, list(cursors)
+            doc_id += 1
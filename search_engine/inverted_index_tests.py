@@ -0,0 +1,210 @@
+"""Tests for the inverted index
+Author: Ben Paulson
+"""
+
+import pickle
+import unittest
+from array import array
+from inverted_index import (InvertedIndex, PostingList, merge, intersect,
+                            encode_positions, decode_positions)
+
+
+class InvertedIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add_document("a", ["hash", "table", "hash"])
+        self.index.add_document("b", ["table", "list"])
+        self.index.add_document("c", ["hash"])
+
+
+    def test_add_document(self):
+        self.assertEqual(self.index.num_docs(), 3)
+        self.assertEqual(self.index.num_terms(), 3)
+        self.assertEqual(self.index.doc_ids["b"], 1)
+        self.assertEqual(self.index.doc_names, ["a", "b", "c"])
+        self.assertEqual(list(self.index.doc_lengths), [3, 2, 1])
+        self.assertEqual(self.index.terms[self.index.term_id("list")], "list")
+        self.assertIsNone(self.index.term_id("tree"))
+
+
+    def test_posting_list(self):
+        self.assertEqual(list(self.index.posting_list("hash")),
+                         [(0, 2), (2, 1)])
+        self.assertEqual(list(self.index.posting_list("table")),
+                         [(0, 1), (1, 1)])
+        self.assertIsNone(self.index.posting_list("tree"))
+        self.assertEqual(self.index.posting_list("tree", create=True),
+                         PostingList())
+        self.assertEqual(self.index.doc_freq("hash"), 2)
+        self.assertEqual(self.index.doc_freq("tree"), 0)
+        self.assertEqual(self.index.doc_freq("unix"), 0)
+
+
+    def test_next_geq(self):
+        postings = self.index.posting_list("hash")
+        self.assertEqual(postings.next_geq(0, 0), 0)
+        self.assertEqual(postings.next_geq(0, 1), 1)
+        self.assertEqual(postings.next_geq(1, 0), 1)
+        self.assertEqual(postings.next_geq(0, 3), 2)
+
+
+    def test_encode(self):
+        doc_ids = [3, 7, 300, 70000] + list(range(70001, 70300))
+        freqs = [1, 65536, 2, 300] + [1] * 299
+        postings = PostingList(array("I", doc_ids), array("I", freqs))
+        data = postings.encode()
+        self.assertLess(len(data), len(doc_ids) * 5)
+        self.assertEqual(PostingList.decode(data), postings)
+        self.assertEqual(PostingList.decode(memoryview(data)), postings)
+        self.assertEqual(PostingList().encode(), b"")
+        self.assertEqual(PostingList.decode(b""), PostingList())
+
+
+    def test_positions(self):
+        for positions in ([0], [3, 4, 300], [5, 70000, 70001]):
+            data = encode_positions(array("I", positions))
+            self.assertEqual(decode_positions(data), positions)
+        index = InvertedIndex(positional=True)
+        index.add_document("a", ["hash", "table", "hash"])
+        index.add_document("b", ["table", "hash"])
+        postings = index.posting_list("hash")
+        self.assertEqual(list(postings), [(0, 2), (1, 1)])
+        self.assertEqual([postings.positions_at(pos)
+                          for pos in range(len(postings))], [[0, 2], [1]])
+        other = InvertedIndex(positional=True)
+        other.add_document("c", ["tree", "hash"])
+        other.add_document("d", ["hash"] * 300)
+        index.extend(other)
+        self.assertIsInstance(postings.positions, bytearray)
+        self.assertEqual(postings.position_offsets[-1],
+                         len(postings.positions))
+        index.remove_document("b")
+        self.assertEqual([postings.positions_at(pos)
+                          for pos in range(len(postings))],
+                         [[0, 2], [1], list(range(300))])
+        index.remove_document("a")
+        self.assertEqual([postings.positions_at(pos)
+                          for pos in range(len(postings))],
+                         [[1], list(range(300))])
+        self.assertEqual(len(postings.position_offsets), 3)
+        with self.assertRaises(ValueError):
+            index.extend(InvertedIndex())
+
+
+    def test_intersect(self):
+        self.index.add_document("d", ["hash", "table", "list"])
+        lists = [self.index.posting_list("hash"),
+                 self.index.posting_list("table")]
+        self.assertEqual(list(intersect(lists)), [(0, [0, 0]), (3, [2, 2])])
+        lists.append(self.index.posting_list("list"))
+        self.assertEqual(list(intersect(lists)), [(3, [2, 2, 1])])
+        self.assertEqual(list(intersect([lists[0]])),
+                         [(0, [0]), (2, [1]), (3, [2])])
+        self.assertEqual(list(intersect([lists[0], PostingList()])), [])
+        self.assertEqual(list(intersect([])), [])
+
+
+    def test_version(self):
+        version = self.index.version
+        self.index.add_document("d", ["tree"])
+        self.assertGreater(self.index.version, version)
+        version = self.index.version
+        self.index.remove_document("d")
+        self.assertGreater(self.index.version, version)
+
+
+    def test_remove_document(self):
+        self.index.COMPACT_FRACTION = 1
+        self.index.remove_document("a")
+        self.assertEqual(self.index.num_docs(), 2)
+        self.assertEqual(self.index.documents(), ["b", "c"])
+        self.assertEqual(list(self.index.posting_list("hash")), [(2, 1)])
+        self.assertEqual(list(self.index.posting_list("table")), [(1, 1)])
+        self.assertFalse(self.index.is_live(0))
+        with self.assertRaises(KeyError):
+            self.index.remove_document("a")
+        with self.assertRaises(KeyError):
+            self.index.doc_length("a")
+        self.index.add_document("c", ["table", "table"], (1, 2, 3))
+        self.assertEqual(self.index.doc_ids["c"], 3)
+        self.assertEqual(self.index.num_docs(), 2)
+        self.assertEqual(self.index.doc_freq("hash"), 0)
+        self.assertEqual(list(self.index.posting_list("table")),
+                         [(1, 1), (3, 2)])
+        self.assertEqual(self.index.doc_stamp("c"), (1, 2, 3))
+        self.assertEqual(self.index.doc_stamp("b"), (0, 0, 0))
+        self.index.set_doc_stamp("b", (4, 5, 6))
+        self.assertEqual(self.index.doc_stamp("b"), (4, 5, 6))
+
+
+    def test_compact(self):
+        for i in range(1000):
+            self.index.add_document("b", ["table", "tree"], (i, 0, 0))
+        self.assertEqual(self.index.num_docs(), 3)
+        self.assertLessEqual(len(self.index.doc_names), 6)
+        self.assertEqual(len(self.index.doc_lengths),
+                         len(self.index.doc_names))
+        self.assertEqual(len(self.index.doc_terms), len(self.index.doc_names))
+        self.assertEqual(len(self.index.doc_stamps),
+                         len(self.index.doc_names) * 3)
+        self.assertEqual(self.index.doc_stamp("b"), (999, 0, 0))
+        self.index.remove_document("c")
+        version = self.index.version
+        self.index.compact()
+        self.assertGreater(self.index.version, version)
+        self.assertEqual(list(self.index.doc_names), ["a", "b"])
+        self.assertEqual(self.index.num_removed, 0)
+        self.assertEqual(list(self.index.posting_list("hash")), [(0, 2)])
+        self.assertEqual(list(self.index.posting_list("table")),
+                         [(0, 1), (1, 1)])
+        self.assertEqual(list(self.index.posting_list("tree")), [(1, 1)])
+        self.assertEqual(self.index.doc_length("b"), 2)
+        self.index.remove_document("b")
+        self.assertEqual(self.index.documents(), ["a"])
+        self.assertEqual(self.index.doc_freq("tree"), 0)
+
+
+    def test_extend(self):
+        other = InvertedIndex()
+        other.add_document("d", ["tree", "hash"], (1, 2, 3))
+        other.add_document("c", ["list", "list"])
+        self.index.extend(other)
+        self.assertEqual(self.index.documents(), ["a", "b", "d", "c"])
+        self.assertEqual(self.index.num_docs(), 4)
+        self.assertEqual(list(self.index.posting_list("hash")),
+                         [(0, 2), (3, 1)])
+        self.assertEqual(list(self.index.posting_list("list")),
+                         [(1, 1), (4, 2)])
+        self.assertEqual(list(self.index.posting_list("tree")), [(3, 1)])
+        self.assertEqual(self.index.doc_stamp("d"), (1, 2, 3))
+        self.index.remove_document("d")
+        self.assertEqual(list(self.index.posting_list("tree")), [])
+        self.assertEqual(list(self.index.posting_list("hash")), [(0, 2)])
+
+
+    def test_pickle(self):
+        self.index.remove_document("b")
+        copy = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(copy.documents(), ["a", "c"])
+        self.assertEqual(copy.num_docs(), 2)
+        self.assertEqual(copy.term_id("list"), self.index.term_id("list"))
+        self.assertEqual(copy.posting_list("hash"),
+                         self.index.posting_list("hash"))
+        copy.add_document("b", ["list"])
+        self.assertEqual(list(copy.posting_list("list")), [(3, 1)])
+
+
+    def test_merge(self):
+        lists = [self.index.posting_list("hash"),
+                 self.index.posting_list("table")]
+        self.assertEqual(list(merge(lists)),
+                         [(0, [2, 1]), (1, [0, 1]), (2, [1, 0])])
+        self.assertEqual(list(merge([self.index.posting_list("list")])),
+                         [(1, [1])])
+        self.assertEqual(list(merge([])), [])
+        self.assertEqual(list(merge([PostingList()])), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
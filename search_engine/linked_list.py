@@ -11,12 +11,14 @@ def add_helper(item, val, next_node, prev_node):
         val (int): the value associated with the key item
         next_node (Node): the next node to check; insert item before this
         prev_node (Node): Node after which to insert the new item
+    Returns:
+        Node: the new node
     """
     if item < next_node.key:
         new_node = Node(item, val, next_node, prev_node)
         next_node.prev = new_node
         prev_node.next_elem = new_node
-        return None
+        return new_node
     return add_helper(item, val, next_node.next_elem, next_node)
 
 
@@ -127,7 +129,7 @@ class OrderedList:
             item (int): the item to add
             val (int): The value associated with key item
         Returns:
-            None
+            Node: the new node holding item
         """
         if self.is_empty():
             new_node = Node(item, val, None, None)
@@ -153,8 +155,10 @@ class OrderedList:
                 self.tail = new_node
             else:
                 # Only need helper if new item is in the middle of the list
-                add_helper(item, val, self.head.next_elem, self.head)
+                new_node = add_helper(item, val, self.head.next_elem,
+                                      self.head)
         self.num_items += 1
+        return new_node
 
 
     def remove(self, item):
@@ -200,6 +204,141 @@ class OrderedList:
         return search_helper(item, self.head, 0, 1)
 
 
+    def find(self, item):
+        """Find the node that holds the given item. The list is ordered, so
+        the search stops as soon as it passes the place item would be
+        Time Complexity: O(n)
+        Arguments:
+            item (int): the item to search for
+        Returns:
+            Node: the node holding item, or None if item is not in the list
+        """
+        node = self.head
+        while node is not None and node.key < item:
+            node = node.next_elem
+        if node is not None and node.key == item:
+            return node
+        return None
+
+
+    def get(self, item, default=None):
+        """Get the value stored with item, for use as a hash table bucket
+        Time Complexity: O(n)
+        Arguments:
+            item (int): the item to search for
+            default (any): returned if item is not in the list
+        Returns:
+            any: the value associated with item, or default
+        """
+        node = self.find(item)
+        if node is None:
+            return default
+        return node.val
+
+
+    def put(self, item, val, hash_value=None):
+        """Store val with item, replacing the value in place if item is
+        already in the list, for use as a hash table bucket
+        Time Complexity: O(n)
+        Arguments:
+            item (int): the item to store
+            val (any): the value associated with item
+            hash_value (int): the hash of item to keep in a new node
+        Returns:
+            bool: True if item was added, False if its value was replaced
+        """
+        node = self.find(item)
+        if node is not None:
+            node.val = val
+            return False
+        self.add_pair(item, val, hash_value)
+        return True
+
+
+    def add_pair(self, item, val, hash_value=None):
+        """Add an item known not to be in the list, keeping its hash. Its
+        place is found by walking from the head in a loop, so long chains
+        never grow the call stack
+        Time Complexity: O(n)
+        Arguments:
+            item (int): the item to add
+            val (any): the value associated with item
+            hash_value (int): the hash of item to keep in the new node
+        """
+        node = self.head
+        while node is not None and node.key < item:
+            node = node.next_elem
+        self.link(Node(item, val, hash_value=hash_value), node)
+
+
+    def delete(self, item):
+        """Remove item from the list, for use as a hash table bucket. The
+        node found by find is unlinked directly, without searching again
+        Time Complexity: O(n)
+        Arguments:
+            item (int): the item to remove
+        Returns:
+            Node: the removed node, or None if item is not in the list
+        """
+        node = self.find(item)
+        if node is not None:
+            self.unlink(node)
+        return node
+
+
+    def link(self, new_node, next_node):
+        """Insert a node just before another, joining it to its neighbours
+        Time Complexity: O(1)
+        Arguments:
+            new_node (Node): the node to insert
+            next_node (Node): the node to insert before, or None to insert
+                              at the tail
+        """
+        prev_node = self.tail if next_node is None else next_node.prev
+        new_node.next_elem = next_node
+        new_node.prev = prev_node
+        if prev_node is None:
+            self.head = new_node
+        else:
+            prev_node.next_elem = new_node
+        if next_node is None:
+            self.tail = new_node
+        else:
+            next_node.prev = new_node
+        self.num_items += 1
+
+
+    def unlink(self, node):
+        """Take a node out of the list, joining its neighbours to each other.
+        The node is left with no neighbours of its own
+        Time Complexity: O(1)
+        Arguments:
+            node (Node): a node in the list
+        """
+        if node.prev is None:
+            self.head = node.next_elem
+        else:
+            node.prev.next_elem = node.next_elem
+        if node.next_elem is None:
+            self.tail = node.prev
+        else:
+            node.next_elem.prev = node.prev
+        node.next_elem = None
+        node.prev = None
+        self.num_items -= 1
+
+
+    def pairs(self):
+        """Iterate over the list from head to tail
+        Returns:
+            iterator: (item, val, hash_value) for each node
+        """
+        node = self.head
+        while node is not None:
+            yield node.key, node.val, node.hash_value
+            node = node.next_elem
+
+
     def search_backward(self, item):
         """Search the list for the given item
         Time Complexity: O(n)
@@ -289,12 +428,15 @@ class Node:
         val (any): the value associated with the key
         next_elem (Node): the next item in the list
         prev (Node): the previous item in the list
+        hash_value (int): the full hash of key, kept by hash tables that
+                          cache hashes. None otherwise
     """
-    def __init__(self, key, val, next_elem=None, prev=None):
+    def __init__(self, key, val, next_elem=None, prev=None, hash_value=None):
         self.key = key
         self.val = val
         self.next_elem = next_elem
         self.prev = prev
+        self.hash_value = hash_value
 
 
     def __eq__(self, other):
@@ -0,0 +1,134 @@
+"""Least recently used cache for search results.
+Author: Ben Paulson
+"""
+
+from hashtables import HashTableLinear, builtin_hash
+from linked_list import Node
+
+
+class QueryCache:
+    """A size bounded cache that evicts the least recently used entry. A
+    hash table maps each key to its Node in a doubly linked list kept in
+    order of use, most recent first, so lookups, inserts and evictions are
+    all O(1). The cache belongs to one version of one index: check() empties
+    it whenever it is asked about a different one
+    Attributes:
+        capacity (int): The most entries kept. 0 disables the cache
+        nodes (HashTableLinear): The Node holding each key
+        head (Node): Sentinel before the most recently used entry
+        tail (Node): Sentinel after the least recently used entry
+        stamp (tuple): The index and index version the entries are for
+        hits (int): The number of lookups that found their key
+        misses (int): The number of lookups that did not
+    """
+    def __init__(self, capacity=1024):
+        if capacity < 0:
+            raise ValueError("capacity must not be negative")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.stamp = None
+        self.clear()
+
+
+    def __len__(self):
+        return self.nodes.size()
+
+
+    def __contains__(self, key):
+        return key in self.nodes
+
+
+    def clear(self):
+        """Remove every entry. The hit and miss counts are kept
+        """
+        self.nodes = HashTableLinear(hasher=builtin_hash)
+        self.head = Node(None, None)
+        self.tail = Node(None, None)
+        self.head.next_elem = self.tail
+        self.tail.prev = self.head
+
+
+    def check(self, index):
+        """Empty the cache if its entries were computed from a different
+        index, or before the index last changed
+        Arguments:
+            index (InvertedIndex): The index about to be searched
+        """
+        if self.stamp is None or self.stamp[0] is not index \
+                or self.stamp[1] != index.version:
+            if len(self) > 0:
+                self.clear()
+            self.stamp = (index, index.version)
+
+
+    def unlink(self, node):
+        """Take a node out of the recency list
+        Arguments:
+            node (Node): The node to unlink
+        """
+        node.prev.next_elem = node.next_elem
+        node.next_elem.prev = node.prev
+
+
+    def push_front(self, node):
+        """Put a node at the most recently used end of the recency list
+        Arguments:
+            node (Node): The node to link
+        """
+        node.prev = self.head
+        node.next_elem = self.head.next_elem
+        self.head.next_elem.prev = node
+        self.head.next_elem = node
+
+
+    def get(self, key, default=None):
+        """Look up a key, marking it as the most recently used
+        Arguments:
+            key (any): The key, which must be hashable
+            default (any): Returned if key is not cached
+        Returns:
+            any: The value cached for key, or default
+        """
+        if key not in self.nodes:
+            self.misses += 1
+            return default
+        self.hits += 1
+        node = self.nodes[key]
+        self.unlink(node)
+        self.push_front(node)
+        return node.val
+
+
+    def put(self, key, val):
+        """Cache a value as the most recently used, evicting the least
+        recently used entry if the cache is full
+        Arguments:
+            key (any): The key, which must be hashable
+            val (any): The value to cache
+        """
+        if self.capacity == 0:
+            return
+        if key in self.nodes:
+            node = self.nodes[key]
+            node.val = val
+            self.unlink(node)
+        else:
+            if len(self) >= self.capacity:
+                oldest = self.tail.prev
+                self.unlink(oldest)
+                self.nodes.remove(oldest.key)
+            node = Node(key, val)
+            self.nodes[key] = node
+        self.push_front(node)
+
+
+    def stats(self):
+        """The cache's counters
+        Returns:
+            dict: size, capacity, hits, misses and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {"size": len(self), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,57 @@
+"""Tests for the query result cache
+Author: Ben Paulson
+"""
+
+import unittest
+from query_cache import QueryCache
+from inverted_index import InvertedIndex
+
+
+class QueryCacheTests(unittest.TestCase):
+
+    def test_lru(self):
+        cache = QueryCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", 0), 0)
+        cache.put("a", 4)
+        cache.put("d", 5)
+        self.assertEqual(cache.get("a"), 4)
+        self.assertNotIn("c", cache)
+        self.assertEqual(cache.stats(), {"size": 2, "capacity": 2, "hits": 2,
+                                         "misses": 2, "hit_rate": 0.5})
+
+
+    def test_disabled(self):
+        cache = QueryCache(0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get("a"))
+        with self.assertRaises(ValueError):
+            QueryCache(-1)
+
+
+    def test_check(self):
+        cache = QueryCache()
+        index = InvertedIndex()
+        cache.check(index)
+        cache.put("a", 1)
+        cache.check(index)
+        self.assertIn("a", cache)
+        index.add_document("doc", ["hash"])
+        cache.check(index)
+        self.assertNotIn("a", cache)
+        cache.put("a", 1)
+        cache.check(InvertedIndex())
+        self.assertEqual(len(cache), 0)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("b"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+"""Scoring functions for the search engine. A document's score for a query
+is finish(total, doc_id), where total sums posting(weight, freq, doc_id)
+over the query terms in the document, in query term order, and weight is
+the term's term_weight. Everything that depends only on the documents, such
+as length norms, is computed by prepare once for each version of the index,
+and the engine computes each term's weight once, so scoring a posting is a
+few multiplies and adds. finish may only scale a total by a positive amount
+for the document, so a term can add at most finish(posting(...)) to any
+score, which is what WAND bounds are built from. Scorers with vectorized
+set also score whole posting lists at once with numpy, for the engine's
+numpy backend.
+Author: Ben Paulson
+"""
+
+import math
+from array import array
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def weighted_frequency(termf):
+    """Computes the weighted frequency 1 + log(termf)
+    Arguments:
+        termf (int): term frequency
+    Returns:
+        float: The weighted frequency, or 0 if termf is 0
+    """
+    if termf > 0:
+        return 1 + math.log(termf)
+    return 0
+
+
+def weighted_frequencies(freqs):
+    """Computes weighted_frequency for a whole numpy array of term
+    frequencies, all of them at least 1
+    Arguments:
+        freqs (ndarray): term frequencies
+    Returns:
+        ndarray: The weighted frequency of each
+    """
+    return 1 + np.log(freqs)
+
+
+class Scorer:
+    """Base class of scorers. The attributes named in prepared are set by
+    prepare and may be views of an index file, so they are not pickled;
+    a scorer sent to another process is prepared again there. A scorer
+    with vectorized set implements posting_vector and finish_vector
+    """
+    prepared = ()
+    vectorized = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self.prepared:
+            state.pop(name, None)
+        return state
+
+
+    def prepare(self, index):
+        """Compute whatever the scorer needs from the documents of an index
+        Arguments:
+            index (InvertedIndex): The index that will be searched
+        """
+
+
+    def term_weight(self, num_docs, doc_freq):
+        """The weight of a term
+        Arguments:
+            num_docs (int): The number of documents in the index
+            doc_freq (int): The number of documents the term occurs in
+        Returns:
+            float: The weight
+        """
+        raise NotImplementedError
+
+
+    def posting(self, weight, freq, doc_id):
+        """What a term adds to a document's total
+        Arguments:
+            weight (float): The term's weight
+            freq (int): The frequency of the term in the document, at least 1
+            doc_id (int): The doc ID
+        Returns:
+            float: The term's part of the total
+        """
+        raise NotImplementedError
+
+
+    def finish(self, total, doc_id):
+        """Turn a document's total into its score
+        Arguments:
+            total (float): The sum of posting over the query terms
+            doc_id (int): The doc ID
+        Returns:
+            float: The score
+        """
+        return total
+
+
+    def posting_vector(self, weight, freqs, doc_ids):
+        """posting for every posting of a term at once
+        Arguments:
+            weight (float): The term's weight
+            freqs (ndarray): The term's frequency in each document
+            doc_ids (ndarray): The doc IDs, in the same order
+        Returns:
+            ndarray: The term's part of each document's total
+        """
+        raise NotImplementedError
+
+
+    def finish_vector(self, totals, doc_ids):
+        """finish for many documents at once
+        Arguments:
+            totals (ndarray): The total of each document
+            doc_ids (ndarray): The doc IDs, in the same order
+        Returns:
+            ndarray: The scores
+        """
+        return totals
+
+
+class WfScorer(Scorer):
+    """The engine's original scoring: the weighted frequency of each term
+    summed, then divided by the document's length. Every term weighs the
+    same
+    Attributes:
+        doc_lengths (array): The length of each document, by doc ID
+    """
+    prepared = ("doc_lengths",)
+    vectorized = True
+
+    def prepare(self, index):
+        self.doc_lengths = index.doc_lengths
+
+
+    def term_weight(self, num_docs, doc_freq):
+        return 1
+
+
+    def posting(self, weight, freq, doc_id):
+        return weighted_frequency(freq)
+
+
+    def finish(self, total, doc_id):
+        return total / self.doc_lengths[doc_id]
+
+
+    def posting_vector(self, weight, freqs, doc_ids):
+        return weighted_frequencies(freqs)
+
+
+    def finish_vector(self, totals, doc_ids):
+        # A view, not kept, since the index cannot grow doc_lengths while a
+        # view of it exists
+        return totals / np.frombuffer(self.doc_lengths, np.uint32)[doc_ids]
+
+
+class TfIdfScorer(WfScorer):
+    """tf-idf: each term's weighted frequency is multiplied by its inverse
+    document frequency log(N / df), so rare terms count for more than
+    common ones, and the sum divided by the document's length
+    """
+    def term_weight(self, num_docs, doc_freq):
+        if doc_freq == 0:
+            return 0
+        return math.log(num_docs / doc_freq)
+
+
+    def posting(self, weight, freq, doc_id):
+        return weight * weighted_frequency(freq)
+
+
+    def posting_vector(self, weight, freqs, doc_ids):
+        return weight * weighted_frequencies(freqs)
+
+
+class BM25Scorer(Scorer):
+    """Okapi BM25. A term adds idf * tf * (k1 + 1) / (tf + norm), where idf
+    is log(1 + (N - df + 0.5) / (df + 0.5)) and norm is
+    k1 * (1 - b + b * length / average length), precomputed for each
+    document. Repeats of a term saturate, and long documents are penalised
+    by b rather than divided through
+    Attributes:
+        k1 (float): How quickly repeats of a term saturate
+        b (float): How much document length counts, from 0 to 1
+        norms (array): The norm of each document, by doc ID
+    """
+    prepared = ("norms",)
+    vectorized = True
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+
+    def prepare(self, index):
+        live = [index.doc_lengths[doc_id]
+                for doc_id in range(len(index.doc_names))
+                if index.is_live(doc_id)]
+        average = sum(live) / len(live) if live else 1
+        k1 = self.k1
+        b = self.b
+        self.norms = array("d", [k1 * (1 - b + b * length / average)
+                                 for length in index.doc_lengths])
+
+
+    def term_weight(self, num_docs, doc_freq):
+        return math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+    def posting(self, weight, freq, doc_id):
+        return weight * freq * (self.k1 + 1) / (freq + self.norms[doc_id])
+
+
+    def posting_vector(self, weight, freqs, doc_ids):
+        norms = np.frombuffer(self.norms)[doc_ids]
+        return weight * freqs * (self.k1 + 1) / (freqs + norms)
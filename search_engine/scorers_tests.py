@@ -0,0 +1,64 @@
+"""Tests for the scorers
+Author: Ben Paulson
+"""
+
+import math
+import pickle
+import unittest
+from inverted_index import InvertedIndex
+from scorers import weighted_frequency, WfScorer, TfIdfScorer, BM25Scorer
+
+
+class ScorerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add_document("a", ["hash", "table", "hash", "list"])
+        self.index.add_document("b", ["table", "list"])
+        self.index.add_document("c", ["hash"])
+
+
+    def test_weighted_frequency(self):
+        self.assertEqual(weighted_frequency(0), 0)
+        self.assertEqual(weighted_frequency(1), 1)
+        self.assertAlmostEqual(weighted_frequency(3), 1 + math.log(3))
+
+
+    def test_wf(self):
+        scorer = WfScorer()
+        scorer.prepare(self.index)
+        self.assertEqual(scorer.term_weight(3, 2), 1)
+        total = scorer.posting(1, 2, 0) + scorer.posting(1, 1, 0)
+        self.assertEqual(scorer.finish(total, 0), (2 + math.log(2)) / 4)
+
+
+    def test_tf_idf(self):
+        scorer = TfIdfScorer()
+        scorer.prepare(self.index)
+        weight = scorer.term_weight(3, 2)
+        self.assertAlmostEqual(weight, math.log(3 / 2))
+        self.assertEqual(scorer.term_weight(3, 3), 0)
+        self.assertEqual(scorer.term_weight(3, 0), 0)
+        self.assertAlmostEqual(scorer.finish(scorer.posting(weight, 2, 0), 0),
+                               weight * (1 + math.log(2)) / 4)
+
+
+    def test_bm25(self):
+        scorer = BM25Scorer(k1=1.5, b=0.5)
+        scorer.prepare(self.index)
+        weight = scorer.term_weight(3, 2)
+        self.assertAlmostEqual(weight, math.log(1 + 1.5 / 2.5))
+        norm = 1.5 * (1 - 0.5 + 0.5 * 4 / (7 / 3))
+        self.assertAlmostEqual(scorer.posting(weight, 2, 0),
+                               weight * 2 * 2.5 / (2 + norm))
+        self.assertEqual(scorer.finish(1.25, 0), 1.25)
+        self.index.remove_document("a")
+        scorer.prepare(self.index)
+        self.assertAlmostEqual(scorer.norms[1], 1.5 * (1 - 0.5 + 0.5 * 2 / 1.5))
+        copy = pickle.loads(pickle.dumps(scorer))
+        self.assertEqual((copy.k1, copy.b), (1.5, 0.5))
+        self.assertFalse(hasattr(copy, "norms"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,38 @@ Author: Ben Paulson
 """
 
 import os
-import math
-from hashtables import HashTableSepchain as HashTable, import_stopwords
+import hashlib
+import multiprocessing
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from hashtables import (HashTableSepchain as HashTable, HashTableLinear,
+                        import_stopwords, builtin_hash)
+from inverted_index import InvertedIndex, DocLengths, merge, intersect
+from index_file import save_index, load_index
+from min_pq import MinPQ
+from query_cache import QueryCache
+from scorers import WfScorer, weighted_frequency
+import boolean_query
+
+
+# Deletes the characters parse_words removes, in a single str.translate pass
+REMOVE_CHARS = str.maketrans("", "", "()[]{},.?!\n")
+# The same for tokenize, except that newlines become spaces, since a line
+# break always ends a word
+TOKEN_CHARS = str.maketrans("\n", " ", "()[]{},.?!")
+
+# Relative amount added to each term's score bound, so that rounding in the
+# order a score is summed in can never take it past the sum of the bounds
+BOUND_SLACK = 1e-9
+
+# How files are scored: "python" loops over postings one at a time, and
+# "numpy" scores whole posting lists at once with numpy, if it is installed
+BACKENDS = ("python", "numpy")
+
+# The SearchEngine used by index_shard and search_batch in each worker process
+worker_engine = None
 
 
 class SearchEngine:
@@ -12,19 +42,80 @@ class SearchEngine:
     Attributes:
         directory (str): a directory name
         stopwords (HashTable): a hash table containing stopwords
-        doc_length (HashTable): a hash table containing the total
-                                number of words in each document
-        term_freqs (HashTable): a hash table of hash tables for each term. Each
-                                hash table contains the frequency of the term in
-                                documents (document names are the keys and the
-                                frequencies are the values)
+        doc_length (DocLengths): the total number of words in each
+                                 document, by document name
+        index (InvertedIndex): the posting list of each term, giving the
+                               documents it occurs in and its frequency in each.
+                               Built with positional=True, it also keeps the
+                               position of each word, for search_phrase and
+                               search_near
+        chunk_size (int): the number of characters tokenize reads at a time
+        scorer (Scorer): scores files from their term frequencies, see
+                         scorers
+        term_weights (HashTable): the scorer's weight for each term, cached
+                                  until the index changes
+        term_bounds (HashTable): the most each term can add to a file's
+                                 score, cached for top_k until the index
+                                 changes
+        scoring_key (tuple): the index, index version and scorer the scorer
+                             was prepared for and the term weights and
+                             bounds are for
+        cache (QueryCache): results of recent searches, by distinct query
+                            terms and k, emptied when the index changes
+        backend (str): "python", or "numpy" to score queries with numpy when
+                       the scorer is vectorized, see score_vector
     """
-    def __init__(self, directory, stopwords):
+    chunk_size = 1 << 16
+
+    def __init__(self, directory, stopwords, index=None, workers=1,
+                 cache_size=1024, positional=False, scorer=None,
+                 backend="python"):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        if backend == "numpy" and np is None:
+            raise ImportError("the numpy backend needs numpy installed")
         self.directory = directory
         self.stopwords = stopwords
-        self.doc_length = HashTable()
-        self.term_freqs = HashTable()
-        self.index_files(directory)
+        if index is None:
+            self.index = InvertedIndex(positional)
+            self.index_files(directory, workers)
+        else:
+            self.index = index
+        self.doc_length = DocLengths(self.index)
+        self.scorer = WfScorer() if scorer is None else scorer
+        self.term_weights = None
+        self.term_bounds = None
+        self.scoring_key = None
+        self.cache = QueryCache(cache_size)
+        self.backend = backend
+
+
+    @classmethod
+    def load(cls, directory, stopwords, path, cache_size=1024, scorer=None,
+             backend="python"):
+        """Create a search engine from an index file written by save, without
+        reading any documents. The file is memory-mapped, so only the parts
+        of the index that queries use are read from disk
+        Args:
+            directory (str): the directory the index was built from
+            stopwords (HashTable): a hash table containing stopwords
+            path (str): the index file
+            cache_size (int): the number of search results to cache
+            scorer (Scorer): scores files. Defaults to WfScorer
+            backend (str): "python" or "numpy", see BACKENDS
+        Returns:
+            SearchEngine: the search engine
+        """
+        return cls(directory, stopwords, load_index(path),
+                   cache_size=cache_size, scorer=scorer, backend=backend)
+
+
+    def save(self, path):
+        """Write the index to a file, to be loaded later with load
+        Args:
+            path (str): the index file to write
+        """
+        save_index(self.index, path)
 
 
     def read_file(self, infile):
@@ -49,51 +140,202 @@ class SearchEngine:
             list: a list of words
         """
         words = []
-        chars_to_remove = ["(", ")", "[", "]", "{", "}",
-                           ",", ".", "?", "!", "\n"]
+        stopwords = self.stopwords
         for line in lines:
-            for char in chars_to_remove:
-                line = line.replace(char, "")
-            line = line.split(' ')
-            for word in line:
-                if word.lower() not in self.stopwords and len(word) > 0:
-                    words.append(word.lower())
+            for word in line.translate(REMOVE_CHARS).lower().split(' '):
+                if len(word) > 0 and word not in stopwords:
+                    words.append(word)
         return words
 
 
-    def count_words(self, file_path_name, words):
-        """count words in a file and store the frequency of each
-        word in the term_freqs hash table. Keys of term_freqs are words, values
-        are HashTables. Keys of inner hashtables are file names, values are
-        frequencies of words.
+    def tokenize(self, infile, digest=None):
+        """reads a file chunk_size characters at a time and yields the same
+        words parse_words gives for its lines, one at a time. Only one chunk
+        is held in memory, so files of any size can be indexed.
+        Args:
+            infile (str): the path to a file
+            digest (hashlib hash): updated with the UTF-8 bytes of the file's
+                                   text as it is read, if given
+        Yields:
+            str: each word that is not a stopword, lower cased
+        """
+        stopwords = self.stopwords
+        partial = ""
+        with open(infile, 'r') as inf:
+            chunk = inf.read(self.chunk_size)
+            while chunk:
+                if digest is not None:
+                    digest.update(chunk.encode())
+                text = partial + chunk.translate(TOKEN_CHARS)
+                # The last word may carry on in the next chunk
+                cut = text.rfind(' ') + 1
+                partial = text[cut:]
+                for word in text[:cut].lower().split(' '):
+                    if len(word) > 0 and word not in stopwords:
+                        yield word
+                chunk = inf.read(self.chunk_size)
+        partial = partial.lower()
+        if len(partial) > 0 and partial not in stopwords:
+            yield partial
+
+
+    def count_words(self, file_path_name, words, stamp=None):
+        """count words in a file and add the file to the posting list of
+        each word in the index, along with the word's frequency in the file.
+        A file that was already indexed has its old counts removed first.
         Args:
             file_path_name (str): the file name
-            words (list) : a list of words
-        """
-        for word in words:
-            if word not in self.term_freqs:
-                wordtable = HashTable()
-                wordtable[file_path_name] = 1
-                self.term_freqs[word] = wordtable
-            elif file_path_name not in self.term_freqs[word]:
-                self.term_freqs[word][file_path_name] = 1
-            else:
-                self.term_freqs[word][file_path_name] += 1
-        self.doc_length[file_path_name] = len(words)
+            words (iterable) : the words, e.g. from tokenize
+            stamp (tuple): the file's stamp from file_stamp, if known
+        """
+        self.index.add_document(file_path_name, words, stamp)
 
 
-    def index_files(self, directory):
-        """index all text files in a given directory
+    @staticmethod
+    def text_files(directory):
+        """list the text files in a given directory
         Args:
             directory (str): the path of a directory
+        Returns:
+            list: the paths of the text files, sorted
         """
-        for item in os.listdir(directory):
+        paths = []
+        for item in sorted(os.listdir(directory)):
             path = os.path.join(directory, item)
             # Only process text files
             if os.path.isfile(path) and os.path.splitext(item)[1] == '.txt':
-                lines = self.read_file(path)
-                words = self.parse_words(lines)
-                self.count_words(path, words)
+                paths.append(path)
+        return paths
+
+
+    def index_files(self, directory, workers=1):
+        """index all text files in a given directory. With more than one
+        worker, the sorted file list is cut into contiguous shards that are
+        read, parsed and counted in a pool of processes. Each worker builds
+        an index of its shard and the shard indexes are appended in order,
+        so the result is the same as indexing the files one by one.
+        Args:
+            directory (str): the path of a directory
+            workers (int): the number of processes to index with. None uses
+                           one per core
+        """
+        paths = self.text_files(directory)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(paths) < 2:
+            for path in paths:
+                self.add_document(path)
+            return
+        # A few shards per worker keeps every worker busy until the end
+        num_shards = min(len(paths), workers * 4)
+        shards = [paths[len(paths) * i // num_shards:
+                        len(paths) * (i + 1) // num_shards]
+                  for i in range(num_shards)]
+        with multiprocessing.Pool(workers, init_worker,
+                                  (type(self), self.stopwords,
+                                   self.index.positional)) as pool:
+            for shard_index in pool.imap(index_shard, shards):
+                self.index.extend(shard_index)
+
+
+    def new_digest(self):
+        """start a hash of a file's contents for file_stamp
+        Returns:
+            hashlib hash: a 64 bit BLAKE2b hash
+        """
+        return hashlib.blake2b(digest_size=8)
+
+
+    def file_digest(self, path):
+        """hash a file's contents, reading it chunk_size characters at a time
+        Args:
+            path (str): the path to a file
+        Returns:
+            hashlib hash: the hash of the file's text
+        """
+        digest = self.new_digest()
+        with open(path, 'r') as inf:
+            chunk = inf.read(self.chunk_size)
+            while chunk:
+                digest.update(chunk.encode())
+                chunk = inf.read(self.chunk_size)
+        return digest
+
+
+    def file_stamp(self, path, digest):
+        """identify the version of a file by its modification time, size and
+        a hash of its contents
+        Args:
+            path (str): the path to a file
+            digest (hashlib hash): the hash of the file's text
+        Returns:
+            tuple: (mtime in nanoseconds, size in bytes, 64 bit hash)
+        """
+        info = os.stat(path)
+        return (info.st_mtime_ns, info.st_size,
+                int.from_bytes(digest.digest(), "little"))
+
+
+    def add_document(self, path):
+        """index a file, replacing its old counts if it was already indexed.
+        The file is tokenized as it is read and its words are counted as
+        they come, without building a list of them
+        Args:
+            path (str): the path to a file
+        """
+        digest = self.new_digest()
+        self.count_words(path, self.tokenize(path, digest))
+        self.index.set_doc_stamp(path, self.file_stamp(path, digest))
+
+
+    def remove_document(self, path):
+        """remove a file from the index
+        Args:
+            path (str): the path the file was indexed under
+        Raises:
+            KeyError: if the file is not in the index
+        """
+        self.index.remove_document(path)
+
+
+    def refresh(self, directory=None):
+        """bring the index up to date with the text files in a directory.
+        New files are indexed and files that are gone are removed. A file
+        whose modification time and size still match its stamp is skipped
+        without being read. Otherwise it is hashed, and only indexed again
+        if the hash of its contents changed.
+        Args:
+            directory (str): the path of a directory. Defaults to the
+                             directory the engine was created with
+        Returns:
+            tuple: lists of the paths (added, updated, removed)
+        """
+        if directory is None:
+            directory = self.directory
+        added, updated, removed = [], [], []
+        seen = HashTable()
+        for path in self.text_files(directory):
+            seen[path] = True
+            if path not in self.index.doc_ids:
+                self.add_document(path)
+                added.append(path)
+                continue
+            old_stamp = self.index.doc_stamp(path)
+            info = os.stat(path)
+            if (info.st_mtime_ns, info.st_size) == old_stamp[:2]:
+                continue
+            stamp = self.file_stamp(path, self.file_digest(path))
+            if stamp[2] == old_stamp[2]:
+                self.index.set_doc_stamp(path, stamp)
+                continue
+            self.add_document(path)
+            updated.append(path)
+        parent = os.path.dirname(os.path.join(directory, ""))
+        for path in self.index.documents():
+            if os.path.dirname(path) == parent and path not in seen:
+                self.remove_document(path)
+                removed.append(path)
+        return added, updated, removed
 
 
     def get_wf(self, termf):
@@ -101,69 +343,306 @@ class SearchEngine:
         Arguments:
             termf (float): term frequency
         Returns:
-            float: The weighted frequency
+            float: The weighted frequency, or 0 if termf is 0
         """
-        if termf > 0:
-            weightedf = 1 + math.log(termf)
-        return weightedf
+        return weighted_frequency(termf)
 
 
     def get_scores(self, terms):
-        """Creates a list of scores for each file in corpus.
-        The score = weighted frequency / the total word count in the file
-        The score is computed for each term and all scores are summed.
+        """Creates a list of scores for each file in corpus, with the
+        scorer. By default the score = weighted frequency / the total word
+        count in the file, with the weighted frequency of each term summed.
+        The posting lists of the terms are merged, so each matching file is
+        scored once and files without any of the terms are never visited.
         Arguments:
             terms (list): A list of str
         Returns:
             list: a list of tuples, each containing the file_path_name and
-                  its relevancy score
+                  its relevancy score, in doc ID order
         """
-        scores = HashTable()
-        results = []
+        if self.use_numpy():
+            doc_ids, scores = self.score_vector(terms)
+            doc_names = self.index.doc_names
+            return [(doc_names[doc_id], score) for doc_id, score
+                    in zip(doc_ids.tolist(), scores.tolist())]
+        self.prepare_scoring()
+        posting_lists = []
+        weights = []
         for term in terms:
-            if term in self.term_freqs:
-                for file in self.term_freqs[term].keys():
-                    term_f = self.term_freqs[term][file]
-                    weighted_f = self.get_wf(term_f)
-                    if file not in scores:
-                        scores[file] = weighted_f
-                    else:
-                        scores[file] += weighted_f
-        for file in scores.keys():
-            scores[file] /= self.doc_length[file]
-            results.append((file, scores[file]))
+            postings = self.index.posting_list(term)
+            if postings is not None:
+                posting_lists.append(postings)
+                weights.append(self.term_weight(term, postings))
+        posting = self.scorer.posting
+        finish = self.scorer.finish
+        doc_names = self.index.doc_names
+        results = []
+        for doc_id, freqs in merge(posting_lists):
+            total = 0
+            for weight, term_f in zip(weights, freqs):
+                if term_f > 0:
+                    total += posting(weight, term_f, doc_id)
+            results.append((doc_names[doc_id], finish(total, doc_id)))
         return results
 
 
-    def rank(self, scores):
-        """Ranks files in descending order of relevancy
+    def use_numpy(self):
+        """Whether queries are scored with score_vector
+        Returns:
+            bool: True for the numpy backend with a vectorized scorer
+        """
+        return self.backend == "numpy" and self.scorer.vectorized
+
+
+    def score_vector(self, terms):
+        """Score every file matching the terms with numpy. Each term's doc
+        IDs and frequencies are viewed as numpy arrays without copying, and
+        the scorer's posting_vector for the whole list is added into a dense
+        vector of totals indexed by doc ID, in query term order, so files
+        get the totals get_scores sums one posting at a time. finish_vector
+        then scores just the files that matched
+        Arguments:
+            terms (list): A list of str
+        Returns:
+            tuple: (doc_ids, scores), numpy arrays of the matching files'
+                   doc IDs in increasing order and their scores
+        """
+        self.prepare_scoring()
+        num_ids = len(self.index.doc_names)
+        totals = np.zeros(num_ids)
+        matched = np.zeros(num_ids, dtype=bool)
+        for term in terms:
+            postings = self.index.posting_list(term)
+            if postings is None or len(postings) == 0:
+                continue
+            weight = self.term_weight(term, postings)
+            doc_ids = np.frombuffer(postings.doc_ids, np.uint32)
+            freqs = np.frombuffer(postings.freqs, np.uint32)
+            # A posting list has each doc ID once, so adding through the
+            # index array needs no np.add.at
+            totals[doc_ids] += self.scorer.posting_vector(weight, freqs,
+                                                          doc_ids)
+            matched[doc_ids] = True
+        doc_ids = np.flatnonzero(matched)
+        return doc_ids, self.scorer.finish_vector(totals[doc_ids], doc_ids)
+
+
+    def top_k_vector(self, terms, k):
+        """Find the k highest scoring files with score_vector. argpartition
+        finds the k-th highest score in linear time, and only the files
+        scoring at least that much are sorted, by score and then doc ID, so
+        ties are broken as rank breaks them
+        Arguments:
+            terms (list): a list of str
+            k (int): the number of files to return
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        """
+        if k <= 0:
+            return []
+        doc_ids, scores = self.score_vector(terms)
+        if len(scores) > k:
+            kth = scores[np.argpartition(scores, -k)[-k]]
+            kept = scores >= kth
+            doc_ids = doc_ids[kept]
+            scores = scores[kept]
+        order = np.lexsort((doc_ids, -scores))[:k]
+        doc_names = self.index.doc_names
+        return [(doc_names[doc_id], score) for doc_id, score
+                in zip(doc_ids[order].tolist(), scores[order].tolist())]
+
+
+    def prepare_scoring(self):
+        """Get the scorer ready for the current index. When the index has
+        changed or the scorer has been replaced since the last query, the
+        scorer precomputes its document norms again, and the cached term
+        weights and bounds and search results are dropped
+        """
+        key = self.scoring_key
+        if key is None or key[0] is not self.index \
+                or key[1] != self.index.version or key[2] is not self.scorer:
+            self.scorer.prepare(self.index)
+            self.term_weights = HashTable(hasher=builtin_hash)
+            self.term_bounds = HashTable(hasher=builtin_hash)
+            self.cache.clear()
+            self.scoring_key = (self.index, self.index.version, self.scorer)
+        self.cache.check(self.index)
+
+
+    def term_weight(self, term, postings):
+        """The scorer's weight for a term, computed once per term and kept
+        until the index changes. prepare_scoring must have been called
+        Arguments:
+            term (str): the term
+            postings (PostingList): the term's posting list
+        Returns:
+            float: the weight
+        """
+        if term not in self.term_weights:
+            self.term_weights[term] = self.scorer.term_weight(
+                self.index.num_docs(), len(postings))
+        return self.term_weights[term]
+
+
+    def term_bound(self, term, postings):
+        """The most a term can add to any file's score, which is the largest
+        score it gives on its own over its postings, plus BOUND_SLACK.
+        Computed once per term and kept until the index changes.
+        prepare_scoring must have been called
+        Arguments:
+            term (str): the term
+            postings (PostingList): the term's posting list
+        Returns:
+            float: the upper bound
+        """
+        if term not in self.term_bounds:
+            weight = self.term_weight(term, postings)
+            posting = self.scorer.posting
+            finish = self.scorer.finish
+            bound = 0
+            for doc_id, term_f in postings:
+                bound = max(bound, finish(posting(weight, term_f, doc_id),
+                                          doc_id))
+            self.term_bounds[term] = bound * (1 + BOUND_SLACK)
+        return self.term_bounds[term]
+
+
+    def top_k(self, terms, k):
+        """Find the k highest scoring files with WAND dynamic pruning,
+        giving exactly what rank(get_scores(terms), k) gives. The posting
+        lists are walked together in doc ID order. Once k files have been
+        scored, the lowest score among them is a threshold: the lists are
+        sorted by their current doc ID, and the pivot is the first list at
+        which the sum of the term bounds so far passes the threshold. No
+        file before the pivot's doc ID can score above the threshold, so
+        the lists before the pivot skip straight to it by binary search.
+        A file is only scored when every list up to the pivot is on it, and
+        its score is summed in query term order, as get_scores does.
+        Arguments:
+            terms (list): a list of str
+            k (int): the number of files to return
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        """
+        if self.use_numpy():
+            return self.top_k_vector(terms, k)
+        self.prepare_scoring()
+        lists = []
+        weights = []
+        bounds = []
+        for term in terms:
+            postings = self.index.posting_list(term)
+            if postings is not None:
+                lists.append(postings)
+                weights.append(self.term_weight(term, postings))
+                bounds.append(self.term_bound(term, postings))
+        return self.wand(lists, weights, bounds, k)
+
+
+    def wand(self, lists, weights, bounds, k):
+        """The WAND search top_k runs, over posting lists already fetched
+        Arguments:
+            lists (list): the PostingList of each query term in the index,
+                          in query term order
+            weights (list): the term_weight of each list
+            bounds (list): the term_bound of each list
+            k (int): the number of files to return
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        """
+        if k <= 0:
+            return []
+        doc_ids = [postings.doc_ids for postings in lists]
+        lengths = [len(postings) for postings in lists]
+        posting = self.scorer.posting
+        finish = self.scorer.finish
+        cursors = [0] * len(lists)
+        live = [i for i in range(len(lists)) if lengths[i] > 0]
+        best = MinPQ()
+        while live:
+            live.sort(key=lambda i: doc_ids[i][cursors[i]])
+            threshold = best.min()[0] if best.size() == k else -1
+            total = 0
+            pivot = None
+            for j, i in enumerate(live):
+                total += bounds[i]
+                if total > threshold:
+                    pivot = j
+                    break
+            if pivot is None:
+                break
+            pivot_doc = doc_ids[live[pivot]][cursors[live[pivot]]]
+            if doc_ids[live[0]][cursors[live[0]]] == pivot_doc:
+                freqs = [0] * len(lists)
+                for i in live:
+                    pos = cursors[i]
+                    if doc_ids[i][pos] != pivot_doc:
+                        break
+                    freqs[i] = lists[i].freqs[pos]
+                    cursors[i] = pos + 1
+                total = 0
+                for weight, term_f in zip(weights, freqs):
+                    if term_f > 0:
+                        total += posting(weight, term_f, pivot_doc)
+                item = (finish(total, pivot_doc), -pivot_doc)
+                if best.size() < k:
+                    best.insert(item)
+                elif item > best.min():
+                    best.replace_min(item)
+            else:
+                for i in live[:pivot]:
+                    cursors[i] = lists[i].next_geq(cursors[i], pivot_doc)
+            live = [i for i in live if cursors[i] < lengths[i]]
+        ranked = []
+        doc_names = self.index.doc_names
+        while not best.is_empty():
+            score, doc_id = best.del_min()
+            ranked.append((doc_names[-doc_id], score))
+        ranked.reverse()
+        return ranked
+
+
+    def rank(self, scores, k=None):
+        """Ranks files in descending order of relevancy, keeping only the
+        top k. A MinPQ holds the best k seen so far, with the worst of them
+        at the top, so each file costs one comparison plus O(log k) when it
+        gets in: O(n log k) overall. Files with equal scores keep their
+        order in scores.
         Arguments:
             scores (list): a list of tuples: (file_path_name, score)
+            k (int): the number of files to keep. None keeps them all
         Returns:
-            list: a list of tuples: (file_path_name, score) sorted in
-                  descending order of relevancy
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
         """
-        sorted_idx = len(scores) - 1
-        for _ in scores:
-            largest_idx = 0
-            for j in range(sorted_idx + 1):
-                if scores[j][1] < scores[largest_idx][1]:
-                    largest_idx = j
-            temp = scores[largest_idx]
-            scores[largest_idx] = scores[sorted_idx]
-            scores[sorted_idx] = temp
-            sorted_idx -= 1
-        return scores
+        if k is None:
+            k = len(scores)
+        if k <= 0:
+            return []
+        best = MinPQ()
+        for position, (_, score) in enumerate(scores):
+            # Among equal scores, the later file is the worse one
+            item = (score, -position)
+            if best.size() < k:
+                best.insert(item)
+            elif item > best.min():
+                best.replace_min(item)
+        ranked = []
+        while not best.is_empty():
+            ranked.append(scores[-best.del_min()[1]])
+        ranked.reverse()
+        return ranked
 
 
-    def search(self, query):
-        """Search for the query items in files.
+    def query_terms(self, query):
+        """Split a query into its distinct lower cased terms
         Arguments:
             query (str): query input: e.g. "Computer Science"
         Returns:
-             list: a list of tuples: (file_path_name, score) sorted
-                   in descending order or relevancy, excluding files whose
-                   relevancy score is 0
+            list: the terms, each once
         """
         query_terms = query.lower().strip().split(' ')
         duplicate_check = HashTable()
@@ -172,8 +651,389 @@ class SearchEngine:
                 duplicate_check[term] = 1
             else:
                 duplicate_check[term] += 1
-        return self.rank(self.get_scores(duplicate_check.keys()))
+        return duplicate_check.keys()
+
+
+    def search(self, query, k=10):
+        """Search for the query items in files. Results are cached by the
+        query's distinct terms, so repeating a query, or its terms in
+        another order, does not score the files again until the index
+        changes. self.cache.stats() gives the cache's hit and miss counts
+        Arguments:
+            query (str): query input: e.g. "Computer Science"
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+             list: a list of at most k tuples: (file_path_name, score)
+                   sorted in descending order or relevancy, excluding files
+                   whose relevancy score is 0
+        """
+        terms = self.query_terms(query)
+        key = (frozenset(terms), k)
+        self.prepare_scoring()
+        results = self.cache.get(key)
+        if results is None:
+            if k is None:
+                results = self.rank(self.get_scores(terms))
+            else:
+                results = self.top_k(terms, k)
+            self.cache.put(key, results)
+        return list(results)
+
+
+    def search_many(self, queries, k=10, workers=1):
+        """Search for many queries at once. Repeated queries are scored once
+        and cached results are used as in search. The rest are scored by
+        score_queries, which fetches each posting list once for the whole
+        batch, in one process or split over a pool of worker processes
+        Arguments:
+            queries (list): a list of str queries
+            k (int): the number of results for each query. None returns
+                     every matching file
+            workers (int): the number of processes to score with. None uses
+                           one per core
+        Returns:
+            list: the results search would give for each query, in order
+        """
+        self.prepare_scoring()
+        batch = HashTableLinear(hasher=builtin_hash)
+        keys = []
+        pending_keys = []
+        pending_terms = []
+        for query in queries:
+            terms = self.query_terms(query)
+            key = (frozenset(terms), k)
+            keys.append(key)
+            if key not in batch:
+                results = self.cache.get(key)
+                batch[key] = results
+                if results is None:
+                    pending_keys.append(key)
+                    pending_terms.append(terms)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1 and len(pending_terms) > 1:
+            scored = self.score_parallel(pending_terms, k, workers)
+        else:
+            scored = self.score_queries(pending_terms, k)
+        for key, results in zip(pending_keys, scored):
+            batch[key] = results
+            self.cache.put(key, results)
+        return [list(batch[key]) for key in keys]
+
+
+    def score_queries(self, term_lists, k):
+        """Score a batch of queries. The queries are taken in order of their
+        sorted terms, so ones sharing terms are scored together, and each
+        term's posting list and bound are looked up once for the batch
+        Arguments:
+            term_lists (list): the distinct terms of each query
+            k (int): the number of results for each query, or None for all
+        Returns:
+            list: the ranked results of each query, in order
+        """
+        self.prepare_scoring()
+        fetched = HashTable(hasher=builtin_hash)
+        results = [None] * len(term_lists)
+        for i in sorted(range(len(term_lists)),
+                        key=lambda i: sorted(term_lists[i])):
+            if k is None:
+                results[i] = self.rank(self.get_scores(term_lists[i]))
+                continue
+            if self.use_numpy():
+                results[i] = self.top_k_vector(term_lists[i], k)
+                continue
+            lists = []
+            weights = []
+            bounds = []
+            for term in term_lists[i]:
+                if term not in fetched:
+                    postings = self.index.posting_list(term)
+                    if postings is not None:
+                        postings = (postings,
+                                    self.term_weight(term, postings),
+                                    self.term_bound(term, postings))
+                    fetched[term] = postings
+                entry = fetched[term]
+                if entry is not None:
+                    lists.append(entry[0])
+                    weights.append(entry[1])
+                    bounds.append(entry[2])
+            results[i] = self.wand(lists, weights, bounds, k)
+        return results
+
+
+    def score_parallel(self, term_lists, k, workers):
+        """Score a batch of queries in a pool of processes. The queries are
+        sorted by their terms and cut into contiguous chunks, so queries
+        sharing terms mostly go to the same worker. Each worker gets a copy
+        of the index when it starts
+        Arguments:
+            term_lists (list): the distinct terms of each query
+            k (int): the number of results for each query, or None for all
+            workers (int): the number of worker processes
+        Returns:
+            list: the ranked results of each query, in order
+        """
+        order = sorted(range(len(term_lists)),
+                       key=lambda i: sorted(term_lists[i]))
+        num_chunks = min(len(order), workers * 4)
+        chunks = [order[len(order) * i // num_chunks:
+                        len(order) * (i + 1) // num_chunks]
+                  for i in range(num_chunks)]
+        results = [None] * len(term_lists)
+        with multiprocessing.Pool(workers, init_search_worker,
+                                  (type(self), self.directory,
+                                   self.stopwords, self.index,
+                                   self.scorer, self.backend)) as pool:
+            batches = [([term_lists[i] for i in chunk], k)
+                       for chunk in chunks]
+            for chunk, scored in zip(chunks, pool.imap(search_batch,
+                                                       batches)):
+                for i, ranked in zip(chunk, scored):
+                    results[i] = ranked
+        return results
+
+
+    def search_boolean(self, query, k=10):
+        """Search for files matching a Boolean query such as
+        "hash AND (table OR map) NOT tree", as boolean_query parses it. The
+        matching files are found by intersecting and merging posting lists
+        alone, and then only those are scored, on the query terms that are
+        not under a NOT, as get_scores would score them.
+        Results are cached as in search
+        Args:
+            query (str): the Boolean query
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy. A query of only NOTs
+                  gives its files a score of 0
+        Raises:
+            QueryFormatException: if the query is malformed
+        """
+        key = ("boolean", tuple(boolean_query.tokenize(query)), k)
+        self.prepare_scoring()
+        results = self.cache.get(key)
+        if results is None:
+            tree = boolean_query.parse(query)
+            doc_ids = boolean_query.evaluate(tree, self.index)
+            lists = []
+            weights = []
+            for term in boolean_query.positive_terms(tree):
+                postings = self.index.posting_list(term)
+                if postings is not None:
+                    lists.append(postings)
+                    weights.append(self.term_weight(term, postings))
+            cursors = [0] * len(lists)
+            posting = self.scorer.posting
+            finish = self.scorer.finish
+            doc_names = self.index.doc_names
+            scores = []
+            for doc_id in doc_ids:
+                total = 0
+                for i, postings in enumerate(lists):
+                    pos = postings.next_geq(cursors[i], doc_id)
+                    cursors[i] = pos
+                    if pos < len(postings) and postings.doc_ids[pos] == doc_id:
+                        total += posting(weights[i], postings.freqs[pos],
+                                         doc_id)
+                scores.append((doc_names[doc_id], finish(total, doc_id)))
+            results = self.rank(scores, k)
+            self.cache.put(key, results)
+        return list(results)
+
+
+    def phrase_lists(self, query):
+        """Parse a phrase or proximity query into its words, as the files
+        were parsed, and fetch their posting lists. Stopwords are dropped,
+        and positions count only the words that are left, so "hash of table"
+        is the same phrase as "hash table"
+        Args:
+            query (str): query input: e.g. "hash table"
+        Returns:
+            list: the PostingList of each word, or an empty list if a word
+                  is in no file
+        Raises:
+            ValueError: if the index does not keep positions
+        """
+        if not self.index.positional:
+            raise ValueError("phrase queries need an index built with "
+                             "positional=True")
+        lists = []
+        for term in self.parse_words([query]):
+            postings = self.index.posting_list(term)
+            if postings is None:
+                return []
+            lists.append(postings)
+        return lists
+
+
+    def search_phrase(self, phrase, k=10):
+        """Search for files containing a phrase, its words next to each
+        other and in order. Only files holding every word are visited, found
+        by intersecting the posting lists, and in each the positions of each
+        word, shifted back by its place in the phrase, are intersected to
+        find where the phrase starts. A file is scored like a single term
+        whose frequency is the number of times the phrase occurs
+        Args:
+            phrase (str): the phrase: e.g. "hash table"
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        Raises:
+            ValueError: if the index does not keep positions
+        """
+        lists = self.phrase_lists(phrase)
+        matches = []
+        for doc_id, cursors in intersect(lists):
+            starts = None
+            for offset, (postings, pos) in enumerate(zip(lists, cursors)):
+                shifted = {position - offset
+                           for position in postings.positions_at(pos)}
+                starts = shifted if starts is None else starts & shifted
+                if not starts:
+                    break
+            if starts:
+                matches.append((doc_id, len(starts)))
+        return self.rank(self.score_matches(matches), k)
+
+
+    def search_near(self, query, distance, k=10):
+        """Search for files in which every word of the query occurs within
+        distance words of each other, in any order, like NEAR/distance. The
+        words' positions in each file holding all of them are swept in
+        order, keeping the last position of each word; a match ends at each
+        position where all of those lie in a span of at most distance. A
+        file is scored like a single term whose frequency is its number of
+        matches
+        Args:
+            query (str): query input: e.g. "hash table"
+            distance (int): the most words from the first word of a match
+                            to the last
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        Raises:
+            ValueError: if the index does not keep positions
+        """
+        lists = []
+        for postings in self.phrase_lists(query):
+            if all(postings is not other for other in lists):
+                lists.append(postings)
+        found = []
+        for doc_id, cursors in intersect(lists):
+            events = sorted((position, i)
+                            for i, (postings, pos) in enumerate(zip(lists,
+                                                                    cursors))
+                            for position in postings.positions_at(pos))
+            last = [None] * len(lists)
+            seen = 0
+            matches = 0
+            for position, i in events:
+                if last[i] is None:
+                    seen += 1
+                last[i] = position
+                if seen == len(lists) and position - min(last) <= distance:
+                    matches += 1
+            if matches:
+                found.append((doc_id, matches))
+        return self.rank(self.score_matches(found), k)
+
+
+    def score_matches(self, matches):
+        """Score the files matching a phrase or proximity query, treating
+        the query as a single term occurring in just those files, as often
+        as it matched in each
+        Args:
+            matches (list): tuples (doc_id, number of matches), in doc ID
+                            order
+        Returns:
+            list: a list of tuples, each containing the file_path_name and
+                  its relevancy score, in doc ID order
+        """
+        self.prepare_scoring()
+        weight = self.scorer.term_weight(self.index.num_docs(), len(matches))
+        doc_names = self.index.doc_names
+        return [(doc_names[doc_id],
+                 self.scorer.finish(self.scorer.posting(weight, count, doc_id),
+                                    doc_id))
+                for doc_id, count in matches]
+
 
+    def search_iter(self, query):
+        """Search for the query items in files, producing results lazily in
+        rank order, e.g. for paging through them. Every matching file is
+        scored up front and heapified in O(n); each result taken then
+        costs O(log n), so reading the first pages of a large result set
+        never sorts the rest.
+        Arguments:
+            query (str): query input: e.g. "Computer Science"
+        Yields:
+            tuple: (file_path_name, score), in descending order of relevancy
+        """
+        scores = self.get_scores(self.query_terms(query))
+        heap = MinPQ([(-score, position)
+                      for position, (_, score) in enumerate(scores)])
+        while not heap.is_empty():
+            yield scores[heap.del_min()[1]]
+
+
+
+def init_worker(engine_class, stopwords, positional=False):
+    """Set up an indexing worker process with an engine to parse files with
+    Args:
+        engine_class (class): the class of the engine being indexed
+        stopwords (HashTable): a hash table containing stopwords
+        positional (bool): whether to keep the positions of words
+    """
+    global worker_engine
+    worker_engine = engine_class(None, stopwords, InvertedIndex(positional))
+
+
+def init_search_worker(engine_class, directory, stopwords, index, scorer,
+                       backend="python"):
+    """Set up a search worker process with an engine over a copy of the index
+    Args:
+        engine_class (class): the class of the engine searching
+        directory (str): the directory the index was built from
+        stopwords (HashTable): a hash table containing stopwords
+        index (InvertedIndex): the index to search
+        scorer (Scorer): the scorer to score with
+        backend (str): the backend to score with
+    """
+    global worker_engine
+    worker_engine = engine_class(directory, stopwords, index, cache_size=0,
+                                 scorer=scorer, backend=backend)
+
+
+def search_batch(batch):
+    """Score a chunk of queries in a worker process
+    Args:
+        batch (tuple): (term_lists, k) as score_queries takes them
+    Returns:
+        list: the ranked results of each query, in order
+    """
+    term_lists, k = batch
+    return worker_engine.score_queries(term_lists, k)
+
+
+def index_shard(paths):
+    """Index a shard of files in a worker process
+    Args:
+        paths (list): the paths of the files in the shard
+    Returns:
+        InvertedIndex: an index of just these files
+    """
+    worker_engine.index = InvertedIndex(worker_engine.index.positional)
+    for path in paths:
+        worker_engine.add_document(path)
+    return worker_engine.index
 
 
 def main():
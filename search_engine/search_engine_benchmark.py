@@ -0,0 +1,611 @@
+"""Benchmarks for the search engine, run over a generated corpus.
+Run with an optional number of documents, e.g.
+    python search_engine_benchmark.py 2000
+time parallel indexing with
+    python search_engine_benchmark.py parallel 100000
+compare the memory used to index one large file with
+    python search_engine_benchmark.py tokenize 100
+time ranking that many matching documents with
+    python search_engine_benchmark.py rank 10000 1000000
+compare exhaustive and pruned top 10 queries with
+    python search_engine_benchmark.py prune 5000
+time a skewed stream of queries with and without the result cache with
+    python search_engine_benchmark.py cache 2000
+compare the size of each posting list layout with
+    python search_engine_benchmark.py postings 2000
+compare search_many with a loop of search calls with
+    python search_engine_benchmark.py batch 2000
+time phrase queries on a positional index with
+    python search_engine_benchmark.py phrase 2000
+time Boolean AND queries with
+    python search_engine_benchmark.py boolean 5000
+time queries with each scorer with
+    python search_engine_benchmark.py scorers 5000
+compare the python and numpy backends on queries matching most of
+200000 documents with
+    python search_engine_benchmark.py numpy 200000
+and compare one engine with an engine split over 1, 2 and 4 shard
+processes with
+    python search_engine_benchmark.py shards 20000
+Author: Ben Paulson
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+from search_engine import SearchEngine
+from inverted_index import InvertedIndex, PostingList
+from query_cache import QueryCache
+from scorers import WfScorer, TfIdfScorer, BM25Scorer
+from sharded_engine import ShardedSearchEngine
+from hashtables import HashTableSepchain as HashTable, import_stopwords
+
+
+def make_corpus(directory, num_docs, vocab_size=5000, doc_words=200,
+                seed=0):
+    """Write num_docs text files of random words into directory. Word
+    frequencies follow a Zipf-like curve, so a few terms are in most
+    documents and most terms are rare, as in real text
+    Arguments:
+        directory (str): The directory to write to
+        num_docs (int): The number of documents to write
+        vocab_size (int): The number of distinct words to draw from
+        doc_words (int): The number of words in each document
+        seed (int): Seed for the random words
+    Returns:
+        list: The vocabulary, most frequent word first
+    """
+    rand = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    for doc in range(num_docs):
+        words = rand.choices(vocab, weights, k=doc_words)
+        with open(os.path.join(directory, f"doc{doc}.txt"), "w") as outf:
+            for start in range(0, doc_words, 20):
+                outf.write(" ".join(words[start:start + 20]) + ".\n")
+    return vocab
+
+
+def make_queries(vocab, num_queries, seed=1):
+    """Build queries of one to three terms, mixing common and rare terms
+    Arguments:
+        vocab (list): The vocabulary, most frequent word first
+        num_queries (int): The number of queries to build
+        seed (int): Seed for the random terms
+    Returns:
+        list: The queries
+    """
+    rand = random.Random(seed)
+    queries = []
+    for _ in range(num_queries):
+        terms = [vocab[min(int(rand.paretovariate(0.5)) - 1, len(vocab) - 1)]
+                 for _ in range(rand.randint(1, 3))]
+        queries.append(" ".join(terms))
+    return queries
+
+
+def bench_engine(num_docs, num_queries=200):
+    """Print the time to index a generated corpus, the time to load the
+    saved index, the time to refresh the index after 1% of the documents
+    change, and the time per query
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        num_queries (int): The number of queries to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        queries = make_queries(vocab, num_queries)
+        start = time.perf_counter()
+        engine = SearchEngine(directory, stopwords)
+        index_time = time.perf_counter() - start
+        path = os.path.join(directory, "index.bin")
+        engine.save(path)
+        start = time.perf_counter()
+        SearchEngine.load(directory, stopwords, path)
+        load_time = time.perf_counter() - start
+        for doc in range(0, num_docs, 100):
+            with open(os.path.join(directory, f"doc{doc}.txt"), "a") as outf:
+                outf.write(vocab[doc % len(vocab)] + "\n")
+        start = time.perf_counter()
+        engine.refresh()
+        refresh_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries:
+        engine.search(query)
+    query_time = (time.perf_counter() - start) / num_queries
+    print(f"{num_docs:>8} {index_time:>10.2f} {load_time * 1000:>10.2f}"
+          f" {refresh_time * 1000:>10.2f} {query_time * 1000:>10.2f}")
+
+
+def bench_parallel(num_docs, worker_counts=None):
+    """Print the time to index a generated corpus with each number of
+    worker processes, and the speedup over indexing in one process
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        worker_counts (list): The numbers of workers to try. Defaults to
+                              powers of two up to the number of cores
+    """
+    cores = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cores:
+            worker_counts.append(worker_counts[-1] * 2)
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    print(f"{num_docs} documents, {cores} cores: parallel indexing")
+    print(f"{'workers':>8} {'index s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        make_corpus(directory, num_docs)
+        base = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            SearchEngine(directory, stopwords, workers=workers)
+            elapsed = time.perf_counter() - start
+            if base is None:
+                base = elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {base / elapsed:>8.2f}")
+
+
+def bench_tokenize(megabytes):
+    """Print the time and peak memory to index one generated file of the
+    given size, reading it whole with read_file and parse_words, and
+    streaming it through tokenize
+    Arguments:
+        megabytes (int): The size of the file
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    print(f"{megabytes} MB document: indexing time and peak memory")
+    print(f"{'method':>12} {'seconds':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        rand = random.Random(0)
+        vocab = [f"term{i}" for i in range(5000)]
+        line = " ".join(rand.choices(vocab, k=1000)) + ".\n"
+        path = os.path.join(directory, "big.txt")
+        with open(path, "w") as outf:
+            for _ in range(megabytes * 2 ** 20 // len(line)):
+                outf.write(line)
+        for method in ("readlines", "tokenize"):
+            engine = SearchEngine(directory, stopwords, InvertedIndex())
+            tracemalloc.start()
+            start = time.perf_counter()
+            if method == "readlines":
+                engine.count_words(path,
+                                   engine.parse_words(engine.read_file(path)))
+            else:
+                engine.add_document(path)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{method:>12} {elapsed:>8.2f} {peak / 2 ** 20:>8.1f}")
+
+
+def selection_rank(scores):
+    """The original SearchEngine.rank, a selection sort, for comparison
+    Arguments:
+        scores (list): a list of tuples: (file_path_name, score)
+    Returns:
+        list: the tuples sorted in descending order of score
+    """
+    sorted_idx = len(scores) - 1
+    for _ in scores:
+        largest_idx = 0
+        for j in range(sorted_idx + 1):
+            if scores[j][1] < scores[largest_idx][1]:
+                largest_idx = j
+        scores[largest_idx], scores[sorted_idx] = (scores[sorted_idx],
+                                                   scores[largest_idx])
+        sorted_idx -= 1
+    return scores
+
+
+def bench_rank(size, k=10):
+    """Print the time to rank random scores for a number of matching
+    documents: the full selection sort the engine used to do, the top k
+    with rank, and the first k results from search_iter
+    Arguments:
+        size (int): The number of matching documents
+        k (int): The number of results wanted
+    """
+    engine = SearchEngine(None, [], InvertedIndex())
+    rand = random.Random(0)
+    print(f"ranking: milliseconds for the top {k}")
+    print(f"{'matches':>10} {'selection':>10} {'rank':>10} {'iter':>10}")
+    scores = [(f"doc{i}", rand.random()) for i in range(size)]
+    selection = float("nan")
+    if size <= 10000:
+        start = time.perf_counter()
+        selection_rank(list(scores))
+        selection = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    engine.rank(scores, k)
+    top_k = (time.perf_counter() - start) * 1000
+    engine.get_scores = lambda terms: scores
+    start = time.perf_counter()
+    results = engine.search_iter("")
+    for _ in range(k):
+        next(results)
+    paged = (time.perf_counter() - start) * 1000
+    print(f"{size:>10} {selection:>10.1f} {top_k:>10.1f} {paged:>10.1f}")
+
+
+def bench_prune(num_docs, k=10, num_queries=200):
+    """Print the time per top k query scoring every matching document with
+    get_scores and rank, and with WAND pruning in top_k, and check that the
+    two give the same results. Common terms are where pruning pays off, so
+    the queries pair them with rarer terms
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        k (int): The number of results per query
+        num_queries (int): The number of queries to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords)
+    rand = random.Random(2)
+    queries = [[rand.choice(vocab[:20]), rand.choice(vocab[:200]),
+                rand.choice(vocab)] for _ in range(num_queries)]
+    for terms in queries:
+        engine.top_k(terms, k)
+    start = time.perf_counter()
+    exhaustive = [engine.rank(engine.get_scores(terms), k)
+                  for terms in queries]
+    exhaustive_time = (time.perf_counter() - start) / num_queries
+    start = time.perf_counter()
+    pruned = [engine.top_k(terms, k) for terms in queries]
+    pruned_time = (time.perf_counter() - start) / num_queries
+    print(f"{num_docs} documents: top {k} query milliseconds")
+    print(f"{'exhaustive':>10} {'wand':>10} {'same':>6}")
+    print(f"{exhaustive_time * 1000:>10.2f} {pruned_time * 1000:>10.2f}"
+          f" {str(exhaustive == pruned):>6}")
+
+
+def bench_cache(num_docs, num_queries=5000, distinct=500):
+    """Print the time per query for a stream of queries drawn from a Zipf
+    distribution over a fixed set, as in real query logs, with the result
+    cache off and on, and the cache's hit rate
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        num_queries (int): The number of queries in the stream
+        distinct (int): The number of distinct queries to draw from
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords, cache_size=0)
+    pool = make_queries(vocab, distinct)
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    stream = random.Random(3).choices(pool, weights, k=num_queries)
+    print(f"{num_docs} documents, {num_queries} queries: milliseconds per"
+          " query")
+    print(f"{'cache':>8} {'query ms':>10} {'hit rate':>10}")
+    for size in (0, 64, 1024):
+        engine.cache = QueryCache(size)
+        start = time.perf_counter()
+        for query in stream:
+            engine.search(query)
+        elapsed = (time.perf_counter() - start) / num_queries
+        print(f"{size:>8} {elapsed * 1000:>10.3f}"
+              f" {engine.cache.stats()['hit_rate']:>10.2f}")
+
+
+def bench_postings(num_docs):
+    """Print the memory used by the postings of a generated corpus in each
+    layout: a HashTable of document name to frequency per term, as the
+    engine first stored them, the arrays of PostingList, and the encoded
+    form in index files. Also print the time to decode the encoded lists
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords)
+    index = engine.index
+    num_postings = sum(len(postings) for postings in index.postings)
+    tracemalloc.start()
+    tables = []
+    for postings in index.postings:
+        table = HashTable()
+        for doc_id, freq in postings:
+            table[index.doc_names[doc_id]] = freq
+        tables.append(table)
+    nodes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tables = None
+    arrays = sum(postings.doc_ids.itemsize * len(postings) * 2
+                 for postings in index.postings)
+    encoded = [postings.encode() for postings in index.postings]
+    encoded_size = sum(len(data) for data in encoded)
+    start = time.perf_counter()
+    for data in encoded:
+        PostingList.decode(data)
+    decode_time = time.perf_counter() - start
+    print(f"{num_docs} documents, {num_postings} postings: bytes per posting")
+    print(f"{'hashtable':>10} {'arrays':>10} {'encoded':>10}"
+          f" {'decode ns':>10}")
+    print(f"{nodes / num_postings:>10.1f} {arrays / num_postings:>10.1f}"
+          f" {encoded_size / num_postings:>10.2f}"
+          f" {decode_time * 1e9 / num_postings:>10.1f}")
+
+
+def bench_batch(num_docs, num_queries=5000, distinct=2000):
+    """Print the queries per second of a loop of search calls and of one
+    search_many call over a stream of queries drawn from a Zipf
+    distribution, with the result cache off and on, and with a pool of
+    worker processes if there is more than one core
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        num_queries (int): The number of queries in the stream
+        distinct (int): The number of distinct queries to draw from
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords, cache_size=0)
+    pool = make_queries(vocab, distinct)
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    stream = random.Random(3).choices(pool, weights, k=num_queries)
+    cores = os.cpu_count() or 1
+    runs = [("loop", 0, 1), ("many", 0, 1), ("loop", 1024, 1),
+            ("many", 1024, 1)]
+    if cores > 1:
+        runs.append(("many", 0, cores))
+    print(f"{num_docs} documents, {num_queries} queries: queries per second")
+    print(f"{'method':>8} {'cache':>6} {'workers':>8} {'queries/s':>10}")
+    expected = None
+    for method, cache_size, workers in runs:
+        engine.cache = QueryCache(cache_size)
+        start = time.perf_counter()
+        if method == "loop":
+            results = [engine.search(query) for query in stream]
+        else:
+            results = engine.search_many(stream, workers=workers)
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = results
+        elif results != expected:
+            print("results differ")
+        print(f"{method:>8} {cache_size:>6} {workers:>8}"
+              f" {num_queries / elapsed:>10.0f}")
+
+
+def bench_phrase(num_docs, num_queries=50):
+    """Print the time and index file size of a plain and a positional index
+    of a generated corpus, and the time per phrase query, against finding
+    the phrase by reading every file again
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        num_queries (int): The number of phrases to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    print(f"{num_docs} documents: plain and positional index")
+    print(f"{'index':>10} {'index s':>8} {'file MB':>8} {'phrase ms':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        rand = random.Random(4)
+        phrases = [f"{rand.choice(vocab[:50])} {rand.choice(vocab[:50])}"
+                   for _ in range(num_queries)]
+        path = os.path.join(directory, "index.bin")
+        for positional in (False, True):
+            start = time.perf_counter()
+            engine = SearchEngine(directory, stopwords, positional=positional)
+            index_time = time.perf_counter() - start
+            engine.save(path)
+            size = os.path.getsize(path) / 2 ** 20
+            phrase_time = float("nan")
+            if positional:
+                start = time.perf_counter()
+                for phrase in phrases:
+                    engine.search_phrase(phrase)
+                phrase_time = (time.perf_counter() - start) / num_queries
+            name = "positional" if positional else "plain"
+            print(f"{name:>10} {index_time:>8.2f} {size:>8.2f}"
+                  f" {phrase_time * 1000:>10.2f}")
+        start = time.perf_counter()
+        for phrase in phrases[:5]:
+            terms = engine.parse_words([phrase])
+            for doc_path in engine.text_files(directory):
+                words = engine.parse_words(engine.read_file(doc_path))
+                sum(words[i:i + len(terms)] == terms
+                    for i in range(len(words)))
+        scan_time = (time.perf_counter() - start) / 5
+        print(f"{'rescan':>10} {'':>8} {'':>8} {scan_time * 1000:>10.2f}")
+
+
+def bench_boolean(num_docs, k=10, num_queries=200):
+    """Print the time per Boolean query joining a common term to a rarer one
+    with AND, evaluated with search_boolean, and by scoring every file with
+    either term with get_scores and keeping the ones with both
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        k (int): The number of results per query
+        num_queries (int): The number of queries to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords, cache_size=0)
+    rare = [term for term in vocab[200:]
+            if engine.index.posting_list(term) is not None]
+    rand = random.Random(5)
+    pairs = [(rand.choice(vocab[:20]), rand.choice(rare)) for _ in
+             range(num_queries)]
+    start = time.perf_counter()
+    for common, rare in pairs:
+        engine.search_boolean(f"{common} AND {rare}", k)
+    boolean_time = (time.perf_counter() - start) / num_queries
+    start = time.perf_counter()
+    for common, rare in pairs:
+        both = set(engine.index.posting_list(rare).doc_ids).intersection(
+            engine.index.posting_list(common).doc_ids)
+        names = {engine.index.doc_names[doc_id] for doc_id in both}
+        engine.rank([(name, score) for name, score in
+                     engine.get_scores([common, rare]) if name in names], k)
+    filter_time = (time.perf_counter() - start) / num_queries
+    print(f"{num_docs} documents: common AND rare query milliseconds")
+    print(f"{'boolean':>10} {'filter':>10}")
+    print(f"{boolean_time * 1000:>10.2f} {filter_time * 1000:>10.2f}")
+
+
+def bench_scorers(num_docs, k=10, num_queries=200):
+    """Print the time per query with each scorer, scoring every matching
+    document with get_scores and with WAND pruning in top_k, and the time to
+    prepare the scorer after the index changes
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        k (int): The number of results per query
+        num_queries (int): The number of queries to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        engine = SearchEngine(directory, stopwords, cache_size=0)
+    queries = [engine.query_terms(query)
+               for query in make_queries(vocab, num_queries)]
+    print(f"{num_docs} documents: milliseconds per top {k} query")
+    print(f"{'scorer':>8} {'prepare':>8} {'scores':>8} {'wand':>8}")
+    for scorer in (WfScorer(), TfIdfScorer(), BM25Scorer()):
+        engine.scorer = scorer
+        start = time.perf_counter()
+        engine.prepare_scoring()
+        prepare_time = time.perf_counter() - start
+        for terms in queries:
+            engine.top_k(terms, k)
+        start = time.perf_counter()
+        for terms in queries:
+            engine.rank(engine.get_scores(terms), k)
+        scores_time = (time.perf_counter() - start) / num_queries
+        start = time.perf_counter()
+        for terms in queries:
+            engine.top_k(terms, k)
+        wand_time = (time.perf_counter() - start) / num_queries
+        name = type(scorer).__name__[:-6]
+        print(f"{name:>8} {prepare_time * 1000:>8.2f}"
+              f" {scores_time * 1000:>8.2f} {wand_time * 1000:>8.2f}")
+
+
+def bench_numpy(num_docs, k=10, num_queries=20, doc_words=50):
+    """Print the time per query with the python backend, scoring every
+    matching document and with WAND, and with the numpy backend, for
+    queries of common terms that match most documents. The index is built
+    in memory from random words rather than from files
+    Arguments:
+        num_docs (int): The number of documents in the index
+        k (int): The number of results per query
+        num_queries (int): The number of queries to time
+        doc_words (int): The number of words in each document
+    """
+    rand = random.Random(0)
+    vocab = [f"term{i}" for i in range(1000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    index = InvertedIndex()
+    for doc in range(num_docs):
+        index.add_document(f"doc{doc}",
+                           rand.choices(vocab, weights, k=doc_words))
+    queries = [rand.sample(vocab[:8], rand.randint(1, 3))
+               for _ in range(num_queries)]
+    engine = SearchEngine(None, [], index)
+    matched = sum(len(engine.get_scores(terms))
+                  for terms in queries) / num_queries
+    print(f"{num_docs} documents, {matched:.0f} matching per query:"
+          f" milliseconds per top {k} query")
+    print(f"{'scorer':>8} {'scores':>8} {'wand':>8} {'numpy':>8}")
+    for scorer in (WfScorer(), BM25Scorer()):
+        engine = SearchEngine(None, [], index, cache_size=0, scorer=scorer)
+        vector = SearchEngine(None, [], index, cache_size=0, scorer=scorer,
+                              backend="numpy")
+        engine.prepare_scoring()
+        vector.prepare_scoring()
+        start = time.perf_counter()
+        for terms in queries:
+            engine.rank(engine.get_scores(terms), k)
+        scores_time = (time.perf_counter() - start) / num_queries
+        start = time.perf_counter()
+        for terms in queries:
+            engine.top_k(terms, k)
+        wand_time = (time.perf_counter() - start) / num_queries
+        start = time.perf_counter()
+        for terms in queries:
+            vector.top_k(terms, k)
+        vector_time = (time.perf_counter() - start) / num_queries
+        name = type(scorer).__name__[:-6]
+        print(f"{name:>8} {scores_time * 1000:>8.2f}"
+              f" {wand_time * 1000:>8.2f} {vector_time * 1000:>8.2f}")
+
+
+def bench_shards(num_docs, shard_counts=(1, 2, 4), num_queries=500):
+    """Print the time to index a generated corpus and the time per query,
+    searching one query at a time and in a batch, with one SearchEngine and
+    with a ShardedSearchEngine of each number of shards
+    Arguments:
+        num_docs (int): The number of documents in the corpus
+        shard_counts (tuple): The numbers of shards to time
+        num_queries (int): The number of queries to time
+    """
+    stopwords = import_stopwords("stop_words.txt", HashTable())
+    with tempfile.TemporaryDirectory() as directory:
+        vocab = make_corpus(directory, num_docs)
+        queries = make_queries(vocab, num_queries)
+        print(f"{num_docs} documents")
+        print(f"{'shards':>8} {'index s':>8} {'query ms':>9} {'batch ms':>9}")
+        for num_shards in (None,) + tuple(shard_counts):
+            start = time.perf_counter()
+            if num_shards is None:
+                engine = SearchEngine(directory, stopwords, cache_size=0)
+            else:
+                engine = ShardedSearchEngine(directory, stopwords, num_shards,
+                                             cache_size=0)
+            index_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for query in queries:
+                engine.search(query)
+            query_time = (time.perf_counter() - start) / num_queries
+            start = time.perf_counter()
+            engine.search_many(queries)
+            batch_time = (time.perf_counter() - start) / num_queries
+            if num_shards is not None:
+                engine.close()
+            name = "none" if num_shards is None else str(num_shards)
+            print(f"{name:>8} {index_time:>8.2f} {query_time * 1000:>9.3f}"
+                  f" {batch_time * 1000:>9.3f}")
+
+
+# The benchmark run for each mode, and the sizes it runs with by default.
+# Each function takes one size
+MODES = {"parallel": (bench_parallel, [100000]),
+         "tokenize": (bench_tokenize, [100]),
+         "rank": (bench_rank, [10000, 1000000]),
+         "prune": (bench_prune, [5000]),
+         "cache": (bench_cache, [2000]),
+         "postings": (bench_postings, [2000]),
+         "batch": (bench_batch, [2000]),
+         "phrase": (bench_phrase, [2000]),
+         "boolean": (bench_boolean, [5000]),
+         "scorers": (bench_scorers, [5000]),
+         "numpy": (bench_numpy, [200000]),
+         "shards": (bench_shards, [20000])}
+
+
+def main():
+    """Run the benchmarks with corpus sizes from the command line
+    """
+    if len(sys.argv) > 1 and sys.argv[1] in MODES:
+        bench, defaults = MODES[sys.argv[1]]
+        for size in [int(float(arg)) for arg in sys.argv[2:]] or defaults:
+            bench(size)
+        return
+    sizes = [int(float(arg)) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [100, 1000]
+    print(f"{'docs':>8} {'index s':>10} {'load ms':>10} {'refresh ms':>10}"
+          f" {'query ms':>10}")
+    for size in sizes:
+        bench_engine(size)
+
+
+if __name__ == '__main__':
+    main()
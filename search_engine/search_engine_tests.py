@@ -2,8 +2,19 @@
 Author: Ben Paulson
 """
 
+import os
+import random
+import shutil
 import unittest
+import tempfile
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from search_engine import SearchEngine
+from inverted_index import InvertedIndex
+from boolean_query import QueryFormatException
+from scorers import WfScorer, TfIdfScorer, BM25Scorer
 from hashtables import HashTableSepchain as HashTable, import_stopwords
 
 
@@ -31,6 +42,22 @@ class SearchEngineTests(unittest.TestCase):
         self.assertEqual(self.se.doc_length[f"{self.dir}\\test.txt"], 2)
 
 
+    def test_tokenize(self):
+        for name in ("hash_table.txt", "information_retrieval.txt"):
+            path = os.path.join(self.dir, name)
+            words = self.se.parse_words(self.se.read_file(path))
+            for chunk_size in (1, 5, 1 << 16):
+                self.se.chunk_size = chunk_size
+                self.assertEqual(list(self.se.tokenize(path)), words)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "doc.txt")
+            with open(path, "w") as outf:
+                outf.write("The (Hash) table,\nTABLE.   hashing")
+            self.se.chunk_size = 4
+            self.assertEqual(list(self.se.tokenize(path)),
+                             ["hash", "table", "table", "hashing"])
+
+
     def test_search(self):
         self.assertEqual(self.se.search("Computer Science")[0][1], 1.0)
         self.assertEqual(str(self.se.search("hash table")[0][1])[:4], "0.06")
@@ -39,5 +66,278 @@ class SearchEngineTests(unittest.TestCase):
         self.assertEqual(len(self.se.search("unix")), 0)
 
 
+    def test_rank(self):
+        scores = [("a", 0.5), ("b", 2.0), ("c", 0.5), ("d", 1.0), ("e", 3.0)]
+        self.assertEqual(self.se.rank(scores, 2), [("e", 3.0), ("b", 2.0)])
+        self.assertEqual(self.se.rank(scores),
+                         [("e", 3.0), ("b", 2.0), ("d", 1.0), ("a", 0.5),
+                          ("c", 0.5)])
+        self.assertEqual(self.se.rank(scores, 4)[-1], ("a", 0.5))
+        self.assertEqual(self.se.rank(scores, 0), [])
+        self.assertEqual(self.se.rank([], 3), [])
+        everything = self.se.search("hash table data", None)
+        self.assertEqual(self.se.search("hash table data", 2), everything[:2])
+        self.assertEqual(len(self.se.search("hash table data", 1)), 1)
+
+
+    def test_search_iter(self):
+        results = self.se.search_iter("hash table data")
+        everything = self.se.search("hash table data", None)
+        self.assertEqual(next(results), everything[0])
+        self.assertEqual(list(results), everything[1:])
+        self.assertEqual(list(self.se.search_iter("unix")), [])
+
+
+    def random_index(self, rand, vocab):
+        """Index 300 documents of 1 to 20 words drawn from vocab, the first
+        words being the most common
+        """
+        index = InvertedIndex()
+        weights = [1 / (i + 1) for i in range(len(vocab))]
+        for doc in range(300):
+            words = rand.choices(vocab, weights, k=rand.randint(1, 20))
+            index.add_document(f"doc{doc}", words)
+        return index
+
+
+    def test_top_k(self):
+        rand = random.Random(0)
+        vocab = [f"word{i}" for i in range(30)]
+        engine = SearchEngine(None, [], self.random_index(rand, vocab))
+        for round_num in range(2):
+            for _ in range(100):
+                terms = rand.sample(vocab, rand.randint(1, 4))
+                for k in (1, 5, 50):
+                    self.assertEqual(engine.top_k(terms, k),
+                                     engine.rank(engine.get_scores(terms), k))
+            for doc in range(round_num, 300, 3):
+                engine.index.remove_document(f"doc{doc}")
+        self.assertEqual(engine.top_k(["unix"], 10), [])
+        self.assertEqual(self.se.search("hash", 1), self.se.search("hash")[:1])
+
+
+    def test_cache(self):
+        first = self.se.search("hash table")
+        self.assertEqual(self.se.cache.stats()["misses"], 1)
+        self.assertEqual(self.se.search("table hash hash"), first)
+        self.assertEqual(self.se.cache.stats()["hits"], 1)
+        self.se.search("hash table")[:] = []
+        self.assertEqual(self.se.search("hash table"), first)
+        self.assertEqual(self.se.search("hash table", None), first)
+        self.assertEqual(self.se.cache.stats()["misses"], 2)
+        self.se.index.add_document("new.txt", ["hash"] * 3)
+        self.assertEqual(self.se.search("hash table")[0][0], "new.txt")
+        self.assertEqual(self.se.cache.stats()["misses"], 3)
+        engine = SearchEngine(self.dir, self.se.stopwords, self.se.index,
+                              cache_size=0)
+        engine.search("hash")
+        engine.search("hash")
+        self.assertEqual(engine.cache.stats()["hits"], 0)
+
+
+    def test_search_many(self):
+        queries = ["hash table", "data", "table hash", "unix", "hash table",
+                   "information retrieval data"]
+        expected = [self.se.search(query, 1) for query in queries]
+        engine = SearchEngine(self.dir, self.se.stopwords, self.se.index)
+        self.assertEqual(engine.search_many(queries, 1), expected)
+        self.assertEqual(engine.cache.stats()["misses"], 4)
+        self.assertEqual(engine.search_many(queries[:2], 1), expected[:2])
+        self.assertEqual(engine.cache.stats()["hits"], 2)
+        engine = SearchEngine(self.dir, self.se.stopwords, self.se.index,
+                              cache_size=0)
+        self.assertEqual(engine.search_many(queries, None),
+                         [self.se.search(query, None) for query in queries])
+        self.assertEqual(engine.search_many(queries, 1, workers=2), expected)
+        self.assertEqual(engine.search_many([]), [])
+
+
+    def test_search_boolean(self):
+        self.assertEqual(self.se.search_boolean("hash OR table OR data"),
+                         self.se.search("hash table data"))
+        hashes = self.se.search("hash", None)
+        tables = [path for path, _ in self.se.search("table", None)]
+        both = [(path, score) for path, score in
+                self.se.search("hash table", None) if path in tables
+                and path in [path for path, _ in hashes]]
+        self.assertEqual(self.se.search_boolean("hash AND table", None), both)
+        self.assertEqual(self.se.search_boolean("hash NOT table", None),
+                         [(path, score) for path, score in hashes
+                          if path not in tables])
+        self.assertEqual(self.se.search_boolean("hash unix"), [])
+        self.assertEqual(self.se.search_boolean("NOT (hash OR data)", None),
+                         [(path, 0.0) for path in self.se.doc_length.keys()
+                          if path not in [path for path, _ in
+                                          self.se.search("hash data", None)]])
+        with self.assertRaises(QueryFormatException):
+            self.se.search_boolean("hash AND")
+
+
+    def count_matches(self, engine, query, distance=None):
+        """Count the phrase or proximity matches of a query in each file by
+        scanning its words
+        """
+        terms = engine.parse_words([query])
+        counts = {}
+        for path in engine.text_files(self.dir):
+            words = engine.parse_words(engine.read_file(path))
+            count = 0
+            for end in range(len(words)):
+                if distance is None:
+                    start = end - len(terms) + 1
+                    count += start >= 0 and words[start:end + 1] == terms
+                elif words[end] in terms:
+                    window = words[max(0, end - distance):end + 1]
+                    count += all(term in window for term in terms)
+            if count:
+                counts[path] = count
+        return counts
+
+
+    def test_phrase(self):
+        engine = SearchEngine(self.dir, self.se.stopwords, positional=True)
+        with self.assertRaises(ValueError):
+            self.se.search_phrase("hash table")
+        self.assertEqual(engine.search("hash table"),
+                         self.se.search("hash table"))
+        for phrase in ("hash table", "hash function", "data structure",
+                       "table hash", "hash of the table", "hash", "unix"):
+            counts = self.count_matches(engine, phrase)
+            results = engine.search_phrase(phrase, None)
+            self.assertEqual(sorted(path for path, _ in results),
+                             sorted(counts))
+            for path, score in results:
+                self.assertAlmostEqual(score, engine.get_wf(counts[path])
+                                       / engine.doc_length[path])
+        for query, distance in (("hash table", 1), ("data hash", 5),
+                                ("table data structure", 10)):
+            counts = self.count_matches(engine, query, distance)
+            results = engine.search_near(query, distance, None)
+            self.assertEqual(sorted(path for path, _ in results),
+                             sorted(counts))
+            for path, score in results:
+                self.assertAlmostEqual(score, engine.get_wf(counts[path])
+                                       / engine.doc_length[path])
+        parallel = SearchEngine(self.dir, self.se.stopwords, workers=2,
+                                positional=True)
+        self.assertEqual(parallel.search_phrase("hash table"),
+                         engine.search_phrase("hash table"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.bin")
+            engine.save(path)
+            loaded = SearchEngine.load(self.dir, self.se.stopwords, path)
+            self.assertEqual(loaded.search_near("data hash", 5),
+                             engine.search_near("data hash", 5))
+            loaded = None
+
+
+    def test_scorers(self):
+        self.assertEqual(self.se.get_wf(0), 0)
+        rand = random.Random(1)
+        vocab = [f"word{i}" for i in range(30)]
+        engine = SearchEngine(None, [], self.random_index(rand, vocab))
+        for scorer in (TfIdfScorer(), BM25Scorer(), BM25Scorer(2, 0.2)):
+            engine.scorer = scorer
+            for _ in range(50):
+                terms = rand.sample(vocab, rand.randint(1, 4))
+                for k in (1, 5, 50):
+                    self.assertEqual(engine.top_k(terms, k),
+                                     engine.rank(engine.get_scores(terms), k))
+        default = self.se.search("hash table")
+        self.se.scorer = BM25Scorer()
+        ranked = self.se.search("hash table")
+        self.assertNotEqual(ranked, default)
+        self.assertEqual(self.se.search_boolean("hash OR table"), ranked)
+        self.se.scorer = WfScorer()
+        self.assertEqual(self.se.search("hash table"), default)
+
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_backend(self):
+        rand = random.Random(2)
+        vocab = [f"word{i}" for i in range(30)]
+        index = self.random_index(rand, vocab)
+        for doc in range(0, 300, 7):
+            index.remove_document(f"doc{doc}")
+        for scorer in (WfScorer(), TfIdfScorer(), BM25Scorer()):
+            engine = SearchEngine(None, [], index, scorer=scorer)
+            vector = SearchEngine(None, [], index, scorer=scorer,
+                                  backend="numpy")
+            for _ in range(50):
+                terms = rand.sample(vocab + ["missing"], rand.randint(1, 4))
+                expected = engine.get_scores(terms)
+                scores = vector.get_scores(terms)
+                self.assertEqual([name for name, _ in scores],
+                                 [name for name, _ in expected])
+                for (_, score), (_, other) in zip(scores, expected):
+                    self.assertAlmostEqual(score, other, places=12)
+                for k in (1, 5, 500):
+                    self.assertEqual(
+                        [name for name, _ in vector.top_k(terms, k)],
+                        [name for name, _ in engine.top_k(terms, k)])
+        queries = ["word0 word3", "word1"]
+        self.assertEqual(vector.search_many(queries),
+                         [vector.search(query) for query in queries])
+        # The index can still grow after numpy has viewed its arrays
+        index.add_document("new", ["novel", "word0"])
+        self.assertEqual([name for name, _ in vector.search("novel")], ["new"])
+        with self.assertRaises(ValueError):
+            SearchEngine(None, [], index, backend="fortran")
+
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.bin")
+            self.se.save(path)
+            loaded = SearchEngine.load(self.dir, self.se.stopwords, path)
+            for query in ("Computer Science", "hash table", "ADT", "unix"):
+                self.assertEqual(loaded.search(query), self.se.search(query))
+            path = os.path.join(self.dir, "hash_table.txt")
+            self.assertEqual(loaded.doc_length[path],
+                             self.se.doc_length[path])
+            loaded = None
+
+
+    def test_parallel_index(self):
+        engine = SearchEngine(self.dir, self.se.stopwords, workers=2)
+        self.assertEqual(list(engine.index.doc_names),
+                         list(self.se.index.doc_names))
+        self.assertEqual(list(engine.index.terms), list(self.se.index.terms))
+        for term in self.se.index.terms:
+            self.assertEqual(engine.index.posting_list(term),
+                             self.se.index.posting_list(term))
+        for query in ("Computer Science", "hash table", "ADT"):
+            self.assertEqual(engine.search(query), self.se.search(query))
+
+
+    def test_refresh(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("hash_table.txt", "data_structure.txt"):
+                shutil.copy(os.path.join(self.dir, name), directory)
+            engine = SearchEngine(directory, self.se.stopwords)
+            self.assertEqual(engine.refresh(), ([], [], []))
+            table = os.path.join(directory, "hash_table.txt")
+            structure = os.path.join(directory, "data_structure.txt")
+            new = os.path.join(directory, "new.txt")
+            with open(new, "w") as outf:
+                outf.write("unix unix tools\n")
+            with open(table, "a") as outf:
+                outf.write("unix\n")
+            os.remove(structure)
+            self.assertEqual(engine.refresh(directory),
+                             ([new], [table], [structure]))
+            self.assertEqual([path for path, _ in engine.search("unix")],
+                             [new, table])
+            self.assertEqual(engine.index.num_docs(), 2)
+            self.assertNotIn(structure, engine.doc_length)
+            stat = os.stat(new)
+            os.utime(new, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertEqual(engine.refresh(), ([], [], []))
+            self.assertEqual(engine.index.doc_stamp(new)[0],
+                             stat.st_mtime_ns + 10 ** 9)
+            engine.remove_document(new)
+            self.assertEqual(len(engine.search("tools")), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,328 @@
+"""Search engine split over worker processes. The documents are partitioned
+into shards, and each shard is indexed and searched by a SearchEngine in its
+own process, so the index is spread over the processes' memory and queries
+use one core per shard. The coordinator talks to each shard over a pipe:
+a query is sent to every shard before any answer is read, so the shards
+search at the same time, and their ranked results are merged with a k-way
+heap.
+Author: Ben Paulson
+"""
+
+import os
+import multiprocessing
+from hashtables import HashTableSepchain as HashTable
+from inverted_index import InvertedIndex
+from min_pq import MinPQ
+from search_engine import SearchEngine
+
+
+class ShardedSearchEngine:
+    """A search engine whose documents are split over shard processes. The
+    text files of the directory are cut into contiguous runs of the sorted
+    list, one per shard, so before any document is added, files with equal
+    scores come out in the order a single SearchEngine gives them.
+    Each shard scores with statistics of its own documents: the default
+    scoring only depends on the document, so results match a single
+    SearchEngine, but the tf-idf and BM25 weights come from the shard
+    Attributes:
+        directory (str): a directory name
+        stopwords (HashTable): a hash table containing stopwords
+        connections (list): the coordinator's end of each shard's pipe
+        processes (list): the process of each shard
+        owners (HashTable): the shard each document is in, by name
+        shard_sizes (list): the number of documents in each shard
+    """
+    def __init__(self, directory, stopwords, num_shards=None,
+                 engine_class=SearchEngine, **options):
+        """Start the shard processes and index the text files of a
+        directory, each shard indexing its part at the same time
+        Args:
+            directory (str): the path of a directory
+            stopwords (HashTable): a hash table containing stopwords
+            num_shards (int): the number of shard processes. None uses one
+                              per core
+            engine_class (class): the engine each shard runs
+            options: keyword arguments for each shard's engine, e.g.
+                     positional, scorer, backend or cache_size
+        """
+        if num_shards is None:
+            num_shards = os.cpu_count() or 1
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.directory = directory
+        self.stopwords = stopwords
+        paths = engine_class.text_files(directory)
+        shards = [paths[len(paths) * i // num_shards:
+                        len(paths) * (i + 1) // num_shards]
+                  for i in range(num_shards)]
+        self.owners = HashTable()
+        self.shard_sizes = []
+        for shard, shard_paths in enumerate(shards):
+            for path in shard_paths:
+                self.owners[path] = shard
+            self.shard_sizes.append(len(shard_paths))
+        self.connections = []
+        self.processes = []
+        for shard_paths in shards:
+            connection, shard_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_shard,
+                args=(shard_connection, engine_class, directory, stopwords,
+                      shard_paths, options),
+                daemon=True)
+            process.start()
+            shard_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        try:
+            self.gather()
+        except BaseException:
+            self.close()
+            raise
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        """Stop the shard processes. The engine cannot be used afterwards
+        """
+        for connection in self.connections:
+            try:
+                connection.send(("close", ()))
+            except OSError:
+                pass # the shard has already exited
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+    def gather(self, shards=None):
+        """Read one answer from each of the given shards
+        Args:
+            shards (list): the shard numbers. Defaults to every shard
+        Returns:
+            list: each shard's answer, in the order of shards
+        Raises:
+            Exception: the first exception raised by a shard, after every
+                       shard has answered
+        """
+        if shards is None:
+            shards = range(len(self.connections))
+        answers = [self.connections[shard].recv() for shard in shards]
+        for status, answer in answers:
+            if status == "error":
+                raise answer
+        return [answer for _, answer in answers]
+
+
+    def scatter(self, method, *args):
+        """Call a method of every shard's engine, the shards running at the
+        same time
+        Args:
+            method (str): the name of the SearchEngine method
+            args: the method's arguments
+        Returns:
+            list: what each shard's method returned, by shard
+        """
+        if not self.connections:
+            raise ValueError("the engine has been closed")
+        for connection in self.connections:
+            connection.send((method, args))
+        return self.gather()
+
+
+    def call(self, shard, method, *args):
+        """Call a method of one shard's engine
+        Args:
+            shard (int): the shard number
+            method (str): the name of the SearchEngine method
+            args: the method's arguments
+        Returns:
+            any: what the method returned
+        """
+        if not self.connections:
+            raise ValueError("the engine has been closed")
+        self.connections[shard].send((method, args))
+        return self.gather([shard])[0]
+
+
+    def search(self, query, k=10):
+        """Search for the query items in files, as SearchEngine.search. Each
+        shard finds its own top k and the coordinator merges them
+        Arguments:
+            query (str): query input: e.g. "Computer Science"
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        """
+        return merge_ranked(self.scatter("search", query, k), k)
+
+
+    def search_many(self, queries, k=10):
+        """Search for many queries at once, sending the whole batch to each
+        shard in one message, as SearchEngine.search_many
+        Arguments:
+            queries (list): a list of str queries
+            k (int): the number of results for each query. None returns
+                     every matching file
+        Returns:
+            list: the results search would give for each query, in order
+        """
+        shard_results = self.scatter("search_many", queries, k)
+        return [merge_ranked([results[i] for results in shard_results], k)
+                for i in range(len(queries))]
+
+
+    def search_boolean(self, query, k=10):
+        """Search for files matching a Boolean query, as
+        SearchEngine.search_boolean
+        Args:
+            query (str): the Boolean query
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        Raises:
+            QueryFormatException: if the query is malformed
+        """
+        return merge_ranked(self.scatter("search_boolean", query, k), k)
+
+
+    def search_phrase(self, phrase, k=10):
+        """Search for files containing a phrase, as SearchEngine.search_phrase.
+        The shards must have been created with positional=True
+        Args:
+            phrase (str): the phrase: e.g. "hash table"
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        Raises:
+            ValueError: if the shards do not keep positions
+        """
+        return merge_ranked(self.scatter("search_phrase", phrase, k), k)
+
+
+    def search_near(self, query, distance, k=10):
+        """Search for files in which the words of the query are within
+        distance words of each other, as SearchEngine.search_near
+        Args:
+            query (str): query input: e.g. "hash table"
+            distance (int): the most words from the first word of a match
+                            to the last
+            k (int): the number of results to return. None returns every
+                     matching file
+        Returns:
+            list: a list of at most k tuples: (file_path_name, score) sorted
+                  in descending order of relevancy
+        Raises:
+            ValueError: if the shards do not keep positions
+        """
+        return merge_ranked(self.scatter("search_near", query, distance, k),
+                            k)
+
+
+    def add_document(self, path):
+        """index a file in the shard that holds it, or if it is new, in the
+        shard with the fewest documents
+        Args:
+            path (str): the path to a file
+        """
+        if path in self.owners:
+            shard = self.owners[path]
+        else:
+            shard = self.shard_sizes.index(min(self.shard_sizes))
+        self.call(shard, "add_document", path)
+        if path not in self.owners:
+            self.owners[path] = shard
+            self.shard_sizes[shard] += 1
+
+
+    def remove_document(self, path):
+        """remove a file from the shard that holds it
+        Args:
+            path (str): the path the file was indexed under
+        Raises:
+            KeyError: if the file is not in the index
+        """
+        if path not in self.owners:
+            raise KeyError(path)
+        shard = self.owners[path]
+        self.call(shard, "remove_document", path)
+        self.owners.remove(path)
+        self.shard_sizes[shard] -= 1
+
+
+def merge_ranked(ranked_lists, k):
+    """Merge lists of results, each in descending order of score, with a
+    k-way heap holding the next result of each list. Taking a result costs
+    O(log n) for n lists, and only the first k are taken. Equal scores are
+    taken from the earlier list first
+    Args:
+        ranked_lists (list): lists of tuples (file_path_name, score), each
+                             sorted in descending order of relevancy
+        k (int): the number of results to keep. None keeps them all
+    Returns:
+        list: a list of at most k tuples: (file_path_name, score) sorted in
+              descending order of relevancy
+    """
+    heap = MinPQ()
+    for i, ranked in enumerate(ranked_lists):
+        if len(ranked) > 0:
+            heap.insert((-ranked[0][1], i, 0))
+    merged = []
+    while not heap.is_empty() and (k is None or len(merged) < k):
+        _, i, pos = heap.del_min()
+        merged.append(ranked_lists[i][pos])
+        if pos + 1 < len(ranked_lists[i]):
+            heap.insert((-ranked_lists[i][pos + 1][1], i, pos + 1))
+    return merged
+
+
+def run_shard(connection, engine_class, directory, stopwords, paths, options):
+    """The loop of a shard process. The shard indexes its files and answers
+    ("ok", None) once ready, then runs each (method, args) message it
+    receives on its engine, answering ("ok", result), or ("error", error) if
+    the method raised, until it receives ("close", ()) or the coordinator
+    goes away
+    Args:
+        connection (Connection): the shard's end of its pipe
+        engine_class (class): the engine to run
+        directory (str): the directory the files are in
+        stopwords (HashTable): a hash table containing stopwords
+        paths (list): the files of the shard
+        options (dict): keyword arguments for the engine
+    """
+    try:
+        engine = engine_class(directory, stopwords,
+                              InvertedIndex(options.get("positional", False)),
+                              **options)
+        for path in paths:
+            engine.add_document(path)
+        connection.send(("ok", None))
+    except Exception as error:
+        connection.send(("error", error))
+        return
+    while True:
+        try:
+            method, args = connection.recv()
+        except EOFError:
+            return
+        if method == "close":
+            return
+        try:
+            connection.send(("ok", getattr(engine, method)(*args)))
+        except Exception as error:
+            connection.send(("error", error))
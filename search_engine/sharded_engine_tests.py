@@ -0,0 +1,99 @@
+"""Tests for the sharded search engine
+Author: Ben Paulson
+"""
+
+import os
+import random
+import unittest
+import tempfile
+from search_engine import SearchEngine
+from sharded_engine import ShardedSearchEngine, merge_ranked
+from boolean_query import QueryFormatException
+from hashtables import HashTableSepchain as HashTable, import_stopwords
+
+
+class ShardedSearchEngineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.stopwords = import_stopwords("stop_words.txt", HashTable())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        rand = random.Random(0)
+        self.vocab = [f"word{i}" for i in range(20)]
+        for doc in range(40):
+            words = rand.choices(self.vocab, [1 / (i + 1) for i in range(20)],
+                                 k=rand.randint(1, 30))
+            with open(os.path.join(self.dir, f"doc{doc:02}.txt"), "w") as outf:
+                outf.write(" ".join(words) + "\n")
+        self.se = SearchEngine(self.dir, self.stopwords, positional=True)
+        self.sharded = ShardedSearchEngine(self.dir, self.stopwords, 3,
+                                           positional=True)
+
+    def tearDown(self):
+        self.sharded.close()
+        self.tmp.cleanup()
+
+    def test_merge_ranked(self):
+        first = [("a", 3.0), ("b", 1.0)]
+        second = [("c", 2.0), ("d", 1.0), ("e", 0.5)]
+        self.assertEqual(merge_ranked([first, second], None),
+                         [("a", 3.0), ("c", 2.0), ("b", 1.0), ("d", 1.0),
+                          ("e", 0.5)])
+        self.assertEqual(merge_ranked([first, [], second], 2),
+                         [("a", 3.0), ("c", 2.0)])
+        self.assertEqual(merge_ranked([], 10), [])
+
+    def test_search(self):
+        rand = random.Random(1)
+        for _ in range(30):
+            query = " ".join(rand.sample(self.vocab, rand.randint(1, 3)))
+            for k in (1, 5, None):
+                self.assertEqual(self.sharded.search(query, k),
+                                 self.se.search(query, k))
+        self.assertEqual(self.sharded.search("missing"), [])
+        queries = ["word0 word5", "word3", "word0 word5", "missing"]
+        self.assertEqual(self.sharded.search_many(queries, 5),
+                         self.se.search_many(queries, 5))
+
+    def test_other_queries(self):
+        for query in ("word1 AND NOT word2", "word3 OR word7 word0"):
+            self.assertEqual(self.sharded.search_boolean(query),
+                             self.se.search_boolean(query))
+        self.assertEqual(self.sharded.search_phrase("word0 word1", None),
+                         self.se.search_phrase("word0 word1", None))
+        self.assertEqual(self.sharded.search_near("word2 word4", 3),
+                         self.se.search_near("word2 word4", 3))
+        with self.assertRaises(QueryFormatException):
+            self.sharded.search_boolean("word1 AND")
+        # The shards still answer after an error
+        self.assertEqual(self.sharded.search("word1"), self.se.search("word1"))
+
+    def test_add_remove(self):
+        new = os.path.join(self.dir, "new.txt")
+        with open(new, "w") as outf:
+            outf.write("word19 novel\n")
+        self.sharded.add_document(new)
+        self.assertEqual(self.sharded.shard_sizes, [14, 13, 14])
+        self.assertEqual(self.sharded.search("novel"), [(new, 0.5)])
+        self.sharded.add_document(new)
+        self.assertEqual(sum(self.sharded.shard_sizes), 41)
+        old = os.path.join(self.dir, "doc00.txt")
+        self.sharded.remove_document(old)
+        self.se.remove_document(old)
+        self.assertEqual(self.sharded.search("word0", None),
+                         self.se.search("word0", None))
+        with self.assertRaises(KeyError):
+            self.sharded.remove_document(old)
+
+    def test_close(self):
+        with ShardedSearchEngine(self.dir, self.stopwords, 2) as engine:
+            self.assertEqual(engine.search("word4"), self.se.search("word4"))
+            with self.assertRaises(ValueError):
+                engine.search_phrase("word0 word1")
+        self.assertEqual(engine.processes, [])
+        with self.assertRaises(ValueError):
+            engine.search("word4")
+
+
+if __name__ == '__main__':
+    unittest.main()